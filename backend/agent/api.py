@@ -14,11 +14,13 @@ import os
 from agentpress.thread_manager import ThreadManager
 from services.supabase import DBConnection
 from services import redis
+from services.single_flight import SingleFlight
 from utils.auth_utils import get_current_user_id_from_jwt, get_user_id_from_stream_auth, verify_thread_access, verify_admin_api_key
 from utils.logger import logger, structlog
 from services.billing import check_billing_status, can_use_model
 from utils.config import config
-from sandbox.sandbox import create_sandbox, delete_sandbox, get_or_start_sandbox
+from sandbox.sandbox import delete_sandbox
+from sandbox.pool import sandbox_pool
 from services.llm import make_llm_api_call
 from run_agent_background import run_agent_background, _cleanup_redis_response_list, update_agent_run_status
 from utils.constants import MODEL_NAME_ALIASES
@@ -26,6 +28,8 @@ from flags.flags import is_enabled
 
 from .config_helper import extract_agent_config, build_unified_config, extract_tools_for_agent_run, get_mcp_configs
 from .versioning.facade import version_manager
+from .versioning.config_cache import agent_config_cache
+from .versioning.services.identity_map import VersionIdentityMap
 from .versioning.api.routes import router as version_router
 from .versioning.infrastructure.dependencies import set_db_connection
 from agent.services.suna_default_agent_service import SunaDefaultAgentService
@@ -36,8 +40,13 @@ router.include_router(version_router)
 db = None
 instance_id = None # Global instance ID for this backend instance
 
+# Run status changes constantly, so concurrent polls only share the in-flight read
+agent_run_flight = SingleFlight("agent_run")
+
 # TTL for Redis response lists (24 hours)
 REDIS_RESPONSE_LIST_TTL = 3600 * 24
+# Agents fetched per page when tool filters have to be applied in Python
+AGENT_FILTER_PAGE_SIZE = 200
 
 
 
@@ -162,7 +171,7 @@ async def cleanup():
     # Use the instance_id to find and clean up this instance's keys
     try:
         if instance_id: # Ensure instance_id is set
-            running_keys = await redis.keys(f"active_run:{instance_id}:*")
+            running_keys = await redis.scan_keys(f"active_run:{instance_id}:*")
             logger.info(f"Found {len(running_keys)} running agent runs for instance {instance_id} to clean up")
 
             for key in running_keys:
@@ -208,17 +217,11 @@ async def stop_agent_run(agent_run_id: str, error_message: Optional[str] = None)
     if not update_success:
         logger.error(f"Failed to update database status for stopped/failed run {agent_run_id}")
 
-    # Send STOP signal to the global control channel
+    # Find all instances handling this agent run so they get STOP on their own channels too
     global_control_channel = f"agent_run:{agent_run_id}:control"
+    control_channels = [global_control_channel]
     try:
-        await redis.publish(global_control_channel, "STOP")
-        logger.debug(f"Published STOP signal to global channel {global_control_channel}")
-    except Exception as e:
-        logger.error(f"Failed to publish STOP signal to global channel {global_control_channel}: {str(e)}")
-
-    # Find all instances handling this agent run and send STOP to instance-specific channels
-    try:
-        instance_keys = await redis.keys(f"active_run:*:{agent_run_id}")
+        instance_keys = await redis.scan_keys(f"active_run:*:{agent_run_id}")
         logger.debug(f"Found {len(instance_keys)} active instance keys for agent run {agent_run_id}")
 
         for key in instance_keys:
@@ -226,26 +229,33 @@ async def stop_agent_run(agent_run_id: str, error_message: Optional[str] = None)
             parts = key.split(":")
             if len(parts) == 3:
                 instance_id_from_key = parts[1]
-                instance_control_channel = f"agent_run:{agent_run_id}:control:{instance_id_from_key}"
-                try:
-                    await redis.publish(instance_control_channel, "STOP")
-                    logger.debug(f"Published STOP signal to instance channel {instance_control_channel}")
-                except Exception as e:
-                    logger.warning(f"Failed to publish STOP signal to instance channel {instance_control_channel}: {str(e)}")
+                control_channels.append(f"agent_run:{agent_run_id}:control:{instance_id_from_key}")
             else:
                  logger.warning(f"Unexpected key format found: {key}")
+    except Exception as e:
+        logger.error(f"Failed to find active instances for {agent_run_id}: {str(e)}")
 
-        # Clean up the response list immediately on stop/fail
-        await _cleanup_redis_response_list(agent_run_id)
-
+    # Send STOP to the global and instance channels in one round trip
+    try:
+        await redis.publish_many(control_channels, "STOP")
+        logger.debug(f"Published STOP signal to {len(control_channels)} control channel(s) for {agent_run_id}")
     except Exception as e:
-        logger.error(f"Failed to find or signal active instances for {agent_run_id}: {str(e)}")
+        logger.error(f"Failed to publish STOP signal for {agent_run_id}: {str(e)}")
+
+    # Clean up the response list immediately on stop/fail
+    await _cleanup_redis_response_list(agent_run_id)
 
     logger.info(f"Successfully initiated stop process for agent run: {agent_run_id}")
 
 
 
 async def get_agent_run_with_access_check(client, agent_run_id: str, user_id: str):
+    return await agent_run_flight.do(
+        (agent_run_id, user_id),
+        lambda: _load_agent_run_with_access_check(client, agent_run_id, user_id)
+    )
+
+async def _load_agent_run_with_access_check(client, agent_run_id: str, user_id: str):
     agent_run = await client.table('agent_runs').select('*').eq('id', agent_run_id).execute()
     if not agent_run.data:
         raise HTTPException(status_code=404, detail="Agent run not found")
@@ -290,8 +300,16 @@ async def start_agent(
     logger.info(f"Starting new agent for thread: {thread_id} with config: model={model_name}, thinking={body.enable_thinking}, effort={body.reasoning_effort}, stream={body.stream}, context_manager={body.enable_context_manager} (Instance: {instance_id})")
     client = await db.client
 
-    await verify_thread_access(client, thread_id, user_id)
-    thread_result = await client.table('threads').select('project_id', 'account_id', 'agent_id', 'metadata').eq('thread_id', thread_id).execute()
+    # Access check and thread load are independent; both must finish before any
+    # account-scoped work starts so an unauthorized caller learns nothing else
+    access_result, thread_result = await asyncio.gather(
+        verify_thread_access(client, thread_id, user_id),
+        client.table('threads').select('project_id', 'account_id', 'agent_id', 'metadata').eq('thread_id', thread_id).execute(),
+        return_exceptions=True
+    )
+    for outcome in (access_result, thread_result):
+        if isinstance(outcome, BaseException):
+            raise outcome
     if not thread_result.data:
         raise HTTPException(status_code=404, detail="Thread not found")
     thread_data = thread_result.data[0]
@@ -315,119 +333,125 @@ async def start_agent(
         logger.info(f"Thread {thread_id} is in agent builder mode, target_agent_id: {target_agent_id}")
     
     # Load agent configuration with version support
-    agent_config = None
-    effective_agent_id = body.agent_id or thread_agent_id  # Use provided agent_id or the one stored in thread
-    
-    logger.info(f"[AGENT LOAD] Agent loading flow:")
-    logger.info(f"  - body.agent_id: {body.agent_id}")
-    logger.info(f"  - thread_agent_id: {thread_agent_id}")
-    logger.info(f"  - effective_agent_id: {effective_agent_id}")
-    
-    if effective_agent_id:
-        logger.info(f"[AGENT LOAD] Querying for agent: {effective_agent_id}")
-        # Get agent
-        agent_result = await client.table('agents').select('*').eq('agent_id', effective_agent_id).eq('account_id', account_id).execute()
-        logger.info(f"[AGENT LOAD] Query result: found {len(agent_result.data) if agent_result.data else 0} agents")
-        
-        if not agent_result.data:
-            if body.agent_id:
-                raise HTTPException(status_code=404, detail="Agent not found or access denied")
-            else:
-                logger.warning(f"Stored agent_id {effective_agent_id} not found, falling back to default")
-                effective_agent_id = None
-        else:
-            agent_data = agent_result.data[0]
-            version_data = None
-            if agent_data.get('current_version_id'):
-                try:
-                    version_dict = await version_manager.get_version(
-                        agent_id=effective_agent_id,
-                        version_id=agent_data['current_version_id'],
-                        user_id=user_id
-                    )
-                    version_data = version_dict
-                    logger.info(f"[AGENT LOAD] Got version data from version manager: {version_data.get('version_name')}")
-                except Exception as e:
-                    logger.warning(f"[AGENT LOAD] Failed to get version data: {e}")
-            
-            logger.info(f"[AGENT LOAD] About to call extract_agent_config with agent_data keys: {list(agent_data.keys())}")
-            logger.info(f"[AGENT LOAD] version_data type: {type(version_data)}, has data: {version_data is not None}")
-            
-            agent_config = extract_agent_config(agent_data, version_data)
+    async def load_agent_config():
+        agent_config = None
+        effective_agent_id = body.agent_id or thread_agent_id  # Use provided agent_id or the one stored in thread
+        
+        logger.info(f"[AGENT LOAD] Agent loading flow:")
+        logger.info(f"  - body.agent_id: {body.agent_id}")
+        logger.info(f"  - thread_agent_id: {thread_agent_id}")
+        logger.info(f"  - effective_agent_id: {effective_agent_id}")
+        
+        if effective_agent_id:
+            logger.info(f"[AGENT LOAD] Querying for agent: {effective_agent_id}")
+            # Get agent
+            agent_result = await client.table('agents').select('*').eq('agent_id', effective_agent_id).eq('account_id', account_id).execute()
+            logger.info(f"[AGENT LOAD] Query result: found {len(agent_result.data) if agent_result.data else 0} agents")
             
-            if version_data:
-                logger.info(f"Using agent {agent_config['name']} ({effective_agent_id}) version {agent_config.get('version_name', 'v1')}")
+            if not agent_result.data:
+                if body.agent_id:
+                    raise HTTPException(status_code=404, detail="Agent not found or access denied")
+                else:
+                    logger.warning(f"Stored agent_id {effective_agent_id} not found, falling back to default")
+                    effective_agent_id = None
             else:
-                logger.info(f"Using agent {agent_config['name']} ({effective_agent_id}) - no version data")
-            source = "request" if body.agent_id else "thread"
-    else:
-        logger.info(f"[AGENT LOAD] No effective_agent_id, will try default agent")
-    
-    if not agent_config:
-        logger.info(f"[AGENT LOAD] No agent config yet, querying for default agent")
-        default_agent_result = await client.table('agents').select('*').eq('account_id', account_id).eq('is_default', True).execute()
-        logger.info(f"[AGENT LOAD] Default agent query result: found {len(default_agent_result.data) if default_agent_result.data else 0} default agents")
+                agent_data = agent_result.data[0]
+                version_data = None
+                if agent_data.get('current_version_id'):
+                    try:
+                        version_dict = await agent_config_cache.get_version_dict(
+                            effective_agent_id, agent_data['current_version_id']
+                        )
+                        version_data = version_dict
+                        logger.info(f"[AGENT LOAD] Got version data from version manager: {version_data.get('version_name')}")
+                    except Exception as e:
+                        logger.warning(f"[AGENT LOAD] Failed to get version data: {e}")
+                
+                logger.info(f"[AGENT LOAD] About to call extract_agent_config with agent_data keys: {list(agent_data.keys())}")
+                logger.info(f"[AGENT LOAD] version_data type: {type(version_data)}, has data: {version_data is not None}")
+                
+                agent_config = extract_agent_config(agent_data, version_data)
+                
+                if version_data:
+                    logger.info(f"Using agent {agent_config['name']} ({effective_agent_id}) version {agent_config.get('version_name', 'v1')}")
+                else:
+                    logger.info(f"Using agent {agent_config['name']} ({effective_agent_id}) - no version data")
+                source = "request" if body.agent_id else "thread"
+        else:
+            logger.info(f"[AGENT LOAD] No effective_agent_id, will try default agent")
         
-        if default_agent_result.data:
-            agent_data = default_agent_result.data[0]
-            
-            # Use versioning system to get current version
-            version_data = None
-            if agent_data.get('current_version_id'):
-                try:
-                    version_dict = await version_manager.get_version(
-                        agent_id=agent_data['agent_id'],
-                        version_id=agent_data['current_version_id'],
-                        user_id=user_id
-                    )
-                    version_data = version_dict
-                    logger.info(f"[AGENT LOAD] Got default agent version from version manager: {version_data.get('version_name')}")
-                except Exception as e:
-                    logger.warning(f"[AGENT LOAD] Failed to get default agent version data: {e}")
-            
-            logger.info(f"[AGENT LOAD] About to call extract_agent_config for DEFAULT agent with version data: {version_data is not None}")
-            
-            agent_config = extract_agent_config(agent_data, version_data)
+        if not agent_config:
+            logger.info(f"[AGENT LOAD] No agent config yet, querying for default agent")
+            default_agent_result = await client.table('agents').select('*').eq('account_id', account_id).eq('is_default', True).execute()
+            logger.info(f"[AGENT LOAD] Default agent query result: found {len(default_agent_result.data) if default_agent_result.data else 0} default agents")
             
-            if version_data:
-                logger.info(f"Using default agent: {agent_config['name']} ({agent_config['agent_id']}) version {agent_config.get('version_name', 'v1')}")
+            if default_agent_result.data:
+                agent_data = default_agent_result.data[0]
+                
+                # Use versioning system to get current version
+                version_data = None
+                if agent_data.get('current_version_id'):
+                    try:
+                        version_dict = await agent_config_cache.get_version_dict(
+                            agent_data['agent_id'], agent_data['current_version_id']
+                        )
+                        version_data = version_dict
+                        logger.info(f"[AGENT LOAD] Got default agent version from version manager: {version_data.get('version_name')}")
+                    except Exception as e:
+                        logger.warning(f"[AGENT LOAD] Failed to get default agent version data: {e}")
+                
+                logger.info(f"[AGENT LOAD] About to call extract_agent_config for DEFAULT agent with version data: {version_data is not None}")
+                
+                agent_config = extract_agent_config(agent_data, version_data)
+                
+                if version_data:
+                    logger.info(f"Using default agent: {agent_config['name']} ({agent_config['agent_id']}) version {agent_config.get('version_name', 'v1')}")
+                else:
+                    logger.info(f"Using default agent: {agent_config['name']} ({agent_config['agent_id']}) - no version data")
             else:
-                logger.info(f"Using default agent: {agent_config['name']} ({agent_config['agent_id']}) - no version data")
-        else:
-            logger.warning(f"[AGENT LOAD] No default agent found for account {account_id}")
-    
-    logger.info(f"[AGENT LOAD] Final agent_config: {agent_config is not None}")
-    if agent_config:
-        logger.info(f"[AGENT LOAD] Agent config keys: {list(agent_config.keys())}")
+                logger.warning(f"[AGENT LOAD] No default agent found for account {account_id}")
+        
+        logger.info(f"[AGENT LOAD] Final agent_config: {agent_config is not None}")
+        if agent_config:
+            logger.info(f"[AGENT LOAD] Agent config keys: {list(agent_config.keys())}")
+
+        return agent_config
+
+    async def load_project_sandbox_id():
+        project_result = await client.table('projects').select('sandbox').eq('project_id', project_id).execute()
+        if not project_result.data:
+            raise HTTPException(status_code=404, detail="Project not found")
+        sandbox_info = project_result.data[0].get('sandbox') or {}
+        if not sandbox_info.get('id'):
+            raise HTTPException(status_code=404, detail="No sandbox found for this project")
+        return sandbox_info['id']
+
+    # Everything below depends only on the thread, so it runs concurrently. Failures
+    # are raised in this order so clients see the same error precedence as before.
+    agent_outcome, model_outcome, billing_outcome, sandbox_outcome = await asyncio.gather(
+        load_agent_config(),
+        can_use_model(client, account_id, model_name),
+        check_billing_status(client, account_id),
+        load_project_sandbox_id(),
+        return_exceptions=True
+    )
+    for outcome in (agent_outcome, model_outcome, billing_outcome, sandbox_outcome):
+        if isinstance(outcome, BaseException):
+            raise outcome
+    agent_config = agent_outcome
+    sandbox_id = sandbox_outcome
 
     if body.agent_id and body.agent_id != thread_agent_id and agent_config:
         logger.info(f"Using agent {agent_config['agent_id']} for this agent run (thread remains agent-agnostic)")
 
-    can_use, model_message, allowed_models = await can_use_model(client, account_id, model_name)
+    can_use, model_message, allowed_models = model_outcome
     if not can_use:
         raise HTTPException(status_code=403, detail={"message": model_message, "allowed_models": allowed_models})
 
-    can_run, message, subscription = await check_billing_status(client, account_id)
+    can_run, message, subscription = billing_outcome
     if not can_run:
         raise HTTPException(status_code=402, detail={"message": message, "subscription": subscription})
 
-    try:
-        project_result = await client.table('projects').select('*').eq('project_id', project_id).execute()
-        if not project_result.data:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        project_data = project_result.data[0]
-        sandbox_info = project_data.get('sandbox', {})
-        if not sandbox_info.get('id'):
-            raise HTTPException(status_code=404, detail="No sandbox found for this project")
-            
-        sandbox_id = sandbox_info['id']
-        sandbox = await get_or_start_sandbox(sandbox_id)
-        logger.info(f"Successfully started sandbox {sandbox_id} for project {project_id}")
-    except Exception as e:
-        logger.error(f"Failed to start sandbox for project {project_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to initialize sandbox: {str(e)}")
-
     agent_run = await client.table('agent_runs').insert({
         "thread_id": thread_id, "status": "running",
         "started_at": datetime.now(timezone.utc).isoformat(),
@@ -466,6 +490,7 @@ async def start_agent(
         is_agent_builder=is_agent_builder,
         target_agent_id=target_agent_id,
         request_id=request_id,
+        sandbox_id=sandbox_id,  # Started by the worker, off the request path
     )
 
     return {"agent_run_id": agent_run_id, "status": "running"}
@@ -587,10 +612,8 @@ async def get_thread_agent(thread_id: str, user_id: str = Depends(get_current_us
         current_version = None
         if agent_data.get('current_version_id'):
             try:
-                version_dict = await version_manager.get_version(
-                    agent_id=effective_agent_id,
-                    version_id=agent_data['current_version_id'],
-                    user_id=user_id
+                version_dict = await agent_config_cache.get_version_dict(
+                    effective_agent_id, agent_data['current_version_id']
                 )
                 version_data = version_dict
                 
@@ -951,10 +974,8 @@ async def initiate_agent_with_files(
         version_data = None
         if agent_data.get('current_version_id'):
             try:
-                version_dict = await version_manager.get_version(
-                    agent_id=agent_id,
-                    version_id=agent_data['current_version_id'],
-                    user_id=user_id
+                version_dict = await agent_config_cache.get_version_dict(
+                    agent_id, agent_data['current_version_id']
                 )
                 version_data = version_dict
                 logger.info(f"[AGENT INITIATE] Got version data from version manager: {version_data.get('version_name')}")
@@ -983,10 +1004,8 @@ async def initiate_agent_with_files(
             version_data = None
             if agent_data.get('current_version_id'):
                 try:
-                    version_dict = await version_manager.get_version(
-                        agent_id=agent_data['agent_id'],
-                        version_id=agent_data['current_version_id'],
-                        user_id=user_id
+                    version_dict = await agent_config_cache.get_version_dict(
+                        agent_data['agent_id'], agent_data['current_version_id']
                     )
                     version_data = version_dict
                     logger.info(f"[AGENT INITIATE] Got default agent version from version manager: {version_data.get('version_name')}")
@@ -1029,11 +1048,10 @@ async def initiate_agent_with_files(
         # 2. Create Sandbox
         sandbox_id = None
         try:
-            # Create real Daytona sandbox
-            sandbox_pass = str(uuid.uuid4())
-            sandbox = await create_sandbox(sandbox_pass, project_id)
+            # Claim a warm sandbox from the pool, or create a Daytona sandbox on a miss
+            sandbox, sandbox_pass = await sandbox_pool.acquire(project_id)
             sandbox_id = sandbox.id
-            logger.info(f"Created new sandbox {sandbox_id} for project {project_id}")
+            logger.info(f"Using sandbox {sandbox_id} for project {project_id}")
             
             # Get preview URLs using the correct method
             vnc_preview = await sandbox.get_preview_link(6080)  # VNC port
@@ -1217,6 +1235,67 @@ async def initiate_agent_with_files(
 
 # Custom agents
 
+def _is_tool_enabled(tool_data: Any) -> bool:
+    return tool_data is True or (isinstance(tool_data, dict) and tool_data.get('enabled') is True)
+
+
+def _tools_count(agent: Dict[str, Any], version_data: Optional[Dict[str, Any]]) -> int:
+    """MCPs plus enabled AgentPress tools, counted like agent_versions.tools_count.
+    
+    Uses the current version when there is one, otherwise the agent row.
+    """
+    source = version_data or agent
+    configured_mcps = source.get('configured_mcps') or []
+    agentpress_tools = source.get('agentpress_tools') or {}
+    return len(configured_mcps) + sum(1 for tool_data in agentpress_tools.values() if _is_tool_enabled(tool_data))
+
+
+def _matches_tool_filters(
+    agent: Dict[str, Any],
+    version_data: Optional[Dict[str, Any]],
+    has_mcp_tools: Optional[bool],
+    has_agentpress_tools: Optional[bool],
+    tools_filter: List[str]
+) -> bool:
+    agent_config = extract_agent_config(agent, version_data)
+    configured_mcps = agent_config['configured_mcps']
+    agentpress_tools = agent_config['agentpress_tools']
+    
+    # Check MCP tools filter
+    if has_mcp_tools is not None:
+        has_mcp = bool(configured_mcps and len(configured_mcps) > 0)
+        if has_mcp_tools != has_mcp:
+            return False
+    
+    # Check AgentPress tools filter
+    if has_agentpress_tools is not None:
+        has_enabled_tools = any(
+            tool_data and isinstance(tool_data, dict) and tool_data.get('enabled', False)
+            for tool_data in agentpress_tools.values()
+        )
+        if has_agentpress_tools != has_enabled_tools:
+            return False
+    
+    # Check specific tools filter
+    if tools_filter:
+        agent_tools = set()
+        # Add MCP tools
+        for mcp in configured_mcps:
+            if isinstance(mcp, dict) and 'name' in mcp:
+                agent_tools.add(f"mcp:{mcp['name']}")
+        
+        # Add enabled AgentPress tools
+        for tool_name, tool_data in agentpress_tools.items():
+            if tool_data and isinstance(tool_data, dict) and tool_data.get('enabled', False):
+                agent_tools.add(f"agentpress:{tool_name}")
+        
+        # Check if any of the requested tools are present
+        if not any(tool in agent_tools for tool in tools_filter):
+            return False
+    
+    return True
+
+
 @router.get("/agents", response_model=AgentsResponse)
 async def get_agents(
     user_id: str = Depends(get_current_user_id_from_jwt),
@@ -1243,149 +1322,107 @@ async def get_agents(
         # Calculate offset
         offset = (page - 1) * limit
         
-        # Start building the query
-        query = client.table('agents').select('*', count='exact').eq("account_id", user_id)
-        
-        # Apply search filter
-        if search:
-            search_term = f"%{search}%"
-            query = query.or_(f"name.ilike.{search_term},description.ilike.{search_term}")
-        
-        # Apply filters
-        if has_default is not None:
-            query = query.eq("is_default", has_default)
-        
-        # For MCP and AgentPress tools filtering, we'll need to do post-processing
-        # since Supabase doesn't have great JSON array/object filtering
-        
-        # Apply sorting
-        if sort_by == "name":
-            query = query.order("name", desc=(sort_order == "desc"))
-        elif sort_by == "updated_at":
-            query = query.order("updated_at", desc=(sort_order == "desc"))
-        elif sort_by == "created_at":
-            query = query.order("created_at", desc=(sort_order == "desc"))
+        # Tool filters need each agent's version config, so they are applied in Python
+        # over all of the user's agents, paged by agent_id; otherwise filtering,
+        # sorting and pagination all happen in the database
+        filter_by_tools = has_mcp_tools is not None or has_agentpress_tools is not None or bool(tools)
+        sort_by_tools_count = sort_by == "tools_count"
+        
+        def apply_filters(query):
+            # Apply search filter
+            if search:
+                search_term = f"%{search}%"
+                query = query.or_(f"name.ilike.{search_term},description.ilike.{search_term}")
+            
+            # Apply filters
+            if has_default is not None:
+                query = query.eq("is_default", has_default)
+            return query
+        
+        if filter_by_tools:
+            tools_filter = [tool.strip() for tool in tools.split(',') if tool.strip()] if tools else []
+            agents_data = []
+            agent_version_map = {}
+            last_agent_id = None
+            while True:
+                page_query = apply_filters(client.table('agents').select('*').eq("account_id", user_id))
+                if last_agent_id is not None:
+                    page_query = page_query.gt("agent_id", last_agent_id)
+                page_result = await page_query.order("agent_id").limit(AGENT_FILTER_PAGE_SIZE).execute()
+                page_agents = page_result.data or []
+                
+                page_versions = {}
+                if page_agents:
+                    try:
+                        page_versions = await version_manager.get_current_versions(
+                            page_agents, user_id, identity_map=VersionIdentityMap()
+                        )
+                    except Exception as e:
+                        logger.warning(f"Failed to get version data for agents of user {user_id}: {e}")
+                
+                for agent in page_agents:
+                    version_data = page_versions.get(agent['agent_id'])
+                    if _matches_tool_filters(agent, version_data, has_mcp_tools, has_agentpress_tools, tools_filter):
+                        agents_data.append(agent)
+                        if version_data:
+                            agent_version_map[agent['agent_id']] = version_data
+                
+                if len(page_agents) < AGENT_FILTER_PAGE_SIZE:
+                    break
+                last_agent_id = page_agents[-1]['agent_id']
+            
+            reverse = sort_order == "desc"
+            if sort_by_tools_count:
+                agents_data.sort(key=lambda agent: _tools_count(agent, agent_version_map.get(agent['agent_id'])), reverse=reverse)
+            else:
+                sort_field = sort_by if sort_by in ("name", "updated_at") else "created_at"
+                agents_data.sort(key=lambda agent: agent.get(sort_field) or '', reverse=reverse)
+            
+            total_count = len(agents_data)
+            agents_data = agents_data[offset:offset + limit]
         else:
-            # Default to created_at
-            query = query.order("created_at", desc=(sort_order == "desc"))
-        
-        # Execute query to get total count first
-        count_result = await query.execute()
-        total_count = count_result.count
-        
-        # Now get the actual data with pagination
-        query = query.range(offset, offset + limit - 1)
-        agents_result = await query.execute()
+            select_columns = '*'
+            if sort_by_tools_count:
+                select_columns = '*, current_version:agent_versions!current_version_id(tools_count)'
+            query = apply_filters(client.table('agents').select(select_columns, count='exact').eq("account_id", user_id))
+            
+            # Apply sorting
+            if sort_by == "name":
+                query = query.order("name", desc=(sort_order == "desc"))
+            elif sort_by == "updated_at":
+                query = query.order("updated_at", desc=(sort_order == "desc"))
+            elif sort_by_tools_count:
+                query = query.order("current_version(tools_count)", desc=(sort_order == "desc")).order("created_at", desc=True)
+            else:
+                # Default to created_at
+                query = query.order("created_at", desc=(sort_order == "desc"))
+            
+            agents_result = await query.range(offset, offset + limit - 1).execute()
+            total_count = agents_result.count or 0
+            agents_data = agents_result.data or []
+            
+            # Load the current version of every listed agent in one query
+            agent_version_map = {}
+            if agents_data:
+                try:
+                    agent_version_map = await version_manager.get_current_versions(
+                        agents_data, user_id, identity_map=VersionIdentityMap()
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to get version data for agents of user {user_id}: {e}")
         
-        if not agents_result.data:
+        if not agents_data:
             logger.info(f"No agents found for user: {user_id}")
             return {
                 "agents": [],
                 "pagination": {
                     "page": page,
                     "limit": limit,
-                    "total": 0,
-                    "pages": 0
+                    "total": total_count,
+                    "pages": (total_count + limit - 1) // limit
                 }
             }
         
-        # Post-process for tool filtering and tools_count sorting
-        agents_data = agents_result.data
-        
-        # First, fetch version data for all agents to ensure we have correct tool info
-        agent_version_map = {}
-        for agent in agents_data:
-            if agent.get('current_version_id'):
-                try:
-                    version_dict = await version_manager.get_version(
-                        agent_id=agent['agent_id'],
-                        version_id=agent['current_version_id'],
-                        user_id=user_id
-                    )
-                    agent_version_map[agent['agent_id']] = version_dict
-                except Exception as e:
-                    logger.warning(f"Failed to get version data for agent {agent['agent_id']}: {e}")
-        
-        # Apply tool-based filters using version data
-        if has_mcp_tools is not None or has_agentpress_tools is not None or tools:
-            filtered_agents = []
-            tools_filter = []
-            if tools:
-                tools_filter = [tool.strip() for tool in tools.split(',') if tool.strip()]
-            
-            for agent in agents_data:
-                # Get version data if available and extract configuration
-                version_data = agent_version_map.get(agent['agent_id'])
-                from agent.config_helper import extract_agent_config
-                agent_config = extract_agent_config(agent, version_data)
-                
-                configured_mcps = agent_config['configured_mcps']
-                agentpress_tools = agent_config['agentpress_tools']
-                
-                # Check MCP tools filter
-                if has_mcp_tools is not None:
-                    has_mcp = bool(configured_mcps and len(configured_mcps) > 0)
-                    if has_mcp_tools != has_mcp:
-                        continue
-                
-                # Check AgentPress tools filter
-                if has_agentpress_tools is not None:
-                    has_enabled_tools = any(
-                        tool_data and isinstance(tool_data, dict) and tool_data.get('enabled', False)
-                        for tool_data in agentpress_tools.values()
-                    )
-                    if has_agentpress_tools != has_enabled_tools:
-                        continue
-                
-                # Check specific tools filter
-                if tools_filter:
-                    agent_tools = set()
-                    # Add MCP tools
-                    for mcp in configured_mcps:
-                        if isinstance(mcp, dict) and 'name' in mcp:
-                            agent_tools.add(f"mcp:{mcp['name']}")
-                    
-                    # Add enabled AgentPress tools
-                    for tool_name, tool_data in agentpress_tools.items():
-                        if tool_data and isinstance(tool_data, dict) and tool_data.get('enabled', False):
-                            agent_tools.add(f"agentpress:{tool_name}")
-                    
-                    # Check if any of the requested tools are present
-                    if not any(tool in agent_tools for tool in tools_filter):
-                        continue
-                
-                filtered_agents.append(agent)
-            
-            agents_data = filtered_agents
-        
-        # Handle tools_count sorting (post-processing required)
-        if sort_by == "tools_count":
-            def get_tools_count(agent):
-                # Get version data if available
-                version_data = agent_version_map.get(agent['agent_id'])
-                
-                # Use version data for tools if available, otherwise fallback to agent data
-                if version_data:
-                    configured_mcps = version_data.get('configured_mcps', [])
-                    agentpress_tools = version_data.get('agentpress_tools', {})
-                else:
-                    configured_mcps = agent.get('configured_mcps', [])
-                    agentpress_tools = agent.get('agentpress_tools', {})
-                
-                mcp_count = len(configured_mcps)
-                agentpress_count = sum(
-                    1 for tool_data in agentpress_tools.values()
-                    if tool_data and isinstance(tool_data, dict) and tool_data.get('enabled', False)
-                )
-                return mcp_count + agentpress_count
-            
-            agents_data.sort(key=get_tools_count, reverse=(sort_order == "desc"))
-        
-        # Apply pagination to filtered results if we did post-processing
-        if has_mcp_tools is not None or has_agentpress_tools is not None or tools or sort_by == "tools_count":
-            total_count = len(agents_data)
-            agents_data = agents_data[offset:offset + limit]
-        
         # Format the response
         agent_list = []
         for agent in agents_data:
@@ -1958,6 +1995,8 @@ async def update_agent(
             except Exception as e:
                 logger.error(f"Error updating agent {agent_id}: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Failed to update agent: {str(e)}")
+            finally:
+                agent_config_cache.invalidate(agent_id)
         
         # Fetch the updated agent data
         updated_agent = await client.table('agents').select('*').eq("agent_id", agent_id).eq("account_id", user_id).maybe_single().execute()
@@ -2108,6 +2147,7 @@ async def delete_agent(agent_id: str, user_id: str = Depends(get_current_user_id
             raise HTTPException(status_code=400, detail="Cannot delete default agent")
         
         await client.table('agents').delete().eq('agent_id', agent_id).execute()
+        agent_config_cache.invalidate(agent_id)
         
         logger.info(f"Successfully deleted agent: {agent_id}")
         return {"message": "Agent deleted successfully"}
@@ -31,6 +31,7 @@ from services.langfuse import langfuse
 from agent.gemini_prompt import get_gemini_system_prompt
 from agent.tools.mcp_tool_wrapper import MCPToolWrapper
 from agentpress.tool import SchemaType
+from knowledge_base.retrieval import kb_retriever, message_text
 
 load_dotenv()
 
@@ -358,15 +359,15 @@ async def run_agent(
             
             current_agent_id = agent_config.get('agent_id') if agent_config else None
             
-            kb_result = await kb_client.rpc('get_combined_knowledge_base_context', {
-                'p_thread_id': thread_id,
-                'p_agent_id': current_agent_id,
-                'p_max_tokens': 4000
-            }).execute()
+            # Only the chunks relevant to the latest user message go into the prompt
+            query_result = await kb_client.table('messages').select('content').eq('thread_id', thread_id).eq('type', 'user').order('created_at', desc=True).limit(1).execute()
+            kb_query = message_text(query_result.data[0]['content']) if query_result.data else ''
             
-            if kb_result.data and kb_result.data.strip():
+            kb_context = await kb_retriever.build_combined_context(kb_client, thread_id, current_agent_id, kb_query)
+            
+            if kb_context and kb_context.strip():
                 logger.info(f"Adding combined knowledge base context to system prompt for thread {thread_id}, agent {current_agent_id}")
-                system_content += "\n\n" + kb_result.data
+                system_content += "\n\n" + kb_context
             else:
                 logger.debug(f"No knowledge base context found for thread {thread_id}, agent {current_agent_id}")
                 
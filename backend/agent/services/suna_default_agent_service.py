@@ -14,28 +14,32 @@ class SunaDefaultAgentService:
         current_config = self._sync_service.config_manager.get_current_config()
         return current_config.to_dict()
     
-    async def sync_all_suna_agents(self) -> Dict[str, Any]:
+    async def sync_all_suna_agents(self, **engine_options) -> Dict[str, Any]:
         logger.info("🔄 Delegating to modular sync service (preserves user customizations)")
-        result = await self._sync_service.sync_all_agents()
+        result = await self._sync_service.sync_all_agents(**engine_options)
         
         return {
             "updated_count": result.synced_count,
             "failed_count": result.failed_count,
-            "details": result.details
+            "details": result.details,
+            "errors": result.errors,
+            "report": result.report
         }
     
-    async def update_all_suna_agents(self, target_version: Optional[str] = None) -> Dict[str, Any]:
+    async def update_all_suna_agents(self, target_version: Optional[str] = None, **engine_options) -> Dict[str, Any]:
         logger.info("🔄 Delegating to modular sync service (version auto-detected)")
-        return await self.sync_all_suna_agents()
+        return await self.sync_all_suna_agents(**engine_options)
     
-    async def install_for_all_users(self) -> Dict[str, Any]:
+    async def install_for_all_users(self, **engine_options) -> Dict[str, Any]:
         logger.info("🔄 Delegating to modular installation service")
-        result = await self._sync_service.install_for_all_missing_users()
+        result = await self._sync_service.install_for_all_missing_users(**engine_options)
         
         return {
             "installed_count": result.synced_count,
             "failed_count": result.failed_count,
-            "details": result.details
+            "details": result.details,
+            "errors": result.errors,
+            "report": result.report
         }
     
     async def install_suna_agent_for_user(self, account_id: str, replace_existing: bool = False) -> Optional[str]:
@@ -1,6 +1,7 @@
 from .config_manager import SunaConfigManager, SunaConfiguration
 from .repository import SunaAgentRepository, SunaAgentRecord
 from .sync_service import SunaSyncService, SyncResult
+from .sync_engine import SunaSyncEngine, SyncReport
 
 __all__ = [
     'SunaConfigManager',
@@ -8,5 +9,7 @@ __all__ = [
     'SunaAgentRepository',  
     'SunaAgentRecord',
     'SunaSyncService',
-    'SyncResult'
+    'SyncResult',
+    'SunaSyncEngine',
+    'SyncReport'
 ] 
\ No newline at end of file
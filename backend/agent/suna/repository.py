@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from services.supabase import DBConnection
@@ -154,44 +154,59 @@ class SunaAgentRepository:
             logger.error(f"Failed to get agent stats: {e}")
             return {"error": str(e)}
     
+    @staticmethod
+    def _build_suna_agent_row(account_id: str, version_tag: str) -> Dict[str, Any]:
+        from agent.suna.config import SunaConfig
+        
+        return {
+            "account_id": account_id,
+            "name": SunaConfig.NAME,
+            "description": SunaConfig.DESCRIPTION,
+            "is_default": True,
+            "system_prompt": "[SUNA_MANAGED]",
+            "agentpress_tools": {},
+            "configured_mcps": SunaConfig.DEFAULT_MCPS,
+            "custom_mcps": SunaConfig.DEFAULT_CUSTOM_MCPS,
+            "config": {
+                'tools': {
+                    'mcp': SunaConfig.DEFAULT_MCPS,
+                    'custom_mcp': SunaConfig.DEFAULT_CUSTOM_MCPS,
+                    'agentpress': {}
+                },
+                'metadata': {
+                    'is_suna_default': True,
+                    'centrally_managed': True
+                }
+            },
+            "metadata": {
+                "is_suna_default": True,
+                "centrally_managed": True,
+                "config_version": version_tag,
+                "installation_date": datetime.now(timezone.utc).isoformat()
+            },
+            "version_count": 1
+        }
+    
+    @staticmethod
+    def _build_metadata_update(version_tag: str) -> Dict[str, Any]:
+        return {
+            "metadata": {
+                "is_suna_default": True,
+                "centrally_managed": True,
+                "config_version": version_tag,
+                "last_central_update": datetime.now(timezone.utc).isoformat()
+            }
+        }
+    
     async def create_suna_agent_simple(
         self, 
         account_id: str,
         version_tag: str
     ) -> str:
         try:
-            from agent.suna.config import SunaConfig
-            
             client = await self.db.client
             
-            agent_data = {
-                "account_id": account_id,
-                "name": SunaConfig.NAME,
-                "description": SunaConfig.DESCRIPTION,
-                "is_default": True,
-                "system_prompt": "[SUNA_MANAGED]",
-                "agentpress_tools": {},
-                "configured_mcps": SunaConfig.DEFAULT_MCPS,
-                "custom_mcps": SunaConfig.DEFAULT_CUSTOM_MCPS,
-                "config": {
-                    'tools': {
-                        'mcp': SunaConfig.DEFAULT_MCPS,
-                        'custom_mcp': SunaConfig.DEFAULT_CUSTOM_MCPS,
-                        'agentpress': {}
-                    },
-                    'metadata': {
-                        'is_suna_default': True,
-                        'centrally_managed': True
-                    }
-                },
-                "metadata": {
-                    "is_suna_default": True,
-                    "centrally_managed": True,
-                    "config_version": version_tag,
-                    "installation_date": datetime.now(timezone.utc).isoformat()
-                },
-                "version_count": 1
-            }
+            agent_data = self._build_suna_agent_row(account_id, version_tag)
             
             result = await client.table('agents').insert(agent_data).execute()
             
@@ -206,6 +221,21 @@ class SunaAgentRepository:
             logger.error(f"Failed to create Suna agent for {account_id}: {e}")
             raise
     
+    async def create_suna_agents_bulk(
+        self,
+        account_ids: List[str],
+        version_tag: str
+    ) -> Dict[str, str]:
+        """Create Suna agents for several accounts in one insert; returns account_id -> agent_id"""
+        if not account_ids:
+            return {}
+        
+        client = await self.db.client
+        rows = [self._build_suna_agent_row(account_id, version_tag) for account_id in account_ids]
+        result = await client.table('agents').insert(rows).execute()
+        
+        return {row['account_id']: row['agent_id'] for row in result.data}
+    
     async def update_agent_metadata(
         self,
         agent_id: str,
@@ -215,14 +245,7 @@ class SunaAgentRepository:
         try:
             client = await self.db.client
             
-            update_data = {
-                "metadata": {
-                    "is_suna_default": True,
-                    "centrally_managed": True,
-                    "config_version": version_tag,
-                    "last_central_update": datetime.now(timezone.utc).isoformat()
-                }
-            }
+            update_data = self._build_metadata_update(version_tag)
             
             result = await client.table('agents').update(update_data).eq('agent_id', agent_id).execute()
             
@@ -232,6 +255,65 @@ class SunaAgentRepository:
             logger.error(f"Failed to update metadata for agent {agent_id}: {e}")
             raise
     
+    async def update_agents_metadata_bulk(
+        self,
+        agent_ids: List[str],
+        version_tag: str
+    ) -> int:
+        """Update metadata for several Suna agents in one statement; returns the rows updated"""
+        if not agent_ids:
+            return 0
+        
+        client = await self.db.client
+        update_data = self._build_metadata_update(version_tag)
+        result = await client.table('agents').update(update_data).in_('agent_id', agent_ids).execute()
+        
+        return len(result.data)
+    
+    async def get_suna_agents_page(
+        self,
+        after_agent_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[SunaAgentRecord]:
+        """Suna agents ordered by agent_id, starting after `after_agent_id`"""
+        client = await self.db.client
+        query = client.table('agents').select(
+            'agent_id, account_id, name, metadata'
+        ).eq('metadata->>is_suna_default', 'true')
+        if after_agent_id:
+            query = query.gt('agent_id', after_agent_id)
+        result = await query.order('agent_id').limit(limit).execute()
+        
+        return [SunaAgentRecord.from_db_row(row) for row in result.data]
+    
+    async def get_personal_accounts_page(
+        self,
+        after_account_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[str]:
+        """Personal account IDs ordered by id, starting after `after_account_id`"""
+        client = await self.db.client
+        query = client.schema('basejump').table('accounts').select(
+            'id'
+        ).eq('personal_account', True)
+        if after_account_id:
+            query = query.gt('id', after_account_id)
+        result = await query.order('id').limit(limit).execute()
+        
+        return [row['id'] for row in result.data]
+    
+    async def find_accounts_with_suna_agents(self, account_ids: List[str]) -> Set[str]:
+        """The subset of `account_ids` that already have a Suna agent"""
+        if not account_ids:
+            return set()
+        
+        client = await self.db.client
+        result = await client.table('agents').select(
+            'account_id'
+        ).eq('metadata->>is_suna_default', 'true').in_('account_id', account_ids).execute()
+        
+        return {row['account_id'] for row in result.data}
+    
     async def delete_agent(self, agent_id: str) -> bool:
         """Delete an agent"""
         try:
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from utils.logger import logger
+
+from .repository import SunaAgentRepository
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENCY = 4
+# Errors beyond this are only counted, so a bad rollout can't grow the result unbounded
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class SyncCheckpoint:
+    operation: str
+    version_tag: str
+    cursor: Optional[str] = None
+    processed_count: int = 0
+    synced_count: int = 0
+    failed_count: int = 0
+    skipped_count: int = 0
+    elapsed_seconds: float = 0.0
+    
+    @classmethod
+    def load(cls, path: str) -> Optional['SyncCheckpoint']:
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls(**json.load(f))
+    
+    def save(self, path: str) -> None:
+        # Write-then-rename so an interrupted run never leaves a truncated checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class SyncReport:
+    processed_count: int = 0
+    synced_count: int = 0
+    failed_count: int = 0
+    skipped_count: int = 0
+    elapsed_seconds: float = 0.0
+    pages: int = 0
+    resumed_from: Optional[str] = None
+    
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.processed_count / self.elapsed_seconds
+    
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "rows_per_second": round(self.rows_per_second, 1)
+        }
+
+
+class SunaSyncEngine:
+    """Streams Suna agents or personal accounts in keyset-ordered pages and writes in batches.
+    
+    Only one page is held in memory at a time; the next page is fetched while the
+    current one is written. Each page is split into batches of `batch_size` rows,
+    written as one multi-row insert or update each with at most `concurrency`
+    batches in flight. A batch that fails is retried row by row so one bad row
+    doesn't fail its neighbours.
+    
+    With a `checkpoint_path`, the cursor and totals are saved after every page and
+    a rerun of the same operation for the same config version continues after the
+    last completed page. The checkpoint is removed once a run completes.
+    """
+    
+    def __init__(
+        self,
+        repository: SunaAgentRepository,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        checkpoint_path: Optional[str] = None
+    ):
+        self.repository = repository
+        self.page_size = max(page_size, 1)
+        self.batch_size = max(batch_size, 1)
+        self.concurrency = max(concurrency, 1)
+        self.checkpoint_path = checkpoint_path
+        self.errors: List[str] = []
+    
+    async def sync_metadata(self, version_tag: str, dry_run: bool = False) -> SyncReport:
+        """Bring every Suna agent's metadata to `version_tag`"""
+        
+        async def process(agents: list, report: SyncReport) -> None:
+            outdated = [agent.agent_id for agent in agents if agent.current_version_tag != version_tag]
+            report.skipped_count += len(agents) - len(outdated)
+            if dry_run:
+                report.synced_count += len(outdated)
+                return
+            
+            await self._write_batches(
+                outdated,
+                report,
+                write_batch=lambda batch: self.repository.update_agents_metadata_bulk(batch, version_tag),
+                write_one=lambda agent_id: self.repository.update_agent_metadata(agent_id, version_tag),
+                describe="update agent"
+            )
+        
+        return await self._run(
+            operation="sync_metadata",
+            version_tag=version_tag,
+            fetch_page=lambda cursor: self.repository.get_suna_agents_page(cursor, self.page_size),
+            cursor_of=lambda agent: agent.agent_id,
+            process=process,
+            use_checkpoint=not dry_run
+        )
+    
+    async def install_missing(self, version_tag: str) -> SyncReport:
+        """Create a Suna agent for every personal account that doesn't have one"""
+        
+        async def process(account_ids: list, report: SyncReport) -> None:
+            installed = await self.repository.find_accounts_with_suna_agents(account_ids)
+            missing = [account_id for account_id in account_ids if account_id not in installed]
+            report.skipped_count += len(account_ids) - len(missing)
+            
+            await self._write_batches(
+                missing,
+                report,
+                write_batch=lambda batch: self.repository.create_suna_agents_bulk(batch, version_tag),
+                write_one=lambda account_id: self.repository.create_suna_agent_simple(account_id, version_tag),
+                describe="install for user"
+            )
+        
+        return await self._run(
+            operation="install_missing",
+            version_tag=version_tag,
+            fetch_page=lambda cursor: self.repository.get_personal_accounts_page(cursor, self.page_size),
+            cursor_of=lambda account_id: account_id,
+            process=process,
+            use_checkpoint=True
+        )
+    
+    async def _run(
+        self,
+        operation: str,
+        version_tag: str,
+        fetch_page: Callable[[Optional[str]], Awaitable[list]],
+        cursor_of: Callable[[Any], str],
+        process: Callable[[list, SyncReport], Awaitable[None]],
+        use_checkpoint: bool
+    ) -> SyncReport:
+        checkpoint_path = self.checkpoint_path if use_checkpoint else None
+        report = SyncReport()
+        cursor = None
+        
+        checkpoint = SyncCheckpoint.load(checkpoint_path) if checkpoint_path else None
+        if checkpoint and checkpoint.operation == operation and checkpoint.version_tag == version_tag:
+            cursor = checkpoint.cursor
+            report = SyncReport(
+                processed_count=checkpoint.processed_count,
+                synced_count=checkpoint.synced_count,
+                failed_count=checkpoint.failed_count,
+                skipped_count=checkpoint.skipped_count,
+                elapsed_seconds=checkpoint.elapsed_seconds,
+                resumed_from=cursor
+            )
+            logger.info(f"⏩ Resuming {operation} after {cursor} ({report.processed_count} already processed)")
+        elif checkpoint:
+            logger.info(f"Ignoring checkpoint for {checkpoint.operation} at version {checkpoint.version_tag}")
+        
+        started = time.monotonic() - report.elapsed_seconds
+        page = await fetch_page(cursor)
+        while page:
+            cursor = cursor_of(page[-1])
+            next_page = None
+            if len(page) >= self.page_size:
+                next_page = asyncio.create_task(fetch_page(cursor))
+            
+            try:
+                await process(page, report)
+            except BaseException:
+                if next_page:
+                    next_page.cancel()
+                raise
+            
+            report.processed_count += len(page)
+            report.pages += 1
+            report.elapsed_seconds = time.monotonic() - started
+            if checkpoint_path:
+                SyncCheckpoint(
+                    operation=operation,
+                    version_tag=version_tag,
+                    cursor=cursor,
+                    processed_count=report.processed_count,
+                    synced_count=report.synced_count,
+                    failed_count=report.failed_count,
+                    skipped_count=report.skipped_count,
+                    elapsed_seconds=report.elapsed_seconds
+                ).save(checkpoint_path)
+            
+            logger.info(
+                f"📊 {operation}: {report.processed_count} processed, {report.synced_count} written, "
+                f"{report.failed_count} failed ({report.rows_per_second:.0f} rows/s)"
+            )
+            page = await next_page if next_page else []
+        
+        report.elapsed_seconds = time.monotonic() - started
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return report
+    
+    async def _write_batches(
+        self,
+        ids: Sequence[str],
+        report: SyncReport,
+        write_batch: Callable[[List[str]], Awaitable[Any]],
+        write_one: Callable[[str], Awaitable[Any]],
+        describe: str
+    ) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def write(batch: List[str]) -> None:
+            async with semaphore:
+                try:
+                    await write_batch(batch)
+                    report.synced_count += len(batch)
+                    return
+                except Exception as e:
+                    logger.warning(f"Batch of {len(batch)} failed, retrying row by row: {e}")
+                
+                for row_id in batch:
+                    try:
+                        await write_one(row_id)
+                        report.synced_count += 1
+                    except Exception as e:
+                        report.failed_count += 1
+                        self._record_error(f"Failed to {describe} {row_id}: {str(e)}")
+        
+        batches = [list(ids[i:i + self.batch_size]) for i in range(0, len(ids), self.batch_size)]
+        await asyncio.gather(*(write(batch) for batch in batches))
+    
+    def _record_error(self, error_msg: str) -> None:
+        logger.error(error_msg)
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error_msg)
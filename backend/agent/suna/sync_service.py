@@ -5,6 +5,7 @@ from utils.logger import logger
 
 from .config_manager import SunaConfigManager, SunaConfiguration
 from .repository import SunaAgentRepository, SunaAgentRecord
+from .sync_engine import SunaSyncEngine, DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY
 
 
 @dataclass
@@ -14,6 +15,7 @@ class SyncResult:
     failed_count: int = 0
     errors: List[str] = None
     details: List[Dict[str, Any]] = None
+    report: Optional[Dict[str, Any]] = None
     
     def __post_init__(self):
         if self.errors is None:
@@ -27,60 +29,56 @@ class SunaSyncService:
         self.config_manager = SunaConfigManager()
         self.repository = SunaAgentRepository()
     
-    async def sync_all_agents(self, dry_run: bool = False) -> SyncResult:
+    def _create_engine(
+        self,
+        batch_size: int,
+        concurrency: int,
+        checkpoint_path: Optional[str]
+    ) -> SunaSyncEngine:
+        return SunaSyncEngine(
+            self.repository,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            checkpoint_path=checkpoint_path
+        )
+    
+    async def sync_all_agents(
+        self,
+        dry_run: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        checkpoint_path: Optional[str] = None
+    ) -> SyncResult:
         logger.info("🚀 Starting Suna agent metadata sync")
         
         try:
             current_config = self.config_manager.get_current_config()
-            agents_needing_sync = await self.repository.find_suna_agents_needing_sync(
-                current_config.version_tag
-            )
-            
-            if not agents_needing_sync:
-                logger.info("📋 All Suna agents already have current metadata")
-                return SyncResult(
-                    success=True,
-                    synced_count=0,
-                    details=[{"message": "All agents already up to date"}]
-                )
-            
-            logger.info(f"📊 Updating metadata for {len(agents_needing_sync)} agents to version {current_config.version_tag}")
+            engine = self._create_engine(batch_size, concurrency, checkpoint_path)
+            report = await engine.sync_metadata(current_config.version_tag, dry_run=dry_run)
             
             if dry_run:
                 return SyncResult(
                     success=True,
                     details=[{
-                        "message": f"DRY RUN: Would update metadata for {len(agents_needing_sync)} agents",
-                        "agents": [{"agent_id": a.agent_id, "account_id": a.account_id} for a in agents_needing_sync]
-                    }]
+                        "message": f"DRY RUN: Would update metadata for {report.synced_count} agents"
+                    }],
+                    report=report.to_dict()
                 )
             
-            success_count = 0
-            failed_count = 0
-            errors = []
-            
-            for agent in agents_needing_sync:
-                try:
-                    await self.repository.update_agent_metadata(
-                        agent.agent_id,
-                        current_config.version_tag
-                    )
-                    success_count += 1
-                    logger.info(f"✅ Updated metadata for agent {agent.agent_id}")
-                except Exception as e:
-                    failed_count += 1
-                    error_msg = f"Failed to update agent {agent.agent_id}: {str(e)}"
-                    errors.append(error_msg)
-                    logger.error(error_msg)
+            if report.synced_count == 0 and report.failed_count == 0:
+                logger.info("📋 All Suna agents already have current metadata")
+                message = "All agents already up to date"
+            else:
+                message = f"Updated metadata for {report.synced_count} agents, {report.failed_count} failed"
+            logger.info(f"✅ {message} in {report.elapsed_seconds:.1f}s ({report.rows_per_second:.0f} agents/s)")
             
             return SyncResult(
-                success=failed_count == 0,
-                synced_count=success_count,
-                failed_count=failed_count,
-                errors=errors,
-                details=[{
-                    "message": f"Updated metadata for {success_count} agents, {failed_count} failed"
-                }]
+                success=report.failed_count == 0,
+                synced_count=report.synced_count,
+                failed_count=report.failed_count,
+                errors=engine.errors,
+                details=[{"message": message}],
+                report=report.to_dict()
             )
             
         except Exception as e:
@@ -88,51 +86,32 @@ class SunaSyncService:
             logger.error(error_msg)
             return SyncResult(success=False, errors=[error_msg])
     
-    async def install_for_all_missing_users(self) -> SyncResult:
+    async def install_for_all_missing_users(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        checkpoint_path: Optional[str] = None
+    ) -> SyncResult:
         logger.info("🚀 Installing Suna agents for users who don't have them")
         
         try:
             current_config = self.config_manager.get_current_config()
-            all_accounts = await self.repository.get_all_personal_accounts()
-            existing_agents = await self.repository.find_all_suna_agents()
-            existing_account_ids = {agent.account_id for agent in existing_agents}
-            
-            missing_accounts = [acc for acc in all_accounts if acc not in existing_account_ids]
-            
-            if not missing_accounts:
-                return SyncResult(
-                    success=True,
-                    details=[{"message": "All users already have Suna agents"}]
-                )
-            
-            logger.info(f"📦 Installing Suna for {len(missing_accounts)} users")
-            
-            success_count = 0
-            failed_count = 0
-            errors = []
+            engine = self._create_engine(batch_size, concurrency, checkpoint_path)
+            report = await engine.install_missing(current_config.version_tag)
             
-            for account_id in missing_accounts:
-                try:
-                    await self.repository.create_suna_agent_simple(
-                        account_id,
-                        current_config.version_tag
-                    )
-                    success_count += 1
-                    logger.info(f"✅ Installed Suna for user {account_id}")
-                except Exception as e:
-                    failed_count += 1
-                    error_msg = f"Failed to install for user {account_id}: {str(e)}"
-                    errors.append(error_msg)
-                    logger.error(error_msg)
+            if report.synced_count == 0 and report.failed_count == 0:
+                message = "All users already have Suna agents"
+            else:
+                message = f"Installed for {report.synced_count} users, {report.failed_count} failed"
+            logger.info(f"✅ {message} in {report.elapsed_seconds:.1f}s ({report.rows_per_second:.0f} accounts/s)")
             
             return SyncResult(
-                success=failed_count == 0,
-                synced_count=success_count,
-                failed_count=failed_count,
-                errors=errors,
-                details=[{
-                    "message": f"Installed for {success_count} users, {failed_count} failed"
-                }]
+                success=report.failed_count == 0,
+                synced_count=report.synced_count,
+                failed_count=report.failed_count,
+                errors=engine.errors,
+                details=[{"message": message}],
+                report=report.to_dict()
             )
             
         except Exception as e:
@@ -75,6 +75,7 @@ class ComputerUseTool(SandboxToolsBase):
             return result
             
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             logging.error(f"API request failed: {str(e)}")
             return {"success": False, "error": str(e)}
     
@@ -139,6 +140,7 @@ class ComputerUseTool(SandboxToolsBase):
                 return ToolResult(success=False, output=f"Failed to move: {result.get('error', 'Unknown error')}")
                 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to move: {str(e)}")
 
     @openapi_schema({
@@ -218,6 +220,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to click: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to click: {str(e)}")
 
     @openapi_schema({
@@ -275,6 +278,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to scroll: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to scroll: {str(e)}")
 
     @openapi_schema({
@@ -322,6 +326,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to type: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to type: {str(e)}")
 
     @openapi_schema({
@@ -370,6 +375,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to press key: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to press key: {str(e)}")
 
     @openapi_schema({
@@ -465,6 +471,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to press button: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to press button: {str(e)}")
 
     @openapi_schema({
@@ -520,6 +527,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to release button: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to release button: {str(e)}")
 
     @openapi_schema({
@@ -581,6 +589,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to drag: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to drag: {str(e)}")
 
     async def get_screenshot_base64(self) -> Optional[dict]:
@@ -619,6 +628,7 @@ class ComputerUseTool(SandboxToolsBase):
                 return None
                 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             print(f"[Screenshot] Error during screenshot process: {str(e)}")
             return None
 
@@ -669,6 +679,7 @@ class ComputerUseTool(SandboxToolsBase):
             else:
                 return ToolResult(success=False, output=f"Failed to press keys: {result.get('error', 'Unknown error')}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return ToolResult(success=False, output=f"Failed to press keys: {str(e)}")
 
 if __name__ == "__main__":
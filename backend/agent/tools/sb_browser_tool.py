@@ -214,6 +214,7 @@ class SandboxBrowserTool(SandboxToolsBase):
                 return self.fail_response(f"Browser automation request failed 2: {response}")
 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             logger.error(f"Error executing browser action: {e}")
             logger.debug(traceback.format_exc())
             return self.fail_response(f"Error executing browser action: {e}")
@@ -91,6 +91,7 @@ class SandboxDeployTool(SandboxToolsBase):
                 if not dir_info.is_dir:
                     return self.fail_response(f"'{directory_path}' is not a directory")
             except Exception as e:
+                self._invalidate_sandbox_on_error(e)
                 return self.fail_response(f"Directory '{directory_path}' does not exist: {str(e)}")
             
             # Deploy to Cloudflare Pages directly from the container
@@ -120,8 +121,10 @@ class SandboxDeployTool(SandboxToolsBase):
                 else:
                     return self.fail_response(f"Deployment failed with exit code {response.exit_code}: {response.result}")
             except Exception as e:
+                self._invalidate_sandbox_on_error(e)
                 return self.fail_response(f"Error during deployment: {str(e)}")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error deploying website: {str(e)}")
 
 if __name__ == "__main__":
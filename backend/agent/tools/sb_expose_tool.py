@@ -94,4 +94,5 @@ class SandboxExposeTool(SandboxToolsBase):
         except ValueError:
             return self.fail_response(f"Invalid port number: {port}. Must be a valid integer between 1 and 65535.")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error exposing port {port}: {str(e)}")
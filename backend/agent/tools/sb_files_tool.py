@@ -66,6 +66,7 @@ class SandboxFilesTool(SandboxToolsBase):
             return files_state
         
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             print(f"Error getting workspace state: {str(e)}")
             return {}
 
@@ -157,10 +158,12 @@ class SandboxFilesTool(SandboxToolsBase):
                     message += f"\n\n[Auto-detected index.html - HTTP server available at: {website_url}]"
                     message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
                 except Exception as e:
+                    self._invalidate_sandbox_on_error(e)
                     logger.warning(f"Failed to get website URL for index.html: {str(e)}")
             
             return self.success_response(message)
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error creating file: {str(e)}")
 
     @openapi_schema({
@@ -245,6 +248,7 @@ class SandboxFilesTool(SandboxToolsBase):
             return self.success_response(message)
             
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error replacing string: {str(e)}")
 
     @openapi_schema({
@@ -316,10 +320,12 @@ class SandboxFilesTool(SandboxToolsBase):
                     message += f"\n\n[Auto-detected index.html - HTTP server available at: {website_url}]"
                     message += "\n[Note: Use the provided HTTP server URL above instead of starting a new server]"
                 except Exception as e:
+                    self._invalidate_sandbox_on_error(e)
                     logger.warning(f"Failed to get website URL for index.html: {str(e)}")
             
             return self.success_response(message)
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error rewriting file: {str(e)}")
 
     @openapi_schema({
@@ -365,6 +371,7 @@ class SandboxFilesTool(SandboxToolsBase):
             await self.sandbox.fs.delete_file(full_path)
             return self.success_response(f"File '{file_path}' deleted successfully.")
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error deleting file: {str(e)}")
 
     async def _call_morph_api(self, file_content: str, code_edit: str, instructions: str, file_path: str) -> Optional[str]:
@@ -546,6 +553,7 @@ def authenticate_user(username, password):
                 return self.fail_response(f"AI editing was unable to apply the requested changes. The edit may be unclear or the file content may not match the expected format.")
                     
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error editing file: {str(e)}")
 
     # @openapi_schema({
@@ -112,6 +112,7 @@ class SandboxImageEditTool(SandboxToolsBase):
             )
 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(
                 f"An error occurred during image generation/editing: {str(e)}"
             )
@@ -149,6 +150,7 @@ class SandboxImageEditTool(SandboxToolsBase):
             return await self.sandbox.fs.download_file(full_path)
 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(
                 f"Could not read image file from sandbox: {image_path} - {str(e)}"
             )
@@ -169,4 +171,5 @@ class SandboxImageEditTool(SandboxToolsBase):
             return random_filename
 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Failed to download and save image: {str(e)}")
@@ -25,6 +25,7 @@ class SandboxShellTool(SandboxToolsBase):
                 await self.sandbox.process.create_session(session_id)
                 self._sessions[session_name] = session_id
             except Exception as e:
+                self._invalidate_sandbox_on_error(e)
                 raise RuntimeError(f"Failed to create session: {str(e)}")
         return self._sessions[session_name]
 
@@ -36,6 +37,7 @@ class SandboxShellTool(SandboxToolsBase):
                 await self.sandbox.process.delete_session(self._sessions[session_name])
                 del self._sessions[session_name]
             except Exception as e:
+                self._invalidate_sandbox_on_error(e)
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
 
     @openapi_schema({
@@ -206,6 +208,7 @@ class SandboxShellTool(SandboxToolsBase):
                     await self._execute_raw_command(f"tmux kill-session -t {session_name}")
                 except:
                     pass
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error executing command: {str(e)}")
 
     async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
@@ -313,6 +316,7 @@ class SandboxShellTool(SandboxToolsBase):
             })
                 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error checking command output: {str(e)}")
 
     @openapi_schema({
@@ -366,6 +370,7 @@ class SandboxShellTool(SandboxToolsBase):
             })
                 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error terminating command: {str(e)}")
 
     @openapi_schema({
@@ -419,6 +424,7 @@ class SandboxShellTool(SandboxToolsBase):
             })
                 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"Error listing commands: {str(e)}")
 
     def _is_command_completed(self, current_output: str, marker: str) -> bool:
@@ -202,6 +202,7 @@ class SandboxVisionTool(SandboxToolsBase):
                     if file_info.is_dir:
                         return self.fail_response(f"Path '{cleaned_path}' is a directory, not an image file.")
                 except Exception as e:
+                    self._invalidate_sandbox_on_error(e)
                     return self.fail_response(f"Image file not found at path: '{cleaned_path}'")
 
                 # Check file size
@@ -212,6 +213,7 @@ class SandboxVisionTool(SandboxToolsBase):
                 try:
                     image_bytes = await self.sandbox.fs.download_file(full_path)
                 except Exception as e:
+                    self._invalidate_sandbox_on_error(e)
                     return self.fail_response(f"Could not read image file: {cleaned_path}")
 
                 # Determine MIME type
@@ -261,4 +263,5 @@ class SandboxVisionTool(SandboxToolsBase):
             return self.success_response(f"Successfully loaded and compressed the image '{cleaned_path}' (reduced from {original_size / 1024:.1f}KB to {len(compressed_bytes) / 1024:.1f}KB).")
 
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             return self.fail_response(f"An unexpected error occurred while trying to see the image: {str(e)}") 
\ No newline at end of file
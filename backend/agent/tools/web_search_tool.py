@@ -260,6 +260,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
             )
         
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             error_message = str(e)
             logging.error(f"Error in scrape_webpage: {error_message}")
             return self.fail_response(f"Error processing scrape request: {error_message[:200]}")
@@ -366,6 +367,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
             }
         
         except Exception as e:
+            self._invalidate_sandbox_on_error(e)
             error_message = str(e)
             logging.error(f"Error scraping URL '{url}': {error_message}")
             
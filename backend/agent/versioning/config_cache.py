@@ -0,0 +1,116 @@
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .domain.entities import AgentId, AgentVersion, VersionId
+from .services.exceptions import VersionNotFoundError
+from utils.logger import logger
+
+# A version's config never changes once written; only its name and description can
+# be edited, and other workers' edits reach this process once the entry expires.
+CONFIG_CACHE_TTL_SECONDS = 600
+CONFIG_CACHE_MAX_ENTRIES = 1000
+
+
+class AgentConfigCache:
+    """Process-wide cache of agent versions keyed by (agent_id, current_version_id).
+    
+    Callers still read the agent row, which is a primary-key lookup that also applies
+    their access filter, and take the version from here instead of re-reading
+    agent_versions. When an agent moves to another version its key changes, so stale
+    configs are never served across workers. The explicit invalidation from the
+    version service and update_agent only frees memory early.
+    
+    Versions are copied in and out, so a caller mutating the config it was given
+    (tool settings, MCP configs) can't change what later runs read.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int = CONFIG_CACHE_TTL_SECONDS,
+        max_entries: int = CONFIG_CACHE_MAX_ENTRIES
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[AgentVersion, float]]" = OrderedDict()
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def _lock_for(self, key: Tuple[str, str]) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+    
+    def _get_fresh(self, key: Tuple[str, str]) -> Optional[AgentVersion]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        version, loaded_at = entry
+        if time.monotonic() - loaded_at >= self._ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return version
+    
+    async def get_version(self, agent_id: str, version_id: str) -> Optional[AgentVersion]:
+        """The agent's version `version_id`, from memory when possible.
+        
+        The caller must already have read the agent row under its own access checks;
+        no ownership check is repeated here. Returns None if the version does not
+        exist or belongs to another agent.
+        """
+        key = (str(agent_id), str(version_id))
+        version = self._get_fresh(key)
+        if version is not None:
+            self.hits += 1
+            return copy.deepcopy(version)
+        
+        async with self._lock_for(key):
+            version = self._get_fresh(key)
+            if version is not None:
+                self.hits += 1
+                return copy.deepcopy(version)
+            
+            self.misses += 1
+            version = await self._load(agent_id, version_id)
+            if version is not None:
+                self._entries[key] = (copy.deepcopy(version), time.monotonic())
+                while len(self._entries) > self._max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            return version
+    
+    async def get_version_dict(self, agent_id: str, version_id: str) -> Dict:
+        """Drop-in for version_manager.get_version once the caller holds the agent row"""
+        version = await self.get_version(agent_id, version_id)
+        if version is None:
+            raise VersionNotFoundError(f"Version {version_id} not found")
+        return version.to_dict()
+    
+    async def _load(self, agent_id: str, version_id: str) -> Optional[AgentVersion]:
+        from .infrastructure.dependencies import get_container
+        
+        version_service = await get_container().get_version_service()
+        version = await version_service.version_repo.find_by_id(VersionId.from_string(str(version_id)))
+        if not version or version.agent_id != AgentId.from_string(str(agent_id)):
+            logger.warning(f"Version {version_id} not found for agent {agent_id}")
+            return None
+        return version
+    
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        if agent_id is None:
+            self._entries.clear()
+            self._locks.clear()
+            return
+        
+        for key in [key for key in self._entries if key[0] == str(agent_id)]:
+            self._entries.pop(key, None)
+            self._locks.pop(key, None)
+
+
+agent_config_cache = AgentConfigCache()
@@ -15,6 +15,10 @@ class IVersionRepository(ABC):
     async def find_by_id(self, version_id: VersionId) -> Optional[AgentVersion]:
         pass
     
+    @abstractmethod
+    async def find_by_ids(self, version_ids: List[VersionId]) -> List[AgentVersion]:
+        pass
+    
     @abstractmethod
     async def find_by_agent_id(self, agent_id: AgentId) -> List[AgentVersion]:
         pass
@@ -47,6 +51,10 @@ class IAgentRepository(ABC):
     async def find_by_id(self, agent_id: AgentId) -> Optional[Dict[str, Any]]:
         pass
     
+    @abstractmethod
+    async def find_by_ids(self, agent_ids: List[AgentId]) -> List[Dict[str, Any]]:
+        pass
+    
     @abstractmethod
     async def update_current_version(
         self, agent_id: AgentId, version_id: VersionId, version_count: int
@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional, Any
 from .domain.entities import AgentId, VersionId, UserId
 from .services.version_service import VersionService
+from .services.identity_map import VersionIdentityMap
 from .infrastructure.dependencies import get_version_service
 from utils.logger import logger
 
@@ -62,6 +63,27 @@ class VersionManagerFacade:
             logger.error(f"Error getting version: {str(e)}")
             raise
     
+    async def get_current_versions(
+        self,
+        agents: List[Dict[str, Any]],
+        user_id: str,
+        identity_map: Optional[VersionIdentityMap] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        service = await self._get_service()
+        
+        try:
+            versions = await service.get_current_versions(
+                agent_ids=[AgentId.from_string(agent['agent_id']) for agent in agents],
+                user_id=UserId.from_string(user_id),
+                agents=agents,
+                identity_map=identity_map
+            )
+            
+            return {str(agent_id): version.to_dict() for agent_id, version in versions.items()}
+        except Exception as e:
+            logger.error(f"Error getting current versions: {str(e)}")
+            raise
+    
     async def get_all_versions(
         self, agent_id: str, user_id: str
     ) -> List[Dict[str, Any]]:
@@ -7,6 +7,10 @@ from ..domain.entities import (
 from ..domain.repositories import (
     IVersionRepository, IAgentRepository
 )
+from utils.logger import logger
+
+# Keeps the id list of an `in.(...)` filter well inside URL length limits
+IN_FILTER_BATCH_SIZE = 200
 
 
 class SupabaseVersionRepository(IVersionRepository):
@@ -68,6 +72,21 @@ class SupabaseVersionRepository(IVersionRepository):
         
         return self._to_entity(result.data[0])
     
+    async def find_by_ids(self, version_ids: List[VersionId]) -> List[AgentVersion]:
+        ids = list(dict.fromkeys(str(version_id) for version_id in version_ids))
+        versions = []
+        for start in range(0, len(ids), IN_FILTER_BATCH_SIZE):
+            result = await self.client.table('agent_versions').select('*').in_(
+                'version_id', ids[start:start + IN_FILTER_BATCH_SIZE]
+            ).execute()
+            for row in result.data or []:
+                # One malformed version must not hide every other agent's version
+                try:
+                    versions.append(self._to_entity(row))
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable version {row.get('version_id')}: {e}")
+        return versions
+    
     async def find_by_agent_id(self, agent_id: AgentId) -> List[AgentVersion]:
         result = await self.client.table('agent_versions').select('*').eq(
             'agent_id', str(agent_id)
@@ -211,6 +230,16 @@ class SupabaseAgentRepository(IAgentRepository):
         
         return result.data[0]
     
+    async def find_by_ids(self, agent_ids: List[AgentId]) -> List[Dict[str, Any]]:
+        ids = list(dict.fromkeys(str(agent_id) for agent_id in agent_ids))
+        agents = []
+        for start in range(0, len(ids), IN_FILTER_BATCH_SIZE):
+            result = await self.client.table('agents').select('*').in_(
+                'agent_id', ids[start:start + IN_FILTER_BATCH_SIZE]
+            ).execute()
+            agents.extend(result.data or [])
+        return agents
+    
     async def update_current_version(
         self, agent_id: AgentId, version_id: VersionId, version_count: int
     ) -> None:
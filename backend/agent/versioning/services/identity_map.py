@@ -0,0 +1,37 @@
+from typing import Dict, Iterable, List, Optional
+from ..domain.entities import AgentVersion, VersionId
+from ..domain.repositories import IVersionRepository
+
+
+class VersionIdentityMap:
+    """Versions loaded during one request, keyed by version id.
+    
+    Create one per request and pass it to every version lookup in that request;
+    each version is then fetched at most once, and ids that turned out not to
+    exist are remembered so they are not queried again either.
+    """
+    
+    def __init__(self):
+        self._versions: Dict[VersionId, Optional[AgentVersion]] = {}
+    
+    def __contains__(self, version_id: VersionId) -> bool:
+        return version_id in self._versions
+    
+    def get(self, version_id: VersionId) -> Optional[AgentVersion]:
+        return self._versions.get(version_id)
+    
+    def add(self, version: AgentVersion) -> None:
+        self._versions[version.version_id] = version
+    
+    async def load_many(
+        self, version_repo: IVersionRepository, version_ids: Iterable[VersionId]
+    ) -> List[AgentVersion]:
+        version_ids = list(dict.fromkeys(version_ids))
+        missing = [version_id for version_id in version_ids if version_id not in self._versions]
+        if missing:
+            for version in await version_repo.find_by_ids(missing):
+                self.add(version)
+            for version_id in missing:
+                self._versions.setdefault(version_id, None)
+        
+        return [self._versions[version_id] for version_id in version_ids if self._versions[version_id]]
@@ -11,6 +11,8 @@ from .exceptions import (
     VersionNotFoundError, AgentNotFoundError, UnauthorizedError,
     InvalidVersionError, VersionConflictError
 )
+from .identity_map import VersionIdentityMap
+from ..config_cache import agent_config_cache
 
 
 class VersionService:
@@ -87,6 +89,7 @@ class VersionService:
         await self.agent_repo.update_current_version(
             agent_id, created_version.version_id, version_count
         )
+        agent_config_cache.invalidate(str(agent_id))
         return created_version
     
     async def get_version(
@@ -107,6 +110,42 @@ class VersionService:
         
         return version
     
+    async def get_current_versions(
+        self,
+        agent_ids: List[AgentId],
+        user_id: UserId,
+        agents: Optional[List[Dict[str, Any]]] = None,
+        identity_map: Optional[VersionIdentityMap] = None
+    ) -> Dict[AgentId, AgentVersion]:
+        """Current versions for many agents in one round trip per table.
+        
+        Callers that already hold the agent rows pass them as `agents` to skip the
+        agents query. Agents the user can neither own nor see publicly, and agents
+        without a current version, are left out of the result.
+        """
+        if agents is None:
+            agents = await self.agent_repo.find_by_ids(agent_ids)
+        
+        wanted = set(agent_ids)
+        current_version_ids: Dict[AgentId, VersionId] = {}
+        for agent in agents:
+            agent_id = AgentId.from_string(agent['agent_id'])
+            if agent_id not in wanted or not agent.get('current_version_id'):
+                continue
+            if agent.get('account_id') != str(user_id) and not agent.get('is_public', False):
+                continue
+            current_version_ids[agent_id] = VersionId.from_string(agent['current_version_id'])
+        
+        identity_map = identity_map or VersionIdentityMap()
+        await identity_map.load_many(self.version_repo, current_version_ids.values())
+        
+        versions = {}
+        for agent_id, version_id in current_version_ids.items():
+            version = identity_map.get(version_id)
+            if version and version.agent_id == agent_id:
+                versions[agent_id] = version
+        return versions
+    
     async def get_all_versions(
         self, 
         agent_id: AgentId, 
@@ -149,6 +188,7 @@ class VersionService:
         await self.agent_repo.update_current_version(
             agent_id, version.version_id, version_count
         )
+        agent_config_cache.invalidate(str(agent_id))
     
     async def compare_versions(
         self,
@@ -273,5 +313,6 @@ class VersionService:
         version.updated_at = datetime.utcnow()
         
         updated_version = await self.version_repo.update(version)
+        agent_config_cache.invalidate(str(agent_id))
         
         return updated_version 
\ No newline at end of file
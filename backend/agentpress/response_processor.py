@@ -21,6 +21,7 @@ from agentpress.tool_registry import ToolRegistry
 from agentpress.xml_tool_parser import XMLToolParser
 from langfuse.client import StatefulTraceClient
 from services.langfuse import langfuse
+from services import metrics
 from agentpress.utils.json_helpers import (
     ensure_dict, ensure_list, safe_json_parse, 
     to_json_string, format_for_yield
@@ -1399,7 +1400,13 @@ class ResponseProcessor:
                 return ToolResult(success=False, output=f"Tool function '{function_name}' not found")
             
             logger.debug(f"Found tool function for '{function_name}', executing...")
-            result = await tool_fn(**arguments)
+            # Label by tool class: function names are unbounded once MCP tools register
+            # dynamically, and every MCP tool shares the MCPToolWrapper class. Dynamic MCP
+            # methods are plain functions, so their instance comes from the registry
+            tool_instance = getattr(tool_fn, '__self__', None) or self.tool_registry.tools.get(function_name, {}).get('instance')
+            tool_label = type(tool_instance).__name__ if tool_instance is not None else 'other'
+            with metrics.measure('tool', tool_label):
+                result = await tool_fn(**arguments)
             logger.info(f"Tool execution complete: {function_name} -> {result}")
             span.end(status_message="tool_executed", output=result)
             return result
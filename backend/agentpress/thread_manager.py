@@ -21,6 +21,7 @@ from agentpress.response_processor import (
     ProcessorConfig
 )
 from services.supabase import DBConnection
+from services import metrics
 from utils.logger import logger
 from langfuse.client import StatefulGenerationClient, StatefulTraceClient
 from services.langfuse import langfuse
@@ -112,8 +113,18 @@ class ThreadManager:
             data_to_insert['agent_version_id'] = agent_version_id
 
         try:
+            pool = await self.db.get_pool()
+            if pool:
+                row = await pool.fetchrow(
+                    'insert_message',
+                    thread_id, type, content, is_llm_message, metadata or {}, agent_id, agent_version_id
+                )
+                logger.info(f"Successfully added message to thread {thread_id}")
+                return row
+
             # Insert the message and get the inserted row data including the id
-            result = await client.table('messages').insert(data_to_insert).execute()
+            with metrics.measure_query('insert_message', 'rest'):
+                result = await client.table('messages').insert(data_to_insert).execute()
             logger.info(f"Successfully added message to thread {thread_id}")
 
             if result.data and len(result.data) > 0 and isinstance(result.data[0], dict) and 'message_id' in result.data[0]:
@@ -143,24 +154,30 @@ class ThreadManager:
         try:
             # result = await client.rpc('get_llm_formatted_messages', {'p_thread_id': thread_id}).execute()
             
-            # Fetch messages in batches of 1000 to avoid overloading the database
             all_messages = []
-            batch_size = 1000
-            offset = 0
-            
-            while True:
-                result = await client.table('messages').select('message_id, content').eq('thread_id', thread_id).eq('is_llm_message', True).order('created_at').range(offset, offset + batch_size - 1).execute()
-                
-                if not result.data or len(result.data) == 0:
-                    break
-                    
-                all_messages.extend(result.data)
+            pool = await self.db.get_pool()
+            if pool:
+                # One round trip; rows stream over the connection without REST's page limit
+                all_messages = await pool.fetch('get_llm_messages', thread_id)
+            else:
+                # Fetch messages in batches of 1000 to avoid overloading the database
+                batch_size = 1000
+                offset = 0
                 
-                # If we got fewer than batch_size records, we've reached the end
-                if len(result.data) < batch_size:
-                    break
-                    
-                offset += batch_size
+                with metrics.measure_query('get_llm_messages', 'rest'):
+                    while True:
+                        result = await client.table('messages').select('message_id, content').eq('thread_id', thread_id).eq('is_llm_message', True).order('created_at').range(offset, offset + batch_size - 1).execute()
+                        
+                        if not result.data or len(result.data) == 0:
+                            break
+                            
+                        all_messages.extend(result.data)
+                        
+                        # If we got fewer than batch_size records, we've reached the end
+                        if len(result.data) < batch_size:
+                            break
+                            
+                        offset += batch_size
             
             # Use all_messages instead of result.data in the rest of the method
             result_data = all_messages
@@ -366,7 +383,8 @@ Here are the XML tools available with examples:
                     openapi_tool_schemas = self.tool_registry.get_openapi_schemas()
                     logger.debug(f"Retrieved {len(openapi_tool_schemas) if openapi_tool_schemas else 0} OpenAPI tool schemas")
 
-                prepared_messages = self.context_manager.compress_messages(prepared_messages, llm_model)
+                with metrics.measure('context_compression', 'compress_messages'):
+                    prepared_messages = self.context_manager.compress_messages(prepared_messages, llm_model)
 
                 # 5. Make LLM API call
                 logger.debug("Making LLM API call")
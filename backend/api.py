@@ -9,6 +9,9 @@ import sentry
 from contextlib import asynccontextmanager
 from agentpress.thread_manager import ThreadManager
 from services.supabase import DBConnection
+from services.single_flight import get_single_flight_stats
+from services import metrics
+from utils.auth_utils import verify_admin_api_key
 from datetime import datetime, timezone
 from utils.config import config, EnvMode
 import asyncio
@@ -66,6 +69,10 @@ async def lifespan(app: FastAPI):
             await redis.initialize_async()
             logger.info("Redis connection initialized successfully")
             
+            # Fill the warm sandbox pool in the background and keep it topped up
+            from sandbox.pool import sandbox_pool
+            sandbox_pool.start()
+            
             # Initialize essential feature flags for production
             if config.ENV_MODE == EnvMode.PRODUCTION:
                 from flags.flags import enable_flag
@@ -87,6 +94,10 @@ async def lifespan(app: FastAPI):
         # Initialize triggers API
         triggers_api.initialize(db)
         
+        if config.TRIGGER_LOCAL_SCHEDULER:
+            from triggers.services.scheduler import local_scheduler
+            local_scheduler.start(db)
+        
         # Initialize workflows API (part of triggers module)
         from triggers.endpoints.workflows import set_db_connection
         set_db_connection(db)
@@ -99,7 +110,35 @@ async def lifespan(app: FastAPI):
         # Clean up agent resources
         logger.info("Cleaning up agent resources")
         await agent_api.cleanup()
-        
+
+        if config.TRIGGER_LOCAL_SCHEDULER:
+            from triggers.services.scheduler import local_scheduler
+            await local_scheduler.stop()
+
+        from sandbox.pool import sandbox_pool
+        await sandbox_pool.stop()
+
+        # Write out buffered trigger event logs
+        try:
+            from triggers.repositories.event_log_buffer import trigger_event_log_buffer
+            await trigger_event_log_buffer.close()
+        except Exception as e:
+            logger.error(f"Error flushing trigger event logs: {e}")
+
+        # Close the shared Pipedream HTTP session
+        try:
+            from pipedream.support.http_client import close_http_client
+            await close_http_client()
+        except Exception as e:
+            logger.error(f"Error closing Pipedream HTTP client: {e}")
+
+        # Stop knowledge base extraction workers
+        try:
+            from knowledge_base.file_processor import shutdown_extraction_pool
+            shutdown_extraction_pool()
+        except Exception as e:
+            logger.error(f"Error shutting down extraction pool: {e}")
+
         # Clean up Redis connection
         try:
             logger.info("Closing Redis connection")
@@ -218,6 +257,17 @@ async def health_check():
         "instance_id": instance_id
     }
 
+@api_router.get("/health/single-flight")
+async def single_flight_stats(_: bool = Depends(verify_admin_api_key)):
+    """Hit rates of the coalesced reads in this worker"""
+    return get_single_flight_stats()
+
+@api_router.get("/metrics")
+async def prometheus_metrics(_: bool = Depends(verify_admin_api_key)):
+    """Prometheus metrics for agent run stages, the hot queries per backend and Redis"""
+    content, content_type = metrics.render_latest()
+    return Response(content=content, media_type=content_type)
+
 @api_router.get("/health-docker")
 async def health_check():
     logger.info("Health docker check endpoint called")
@@ -3,6 +3,8 @@ from typing import List, Optional, Dict, Any
 import base64
 from datetime import datetime, timezone
 
+from utils.credential_cache import DecryptedConfigCache, decrypted_config_cache
+
 from .base import Repository
 from ..domain.entities import MCPCredential, CredentialRequest
 from ..protocols import DatabaseConnection, Logger, EncryptionService
@@ -33,10 +35,17 @@ class CredentialRepository(Repository[MCPCredential]):
 
 
 class SupabaseCredentialRepository(CredentialRepository):
-    def __init__(self, db: DatabaseConnection, encryption: EncryptionService, logger: Logger):
+    def __init__(
+        self,
+        db: DatabaseConnection,
+        encryption: EncryptionService,
+        logger: Logger,
+        config_cache: Optional[DecryptedConfigCache] = None
+    ):
         self._db = db
         self._encryption = encryption
         self._logger = logger
+        self._config_cache = config_cache or decrypted_config_cache
     
     async def find_by_id(self, credential_id: str) -> Optional[MCPCredential]:
         try:
@@ -66,6 +75,7 @@ class SupabaseCredentialRepository(CredentialRepository):
                 .eq('credential_id', credential_id)\
                 .execute()
             
+            self._config_cache.evict(credential_id)
             return len(result.data) > 0
             
         except Exception as e:
@@ -144,6 +154,7 @@ class SupabaseCredentialRepository(CredentialRepository):
                 raise ValueError("Failed to store credential")
             
             credential_id = result.data[0]['credential_id']
+            self._config_cache.evict(credential_id)
             self._logger.info(f"Successfully stored credential {credential_id}")
             return credential_id
             
@@ -162,6 +173,8 @@ class SupabaseCredentialRepository(CredentialRepository):
                 .eq('mcp_qualified_name', mcp_qualified_name)\
                 .execute()
             
+            for row in result.data:
+                self._config_cache.evict(row['credential_id'])
             return len(result.data) > 0
             
         except Exception as e:
@@ -169,16 +182,19 @@ class SupabaseCredentialRepository(CredentialRepository):
             return False
     
     def _map_to_credential(self, data: Dict[str, Any]) -> MCPCredential:
-        encrypted_config = data['encrypted_config']
-        if isinstance(encrypted_config, str):
-            encrypted_config_bytes = base64.b64decode(encrypted_config.encode('utf-8'))
-        else:
-            encrypted_config_bytes = encrypted_config
-        
-        config = self._encryption.decrypt_config(
-            encrypted_config_bytes, 
-            data['config_hash']
-        )
+        config = self._config_cache.get(data['credential_id'], data['config_hash'])
+        if config is None:
+            encrypted_config = data['encrypted_config']
+            if isinstance(encrypted_config, str):
+                encrypted_config_bytes = base64.b64decode(encrypted_config.encode('utf-8'))
+            else:
+                encrypted_config_bytes = encrypted_config
+            
+            config = self._encryption.decrypt_config(
+                encrypted_config_bytes, 
+                data['config_hash']
+            )
+            self._config_cache.set(data['credential_id'], data['config_hash'], config)
         
         return MCPCredential(
             credential_id=data['credential_id'],
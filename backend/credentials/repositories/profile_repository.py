@@ -3,6 +3,8 @@ from typing import List, Optional, Dict, Any
 import base64
 from datetime import datetime, timezone
 
+from utils.credential_cache import DecryptedConfigCache, decrypted_config_cache
+
 from .base import Repository
 from ..domain.entities import MCPCredentialProfile, ProfileRequest
 from ..protocols import DatabaseConnection, Logger, EncryptionService
@@ -39,10 +41,17 @@ class ProfileRepository(Repository[MCPCredentialProfile]):
 
 
 class SupabaseProfileRepository(ProfileRepository):
-    def __init__(self, db: DatabaseConnection, encryption: EncryptionService, logger: Logger):
+    def __init__(
+        self,
+        db: DatabaseConnection,
+        encryption: EncryptionService,
+        logger: Logger,
+        config_cache: Optional[DecryptedConfigCache] = None
+    ):
         self._db = db
         self._encryption = encryption
         self._logger = logger
+        self._config_cache = config_cache or decrypted_config_cache
     
     async def find_by_id(self, profile_id: str) -> Optional[MCPCredentialProfile]:
         try:
@@ -79,6 +88,7 @@ class SupabaseProfileRepository(ProfileRepository):
                 .eq('profile_id', profile_id)\
                 .execute()
             
+            self._config_cache.evict(profile_id)
             return len(result.data) > 0
             
         except Exception as e:
@@ -180,6 +190,7 @@ class SupabaseProfileRepository(ProfileRepository):
                 raise ValueError("Failed to store profile")
             
             profile_id = result.data[0]['profile_id']
+            self._config_cache.evict(profile_id)
             self._logger.info(f"Successfully stored profile {profile_id}")
             return profile_id
             
@@ -230,6 +241,7 @@ class SupabaseProfileRepository(ProfileRepository):
                 .eq('account_id', account_id)\
                 .execute()
             
+            self._config_cache.evict(profile_id)
             return len(result.data) > 0
             
         except Exception as e:
@@ -237,16 +249,19 @@ class SupabaseProfileRepository(ProfileRepository):
             return False
     
     def _map_to_profile(self, data: Dict[str, Any]) -> MCPCredentialProfile:
-        encrypted_config = data['encrypted_config']
-        if isinstance(encrypted_config, str):
-            encrypted_config_bytes = base64.b64decode(encrypted_config.encode('utf-8'))
-        else:
-            encrypted_config_bytes = encrypted_config
-        
-        config = self._encryption.decrypt_config(
-            encrypted_config_bytes, 
-            data['config_hash']
-        )
+        config = self._config_cache.get(data['profile_id'], data['config_hash'])
+        if config is None:
+            encrypted_config = data['encrypted_config']
+            if isinstance(encrypted_config, str):
+                encrypted_config_bytes = base64.b64decode(encrypted_config.encode('utf-8'))
+            else:
+                encrypted_config_bytes = encrypted_config
+            
+            config = self._encryption.decrypt_config(
+                encrypted_config_bytes, 
+                data['config_hash']
+            )
+            self._config_cache.set(data['profile_id'], data['config_hash'], config)
         
         return MCPCredentialProfile(
             profile_id=data['profile_id'],
@@ -1,10 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
-import os
+from supabase import AsyncClient
 import jwt
 from typing import Optional
 
+from services.supabase import DBConnection
 from rental_platform.services.property_service import PropertyService
 from rental_platform.services.booking_service import BookingService
 
@@ -12,33 +12,30 @@ from rental_platform.services.booking_service import BookingService
 security = HTTPBearer()
 
 # Supabase client
-def get_supabase_client() -> Client:
-    """Get Supabase client instance"""
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    
-    if not supabase_url or not supabase_key:
+async def get_supabase_client() -> AsyncClient:
+    """Get the shared async Supabase client so requests never block the event loop"""
+    try:
+        return await DBConnection().client
+    except RuntimeError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Supabase configuration missing"
         )
-    
-    return create_client(supabase_url, supabase_key)
 
 # Property service dependency
-def get_property_service(supabase_client: Client = Depends(get_supabase_client)) -> PropertyService:
+def get_property_service(supabase_client: AsyncClient = Depends(get_supabase_client)) -> PropertyService:
     """Get property service instance"""
     return PropertyService(supabase_client)
 
 # Booking service dependency
-def get_booking_service(supabase_client: Client = Depends(get_supabase_client)) -> BookingService:
+def get_booking_service(supabase_client: AsyncClient = Depends(get_supabase_client)) -> BookingService:
     """Get booking service instance"""
     return BookingService(supabase_client)
 
 # Authentication
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase_client: Client = Depends(get_supabase_client)
+    supabase_client: AsyncClient = Depends(get_supabase_client)
 ) -> dict:
     """
     Get current authenticated user from JWT token
@@ -47,7 +44,7 @@ async def get_current_user(
         token = credentials.credentials
         
         # Verify token with Supabase
-        response = supabase_client.auth.get_user(token)
+        response = await supabase_client.auth.get_user(token)
         
         if not response.user:
             raise HTTPException(
@@ -77,7 +74,7 @@ async def get_current_user(
 # Optional authentication (for public endpoints)
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    supabase_client: Client = Depends(get_supabase_client)
+    supabase_client: AsyncClient = Depends(get_supabase_client)
 ) -> Optional[dict]:
     """
     Get current user if authenticated, otherwise return None
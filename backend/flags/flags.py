@@ -7,15 +7,26 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from services import redis
+from services.single_flight import SingleFlight
+from utils.config import config
 
 logger = logging.getLogger(__name__)
 
+# Flags are checked on hot paths; lookups are coalesced and briefly reused per worker
+flag_enabled_flight = SingleFlight("feature_flag_enabled", ttl_seconds=config.FEATURE_FLAG_CACHE_TTL_SECONDS)
+flag_details_flight = SingleFlight("feature_flag_details", ttl_seconds=config.FEATURE_FLAG_CACHE_TTL_SECONDS)
+
 class FeatureFlagManager:
     def __init__(self):
         """Initialize with existing Redis service"""
         self.flag_prefix = "feature_flag:"
         self.flag_list_key = "feature_flags:list"
     
+    def _forget(self, key: str) -> None:
+        # Other workers pick the change up once their cached lookup expires
+        flag_enabled_flight.forget(key)
+        flag_details_flight.forget(key)
+    
     async def set_flag(self, key: str, enabled: bool, description: str = "") -> bool:
         """Set a feature flag to enabled or disabled"""
         try:
@@ -30,6 +41,7 @@ class FeatureFlagManager:
             redis_client = await redis.get_client()
             await redis_client.hset(flag_key, mapping=flag_data)
             await redis_client.sadd(self.flag_list_key, key)
+            self._forget(key)
             
             logger.info(f"Set feature flag {key} to {enabled}")
             return True
@@ -39,6 +51,9 @@ class FeatureFlagManager:
     
     async def is_enabled(self, key: str) -> bool:
         """Check if a feature flag is enabled"""
+        return await flag_enabled_flight.do(key, lambda: self._load_enabled(key))
+    
+    async def _load_enabled(self, key: str) -> bool:
         try:
             flag_key = f"{self.flag_prefix}{key}"
             redis_client = await redis.get_client()
@@ -51,6 +66,9 @@ class FeatureFlagManager:
     
     async def get_flag(self, key: str) -> Optional[Dict[str, str]]:
         """Get feature flag details"""
+        return await flag_details_flight.do(key, lambda: self._load_flag(key))
+    
+    async def _load_flag(self, key: str) -> Optional[Dict[str, str]]:
         try:
             flag_key = f"{self.flag_prefix}{key}"
             redis_client = await redis.get_client()
@@ -66,6 +84,7 @@ class FeatureFlagManager:
             flag_key = f"{self.flag_prefix}{key}"
             redis_client = await redis.get_client()
             deleted = await redis_client.delete(flag_key)
+            self._forget(key)
             if deleted:
                 await redis_client.srem(self.flag_list_key, key)
                 logger.info(f"Deleted feature flag: {key}")
@@ -1,15 +1,20 @@
+import os
 import json
-from typing import List, Optional
+import tempfile
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
 from pydantic import BaseModel, Field, HttpUrl
 from utils.auth_utils import get_current_user_id_from_jwt
 from services.supabase import DBConnection
 from knowledge_base.file_processor import FileProcessor
+from knowledge_base.retrieval import kb_retriever
 from utils.logger import logger
 from flags.flags import is_enabled
 
 router = APIRouter(prefix="/knowledge-base", tags=["knowledge-base"])
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 class KnowledgeBaseEntry(BaseModel):
     entry_id: Optional[str] = None
     name: str = Field(..., min_length=1, max_length=255)
@@ -277,6 +282,7 @@ async def create_agent_knowledge_base_entry(
             raise HTTPException(status_code=500, detail="Failed to create agent knowledge base entry")
         
         created_entry = result.data[0]
+        await kb_retriever.index_entries(client, agent_id, [created_entry])
         
         return KnowledgeBaseEntryResponse(
             entry_id=created_entry['entry_id'],
@@ -319,20 +325,24 @@ async def upload_file_to_agent_kb(
         
         account_id = agent_result.data[0]['account_id']
         
-        file_content = await file.read()
-        job_id = await client.rpc('create_agent_kb_processing_job', {
-            'p_agent_id': agent_id,
-            'p_account_id': account_id,
-            'p_job_type': 'file_upload',
-            'p_source_info': {
-                'filename': file.filename,
-                'mime_type': file.content_type,
-                'file_size': len(file_content)
-            }
-        }).execute()
-        
-        if not job_id.data:
-            raise HTTPException(status_code=500, detail="Failed to create processing job")
+        spool_path, file_size = await spool_upload_to_disk(file)
+        try:
+            job_id = await client.rpc('create_agent_kb_processing_job', {
+                'p_agent_id': agent_id,
+                'p_account_id': account_id,
+                'p_job_type': 'file_upload',
+                'p_source_info': {
+                    'filename': file.filename,
+                    'mime_type': file.content_type,
+                    'file_size': file_size
+                }
+            }).execute()
+            
+            if not job_id.data:
+                raise HTTPException(status_code=500, detail="Failed to create processing job")
+        except Exception:
+            os.remove(spool_path)
+            raise
         
         job_id = job_id.data
         background_tasks.add_task(
@@ -340,7 +350,7 @@ async def upload_file_to_agent_kb(
             job_id,
             agent_id,
             account_id,
-            file_content,
+            spool_path,
             file.filename,
             file.content_type or 'application/octet-stream'
         )
@@ -358,6 +368,64 @@ async def upload_file_to_agent_kb(
         raise HTTPException(status_code=500, detail="Failed to upload file")
 
 
+@router.post("/agents/{agent_id}/git-sources/{entry_id}/sync")
+async def sync_agent_git_source(
+    agent_id: str,
+    entry_id: str,
+    background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user_id_from_jwt)
+):
+    if not await is_enabled("knowledge_base"):
+        raise HTTPException(
+            status_code=403, 
+            detail="This feature is not available at the moment."
+        )
+    
+    """Re-sync a Git repository source, re-processing only files changed since the last sync"""
+    try:
+        client = await db.client
+        
+        agent_result = await client.table('agents').select('account_id').eq('agent_id', agent_id).eq('account_id', user_id).execute()
+        if not agent_result.data:
+            raise HTTPException(status_code=404, detail="Agent not found or access denied")
+        
+        account_id = agent_result.data[0]['account_id']
+        
+        source_result = await client.table('agent_knowledge_base_entries').select('entry_id, source_metadata').eq('entry_id', entry_id).eq('agent_id', agent_id).eq('source_type', 'git_repo').is_('extracted_from_zip_id', 'null').execute()
+        if not source_result.data:
+            raise HTTPException(status_code=404, detail="Git repository source not found")
+        
+        source_metadata = source_result.data[0]['source_metadata'] or {}
+        job_id = await client.rpc('create_agent_kb_processing_job', {
+            'p_agent_id': agent_id,
+            'p_account_id': account_id,
+            'p_job_type': 'git_clone',
+            'p_source_info': {
+                'repo_entry_id': entry_id,
+                'git_url': source_metadata.get('git_url'),
+                'branch': source_metadata.get('branch'),
+                'sync': True
+            }
+        }).execute()
+        
+        if not job_id.data:
+            raise HTTPException(status_code=500, detail="Failed to create processing job")
+        
+        job_id = job_id.data
+        background_tasks.add_task(sync_git_source_background, job_id, agent_id, entry_id)
+        
+        return {
+            "job_id": job_id,
+            "message": "Repository sync started. Processing in background.",
+            "entry_id": entry_id
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting git sync for agent {agent_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to start repository sync")
+
 @router.get("/agents/{agent_id}/processing-jobs", response_model=List[ProcessingJobResponse])
 async def get_agent_processing_jobs(
     agent_id: str,
@@ -407,15 +475,38 @@ async def get_agent_processing_jobs(
         logger.error(f"Error getting processing jobs for agent {agent_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get processing jobs")
 
+async def spool_upload_to_disk(file: UploadFile) -> Tuple[str, int]:
+    """Copy an upload to a temp file in chunks so the background job never holds it in memory.
+    
+    Returns (path, size). Uploads over FileProcessor.MAX_FILE_SIZE are rejected while
+    streaming rather than after the whole body has been read.
+    """
+    fd, spool_path = tempfile.mkstemp(prefix='kb-upload-')
+    file_size = 0
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > FileProcessor.MAX_FILE_SIZE:
+                    raise HTTPException(status_code=413, detail=f"File too large (max: {FileProcessor.MAX_FILE_SIZE} bytes)")
+                spool.write(chunk)
+    except Exception:
+        os.remove(spool_path)
+        raise
+    return spool_path, file_size
+
 async def process_file_background(
     job_id: str,
     agent_id: str,
     account_id: str,
-    file_content: bytes,
+    file_path: str,
     filename: str,
     mime_type: str
 ):
-    """Background task to process uploaded files"""
+    """Background task to process uploaded files spooled to disk"""
     
     processor = FileProcessor()
     client = await processor.db.client
@@ -426,7 +517,7 @@ async def process_file_background(
         }).execute()
         
         result = await processor.process_file_upload(
-            agent_id, account_id, file_content, filename, mime_type
+            agent_id, account_id, file_path, filename, mime_type
         )
         
         if result['success']:
@@ -434,7 +525,7 @@ async def process_file_background(
                 'p_job_id': job_id,
                 'p_status': 'completed',
                 'p_result_info': result,
-                'p_entries_created': 1,
+                'p_entries_created': 0 if result.get('duplicate_of') else 1,
                 'p_total_files': 1
             }).execute()
         else:
@@ -454,8 +545,50 @@ async def process_file_background(
             }).execute()
         except:
             pass
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
 
 
+async def sync_git_source_background(job_id: str, agent_id: str, repo_entry_id: str):
+    """Background task to re-sync a Git repository source"""
+    
+    processor = FileProcessor()
+    client = await processor.db.client
+    try:
+        await client.rpc('update_agent_kb_job_status', {
+            'p_job_id': job_id,
+            'p_status': 'processing'
+        }).execute()
+        
+        result = await processor.sync_git_repository(agent_id, repo_entry_id)
+        
+        if result['success']:
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'completed',
+                'p_result_info': result,
+                'p_entries_created': result['total_added'],
+                'p_total_files': result['total_added'] + result['total_updated'] + result['total_deleted'] + result['total_unchanged']
+            }).execute()
+        else:
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'failed',
+                'p_error_message': result.get('error', 'Unknown error')
+            }).execute()
+            
+    except Exception as e:
+        logger.error(f"Error in background git sync for job {job_id}: {str(e)}")
+        try:
+            await client.rpc('update_agent_kb_job_status', {
+                'p_job_id': job_id,
+                'p_status': 'failed',
+                'p_error_message': str(e)
+            }).execute()
+        except:
+            pass
+
 @router.get("/agents/{agent_id}/context")
 async def get_agent_knowledge_base_context(
     agent_id: str,
@@ -541,6 +674,8 @@ async def update_knowledge_base_entry(
             raise HTTPException(status_code=500, detail="Failed to update knowledge base entry")
         
         updated_entry = result.data[0]
+        if table_name == 'agent_knowledge_base_entries':
+            await kb_retriever.index_entries(client, updated_entry['agent_id'], [updated_entry])
         
         return KnowledgeBaseEntryResponse(
             entry_id=updated_entry['entry_id'],
@@ -583,13 +718,16 @@ async def delete_knowledge_base_entry(
         table_name = 'knowledge_base_entries'
         
         if not entry_result.data:
-            entry_result = await client.table('agent_knowledge_base_entries').select('entry_id').eq('entry_id', entry_id).execute()
+            entry_result = await client.table('agent_knowledge_base_entries').select('entry_id, agent_id').eq('entry_id', entry_id).execute()
             table_name = 'agent_knowledge_base_entries'
             
         if not entry_result.data:
             raise HTTPException(status_code=404, detail="Knowledge base entry not found")
         
         result = await client.table(table_name).delete().eq('entry_id', entry_id).execute()
+        if table_name == 'agent_knowledge_base_entries':
+            # Chunks cascade in the database, as do files extracted from a deleted archive or repository
+            kb_retriever.invalidate(entry_result.data[0]['agent_id'])
         
         return {"message": "Knowledge base entry deleted successfully"}
         
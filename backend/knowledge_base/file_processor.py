@@ -6,11 +6,25 @@ import shutil
 import asyncio
 import subprocess
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import sys
+import time
+import hashlib
+import signal
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Union, BinaryIO
 from pathlib import Path
 import mimetypes
 import chardet
 
+try:
+    import resource
+except ImportError:  # POSIX only; extraction still runs off the event loop without CPU limits
+    resource = None
+
 import PyPDF2
 import docx
 import openpyxl
@@ -22,7 +36,184 @@ from PIL import Image
 import pytesseract
 
 from utils.logger import logger
-from services.supabase import DBConnection
+from utils.config import config
+from services.supabase import DBConnection, select_all
+from knowledge_base.retrieval import kb_retriever
+
+
+class ExtractionLimitExceeded(Exception):
+    """Raised inside an extraction worker when a file exceeds its CPU or wall-clock budget."""
+
+
+class ExtractionFailed(Exception):
+    """Raised when a file's content could not be extracted.
+    
+    Nothing is stored for the file, so uploading it again retries the extraction
+    instead of matching a stored error by content hash.
+    """
+
+
+def _raise_limit_exceeded(signum, frame):
+    limit = 'CPU time' if signum == getattr(signal, 'SIGXCPU', None) else 'time'
+    raise ExtractionLimitExceeded(f"extraction exceeded its {limit} limit")
+
+
+def _extract_in_worker(source: Union[bytes, str], filename: str, mime_type: str, cpu_seconds: int, timeout_seconds: int) -> str:
+    """Run one extraction inside a pool worker with per-file CPU and wall-clock limits.
+    
+    source is the file's bytes or the path of a spooled copy, which the worker reads
+    itself so large files never pass through the parent's memory.
+
+    RLIMIT_CPU is cumulative for the worker process, so the soft limit is moved to
+    the CPU already used plus this file's budget. Workers are reused, so both
+    limits are armed per call and the handlers raise instead of killing the worker.
+    """
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        signal.signal(signal.SIGXCPU, _raise_limit_exceeded)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+        signal.signal(signal.SIGALRM, _raise_limit_exceeded)
+        signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    
+    try:
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                source = f.read()
+        return FileProcessor()._extract_content_sync(source, filename, mime_type)
+    finally:
+        if resource is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# Held while a git source is re-synced so two workers never sync the same mirror
+GIT_SYNC_LOCK_PREFIX = "kb:git_sync:"
+GIT_SYNC_LOCK_TTL = 30 * 60
+# Mirrors not used for this long are deleted, and only the most recently used
+# KB_GIT_MIRROR_MAX_ENTRIES are kept; one used within a sync lock TTL is never pruned
+GIT_MIRROR_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# Extra time the event loop waits beyond the worker's own wall-clock limit
+EXTRACTION_TIMEOUT_GRACE_SECONDS = 5
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_extraction_pool() -> ProcessPoolExecutor:
+    global _extraction_pool
+    if _extraction_pool is None:
+        # spawn rather than fork: the API process holds event loops, sockets and threads
+        _extraction_pool = ProcessPoolExecutor(
+            max_workers=max(1, config.KB_EXTRACTION_WORKERS),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _extraction_pool
+
+
+def _reset_extraction_pool(pool: ProcessPoolExecutor, terminate: bool = False) -> None:
+    """Drop a broken or stuck pool so the next extraction starts a fresh one.
+
+    With terminate=True the old workers are killed, which is the only way to stop an
+    extraction stuck in native code that never returns to the interpreter to see
+    its limit signals. Work still queued on that pool fails with BrokenProcessPool
+    and is retried by its caller.
+    """
+    global _extraction_pool
+    if _extraction_pool is not pool:
+        return  # another caller already replaced it
+    _extraction_pool = None
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False)
+    if terminate:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def shutdown_extraction_pool() -> None:
+    global _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=False, cancel_futures=True)
+        _extraction_pool = None
+
+
+# Read size when streaming ZIP members and hashing files
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_source(source: Union[bytes, str, BinaryIO]) -> str:
+    """SHA-256 of bytes, a file path or a seekable file object, streamed in chunks."""
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(SPOOL_CHUNK_SIZE), b''):
+                digest.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(SPOOL_CHUNK_SIZE), b''):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryTracker:
+    """Bytes one ingestion job holds in this process, and the most it held at once.
+    
+    Counts read buffers and extracted text waiting to be inserted. Process peak RSS
+    is reported alongside it, but that covers every job the worker has run.
+    """
+    
+    def __init__(self):
+        self.held = 0
+        self.peak = 0
+    
+    def hold(self, size: int) -> None:
+        self.held += size
+        self.peak = max(self.peak, self.held)
+    
+    def release(self, size: int) -> None:
+        self.held -= size
+    
+    def report(self) -> Dict[str, Any]:
+        return {
+            'peak_held_bytes': self.peak,
+            'process_peak_rss_bytes': _peak_rss_bytes()
+        }
+
+
+def _extraction_metrics(file_size: int, seconds: float) -> Dict[str, Any]:
+    return {
+        'extraction_seconds': round(seconds, 4),
+        'extraction_bytes_per_second': int(file_size / seconds) if seconds > 0 else None
+    }
+
+
+def _summarize_extraction(file_metrics: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Aggregate per-file extraction metrics for a ZIP or git job."""
+    total_bytes = sum(m['file_size'] for m in file_metrics)
+    return {
+        'files': len(file_metrics),
+        'bytes': total_bytes,
+        'wall_seconds': round(wall_seconds, 4),
+        'extraction_seconds': round(sum(m['extraction_seconds'] for m in file_metrics), 4),
+        'bytes_per_second': int(total_bytes / wall_seconds) if wall_seconds > 0 else None,
+        'workers': max(1, config.KB_EXTRACTION_WORKERS)
+    }
+
 
 class FileProcessor:
     """Handles file upload, content extraction, and processing for agent knowledge bases."""
@@ -47,33 +238,50 @@ class FileProcessor:
     
     def __init__(self):
         self.db = DBConnection()
+        self.extraction_concurrency = max(1, config.KB_EXTRACTION_WORKERS)
     
     async def process_file_upload(
         self, 
         agent_id: str, 
         account_id: str, 
-        file_content: bytes, 
+        file_content: Union[bytes, str], 
         filename: str, 
         mime_type: str
     ) -> Dict[str, Any]:
-        """Process a single uploaded file and extract its content."""
+        """Process a single uploaded file and extract its content.
+        
+        file_content is the file's bytes or the path of an upload spooled to disk; a
+        path is hashed and extracted without reading the whole file into memory here.
+        """
         try:
-            file_size = len(file_content)
+            in_memory = isinstance(file_content, bytes)
+            file_size = len(file_content) if in_memory else os.path.getsize(file_content)
             if file_size > self.MAX_FILE_SIZE:
                 raise ValueError(f"File too large: {file_size} bytes (max: {self.MAX_FILE_SIZE})")
             
             file_extension = Path(filename).suffix.lower()
 
             if file_extension == '.zip':
-                return await self._process_zip_file(agent_id, account_id, file_content, filename)
+                zip_source = io.BytesIO(file_content) if in_memory else file_content
+                return await self._process_zip_file(agent_id, account_id, zip_source, filename, file_size)
+            
+            client = await self.db.client
+            
+            content_hash = self._content_hash(file_content) if in_memory else await asyncio.to_thread(_hash_source, file_content)
+            duplicate_of = await self._find_content_hash(client, agent_id, content_hash)
+            if duplicate_of:
+                return {
+                    'success': True,
+                    'entry_id': duplicate_of,
+                    'filename': filename,
+                    'duplicate_of': duplicate_of
+                }
             
-            content = await self._extract_file_content(file_content, filename, mime_type)
+            content, extraction_metrics = await self._extract_with_metrics(file_content, filename, mime_type, file_size)
             
             if not content or not content.strip():
                 raise ValueError(f"No extractable content found in {filename}")
             
-            client = await self.db.client
-            
             entry_data = {
                 'agent_id': agent_id,
                 'account_id': account_id,
@@ -85,10 +293,12 @@ class FileProcessor:
                     'filename': filename,
                     'mime_type': mime_type,
                     'file_size': file_size,
-                    'extraction_method': self._get_extraction_method(file_extension, mime_type)
+                    'extraction_method': self._get_extraction_method(file_extension, mime_type),
+                    **extraction_metrics
                 },
                 'file_size': file_size,
                 'file_mime_type': mime_type,
+                'content_hash': content_hash,
                 'usage_context': 'always',
                 'is_active': True
             }
@@ -98,12 +308,19 @@ class FileProcessor:
             if not result.data:
                 raise Exception("Failed to create knowledge base entry")
             
+            await kb_retriever.index_entries(client, agent_id, [{**entry_data, 'entry_id': result.data[0]['entry_id']}])
+            
             return {
                 'success': True,
                 'entry_id': result.data[0]['entry_id'],
                 'filename': filename,
                 'content_length': len(content),
-                'extraction_method': entry_data['source_metadata']['extraction_method']
+                'extraction_method': entry_data['source_metadata']['extraction_method'],
+                **extraction_metrics,
+                'memory_stats': {
+                    'peak_held_bytes': len(content) if not in_memory else file_size + len(content),
+                    'process_peak_rss_bytes': _peak_rss_bytes()
+                }
             }
             
         except Exception as e:
@@ -118,14 +335,44 @@ class FileProcessor:
         self, 
         agent_id: str, 
         account_id: str, 
-        zip_content: bytes, 
-        zip_filename: str
+        zip_source: Union[str, BinaryIO], 
+        zip_filename: str,
+        zip_size: int
     ) -> Dict[str, Any]:
-        """Extract and process all files from a ZIP archive."""
+        """Extract and process all files from a ZIP archive.
+        
+        zip_source is a path or seekable file object, so the archive is never read
+        into memory as a whole. Each member is decompressed chunk by chunk into a
+        spool file that the extraction worker reads from disk. At most
+        extraction_concurrency members are in flight, and finished members wait in a
+        bounded queue for the batch insert, so a slow database stalls extraction
+        instead of piling extracted text up in memory.
+        """
         
+        memory = MemoryTracker()
+        spool_dir = tempfile.mkdtemp(prefix='kb-zip-')
+        producers = []
         try:
             client = await self.db.client
             
+            zip_hash = await asyncio.to_thread(_hash_source, zip_source)
+            duplicate_of = await self._find_content_hash(client, agent_id, zip_hash)
+            
+            if duplicate_of:
+                # The same archive was already ingested for this agent
+                return {
+                    'success': True,
+                    'zip_entry_id': duplicate_of,
+                    'zip_filename': zip_filename,
+                    'duplicate_of': duplicate_of,
+                    'extracted_files': [],
+                    'duplicate_files': [],
+                    'failed_files': [],
+                    'total_extracted': 0,
+                    'total_duplicates': 0,
+                    'total_failed': 0
+                }
+            
             zip_entry_data = {
                 'agent_id': agent_id,
                 'account_id': account_id,
@@ -136,95 +383,201 @@ class FileProcessor:
                 'source_metadata': {
                     'filename': zip_filename,
                     'mime_type': 'application/zip',
-                    'file_size': len(zip_content),
+                    'file_size': zip_size,
                     'is_zip_container': True
                 },
-                'file_size': len(zip_content),
+                'file_size': zip_size,
                 'file_mime_type': 'application/zip',
+                'content_hash': zip_hash,
                 'usage_context': 'always',
                 'is_active': True
             }
             
+            known_hashes = await self._load_content_hashes(client, agent_id)
             zip_result = await client.table('agent_knowledge_base_entries').insert(zip_entry_data).execute()
             zip_entry_id = zip_result.data[0]['entry_id']
             
             # Extract files from ZIP
             extracted_files = []
+            duplicate_files = []
             failed_files = []
+            file_metrics = []
+            seen_hashes = set()
+            stored_hashes = {}
+            duplicates = []
+            pending = []
             
-            with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_ref:
-                file_list = zip_ref.namelist()
+            async def flush_pending():
+                batch = pending[:]
+                pending.clear()
+                entries = [entry for entry, _ in batch]
+                created, insert_errors = await self._insert_entries(client, entries)
+                await self._index_stored_entries(client, agent_id, entries, created)
+                stored_hashes.update(created)
+                
+                for entry, file_info in batch:
+                    content_hash = entry['content_hash']
+                    if content_hash in created:
+                        extracted_files.append({**file_info, 'entry_id': created[content_hash]})
+                    else:
+                        failed_files.append({
+                            'filename': file_info['filename'],
+                            'path': file_info['path'],
+                            'error': insert_errors.get(content_hash, 'Failed to create knowledge base entry')
+                        })
+                memory.release(sum(len(entry['content']) for entry in entries))
+            
+            with zipfile.ZipFile(zip_source, 'r') as zip_ref:
+                file_list = zip_ref.infolist()
                 
                 if len(file_list) > self.MAX_ZIP_ENTRIES:
                     raise ValueError(f"ZIP contains too many files: {len(file_list)} (max: {self.MAX_ZIP_ENTRIES})")
                 
-                for file_path in file_list:
-                    if file_path.endswith('/'):
-                        continue
+                members = [
+                    info for info in file_list
+                    if not info.is_dir() and os.path.basename(info.filename)
+                ]
+                
+                semaphore = asyncio.Semaphore(self.extraction_concurrency)
+                results: asyncio.Queue = asyncio.Queue(maxsize=self.extraction_concurrency)
+                
+                async def extract_member(info: zipfile.ZipInfo) -> Dict[str, Any]:
+                    file_path = info.filename
+                    filename = os.path.basename(file_path)
                     
+                    memory.hold(SPOOL_CHUNK_SIZE)
                     try:
-                        file_content = zip_ref.read(file_path)
-                        filename = os.path.basename(file_path)
-                        
-                        if not filename:  # Skip if no filename
-                            continue
+                        spool_path, content_hash, file_size = await asyncio.to_thread(
+                            self._spool_zip_member, zip_ref, info, spool_dir
+                        )
+                    finally:
+                        memory.release(SPOOL_CHUNK_SIZE)
+                    
+                    try:
+                        # Identical bytes already stored for this agent, or earlier in this archive
+                        if content_hash in known_hashes or content_hash in seen_hashes:
+                            return {'file_path': file_path, 'content_hash': content_hash, 'duplicate': True}
+                        seen_hashes.add(content_hash)
                         
                         # Detect MIME type
                         mime_type, _ = mimetypes.guess_type(filename)
                         if not mime_type:
                             mime_type = 'application/octet-stream'
                         
-                        # Extract content
-                        content = await self._extract_file_content(file_content, filename, mime_type)
-                        
-                        if content and content.strip():
-                            extracted_entry_data = {
-                                'agent_id': agent_id,
-                                'account_id': account_id,
-                                'name': f"📄 {filename}",
-                                'description': f"Extracted from {zip_filename}: {file_path}",
-                                'content': content[:self.MAX_CONTENT_LENGTH],
-                                'source_type': 'zip_extracted',
-                                'source_metadata': {
-                                    'filename': filename,
-                                    'original_path': file_path,
-                                    'zip_filename': zip_filename,
-                                    'mime_type': mime_type,
-                                    'file_size': len(file_content),
-                                    'extraction_method': self._get_extraction_method(Path(filename).suffix.lower(), mime_type)
-                                },
-                                'file_size': len(file_content),
-                                'file_mime_type': mime_type,
-                                'extracted_from_zip_id': zip_entry_id,
-                                'usage_context': 'always',
-                                'is_active': True
-                            }
-                            
-                            extracted_result = await client.table('agent_knowledge_base_entries').insert(extracted_entry_data).execute()
-                            
-                            extracted_files.append({
-                                'filename': filename,
-                                'path': file_path,
-                                'entry_id': extracted_result.data[0]['entry_id'],
-                                'content_length': len(content)
-                            })
-                        
-                    except Exception as e:
-                        logger.error(f"Error extracting {file_path} from ZIP: {str(e)}")
+                        try:
+                            content, metrics = await self._extract_with_metrics(spool_path, filename, mime_type, file_size)
+                        except ExtractionFailed:
+                            # Nothing is stored, so a later copy of the same bytes isn't a duplicate
+                            seen_hashes.discard(content_hash)
+                            raise
+                    finally:
+                        os.remove(spool_path)
+                    
+                    content = content[:self.MAX_CONTENT_LENGTH] if content else content
+                    memory.hold(len(content or ''))
+                    return {
+                        'file_path': file_path,
+                        'content_hash': content_hash,
+                        'mime_type': mime_type,
+                        'file_size': file_size,
+                        'content': content,
+                        'metrics': metrics
+                    }
+                
+                async def produce(info: zipfile.ZipInfo) -> None:
+                    async with semaphore:
+                        try:
+                            result = await extract_member(info)
+                        except Exception as e:
+                            result = {'file_path': info.filename, 'error': e}
+                        # Blocks while the consumer is inserting, which holds the semaphore and stalls extraction
+                        await results.put(result)
+                
+                extraction_started = time.perf_counter()
+                producers = [asyncio.create_task(produce(info)) for info in members]
+                
+                for _ in range(len(members)):
+                    extraction = await results.get()
+                    file_path = extraction['file_path']
+                    filename = os.path.basename(file_path)
+                    
+                    if 'error' in extraction:
+                        logger.error(f"Error extracting {file_path} from ZIP: {str(extraction['error'])}")
                         failed_files.append({
-                            'filename': os.path.basename(file_path),
+                            'filename': filename,
                             'path': file_path,
-                            'error': str(e)
+                            'error': str(extraction['error'])
                         })
+                        continue
+                    
+                    if extraction.get('duplicate'):
+                        duplicates.append((filename, file_path, extraction['content_hash']))
+                        continue
+                    
+                    content = extraction['content']
+                    mime_type = extraction['mime_type']
+                    file_metrics.append({'file_size': extraction['file_size'], **extraction['metrics']})
+                    
+                    if not content or not content.strip():
+                        memory.release(len(content or ''))
+                        continue
+                    
+                    pending.append(({
+                        'agent_id': agent_id,
+                        'account_id': account_id,
+                        'name': f"📄 {filename}",
+                        'description': f"Extracted from {zip_filename}: {file_path}",
+                        'content': content,
+                        'source_type': 'zip_extracted',
+                        'source_metadata': {
+                            'filename': filename,
+                            'original_path': file_path,
+                            'zip_filename': zip_filename,
+                            'mime_type': mime_type,
+                            'file_size': extraction['file_size'],
+                            'extraction_method': self._get_extraction_method(Path(filename).suffix.lower(), mime_type),
+                            **extraction['metrics']
+                        },
+                        'file_size': extraction['file_size'],
+                        'file_mime_type': mime_type,
+                        'content_hash': extraction['content_hash'],
+                        'extracted_from_zip_id': zip_entry_id,
+                        'usage_context': 'always',
+                        'is_active': True
+                    }, {
+                        'filename': filename,
+                        'path': file_path,
+                        'content_length': len(content),
+                        **extraction['metrics']
+                    }))
+                    
+                    if len(pending) >= max(1, config.KB_INSERT_BATCH_SIZE):
+                        await flush_pending()
+                
+                extraction_seconds = time.perf_counter() - extraction_started
+            
+            if pending:
+                await flush_pending()
+            
+            for filename, file_path, content_hash in duplicates:
+                duplicate_files.append({
+                    'filename': filename,
+                    'path': file_path,
+                    'duplicate_of': known_hashes.get(content_hash) or stored_hashes.get(content_hash)
+                })
             
             return {
                 'success': True,
                 'zip_entry_id': zip_entry_id,
                 'zip_filename': zip_filename,
                 'extracted_files': extracted_files,
+                'duplicate_files': duplicate_files,
                 'failed_files': failed_files,
                 'total_extracted': len(extracted_files),
-                'total_failed': len(failed_files)
+                'total_duplicates': len(duplicate_files),
+                'total_failed': len(failed_files),
+                'extraction_stats': _summarize_extraction(file_metrics, extraction_seconds),
+                'memory_stats': memory.report()
             }
             
         except Exception as e:
@@ -234,6 +587,41 @@ class FileProcessor:
                 'zip_filename': zip_filename,
                 'error': str(e)
             }
+        
+        finally:
+            for producer in producers:
+                producer.cancel()
+            if producers:
+                await asyncio.gather(*producers, return_exceptions=True)
+            shutil.rmtree(spool_dir, ignore_errors=True)
+    
+    def _spool_zip_member(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, spool_dir: str) -> Tuple[str, str, int]:
+        """Decompress one member to a spool file, hashing as it streams; returns (path, hash, size).
+        
+        The declared size in the ZIP header is not trusted: decompression stops as soon
+        as the member exceeds MAX_FILE_SIZE.
+        """
+        if info.file_size > self.MAX_FILE_SIZE:
+            raise ValueError(f"File too large: {info.file_size} bytes (max: {self.MAX_FILE_SIZE})")
+        
+        digest = hashlib.sha256()
+        written = 0
+        fd, spool_path = tempfile.mkstemp(dir=spool_dir)
+        try:
+            with os.fdopen(fd, 'wb') as spool, zip_ref.open(info) as member:
+                while True:
+                    block = member.read(SPOOL_CHUNK_SIZE)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > self.MAX_FILE_SIZE:
+                        raise ValueError(f"File too large: more than {self.MAX_FILE_SIZE} bytes once decompressed")
+                    digest.update(block)
+                    spool.write(block)
+        except Exception:
+            os.remove(spool_path)
+            raise
+        return spool_path, digest.hexdigest(), written
     
     async def process_git_repository(
         self, 
@@ -244,7 +632,11 @@ class FileProcessor:
         include_patterns: List[str] = None,
         exclude_patterns: List[str] = None
     ) -> Dict[str, Any]:
-        """Clone a Git repository and extract content from supported files."""
+        """Clone a Git repository and extract content from supported files.
+        
+        The clone is kept as a mirror for the source and its commit SHA is recorded on
+        the repository entry, so sync_git_repository can later re-process only the diff.
+        """
         
         if include_patterns is None:
             include_patterns = ['*.py', '*.js', '*.ts', '*.md', '*.txt', '*.json', '*.yaml', '*.yml']
@@ -252,22 +644,13 @@ class FileProcessor:
         if exclude_patterns is None:
             exclude_patterns = ['node_modules/*', '.git/*', '*.pyc', '__pycache__/*', '.env', '*.log']
         
-        temp_dir = None
+        # Cloned into a directory of its own and moved to the source's mirror path once
+        # the repository entry exists, so a failure only ever removes this clone
+        mirror_dir = self._mirror_path(f"clone-{uuid.uuid4()}")
+        succeeded = False
         try:
-            # Create temporary directory
-            temp_dir = tempfile.mkdtemp()
-            
             # Clone repository
-            clone_cmd = ['git', 'clone', '--depth', '1', '--branch', branch, git_url, temp_dir]
-            process = await asyncio.create_subprocess_exec(
-                *clone_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"Git clone failed: {stderr.decode()}")
+            commit_sha = await self._clone_mirror(git_url, branch, mirror_dir)
             
             # Create main repository entry
             client = await self.db.client
@@ -284,7 +667,9 @@ class FileProcessor:
                     'git_url': git_url,
                     'branch': branch,
                     'include_patterns': include_patterns,
-                    'exclude_patterns': exclude_patterns
+                    'exclude_patterns': exclude_patterns,
+                    'commit_sha': commit_sha,
+                    'last_synced_at': datetime.now(timezone.utc).isoformat()
                 },
                 'usage_context': 'always',
                 'is_active': True
@@ -292,92 +677,104 @@ class FileProcessor:
             
             repo_result = await client.table('agent_knowledge_base_entries').insert(repo_entry_data).execute()
             repo_entry_id = repo_result.data[0]['entry_id']
+            source_mirror_dir = self._mirror_path(repo_entry_id)
+            os.replace(mirror_dir, source_mirror_dir)
+            mirror_dir = source_mirror_dir
             
             # Process files in repository
             processed_files = []
+            duplicate_files = []
             failed_files = []
+            file_metrics = []
+            candidates = self._list_repo_files(mirror_dir, include_patterns, exclude_patterns)
+            known_hashes = await self._load_content_hashes(client, agent_id)
+            seen_hashes = set()
+            semaphore = asyncio.Semaphore(self.extraction_concurrency)
             
-            for root, dirs, files in os.walk(temp_dir):
-                # Skip .git directory
-                if '.git' in dirs:
-                    dirs.remove('.git')
+            extraction_started = time.perf_counter()
+            extractions = await asyncio.gather(
+                *(
+                    self._extract_repo_file(file, file_path, semaphore, known_hashes, seen_hashes)
+                    for file, file_path, _ in candidates
+                ),
+                return_exceptions=True
+            )
+            extraction_seconds = time.perf_counter() - extraction_started
+            
+            entries = []
+            pending_files = []
+            duplicates = []
+            
+            for (file, file_path, relative_path), extraction in zip(candidates, extractions):
+                if extraction is None:
+                    continue
                 
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, temp_dir)
-                    
-                    # Check if file should be included
-                    if not self._should_include_file(relative_path, include_patterns, exclude_patterns):
-                        continue
-                    
-                    try:
-                        with open(file_path, 'rb') as f:
-                            file_content = f.read()
-                        
-                        if len(file_content) > self.MAX_FILE_SIZE:
-                            continue  # Skip large files
-                        
-                        # Detect MIME type
-                        mime_type, _ = mimetypes.guess_type(file)
-                        if not mime_type:
-                            mime_type = 'application/octet-stream'
-                        
-                        # Extract content
-                        content = await self._extract_file_content(file_content, file, mime_type)
-                        
-                        if content and content.strip():
-                            # Create entry for file
-                            file_entry_data = {
-                                'agent_id': agent_id,
-                                'account_id': account_id,
-                                'name': f"📄 {file}",
-                                'description': f"From {repo_name}: {relative_path}",
-                                'content': content[:self.MAX_CONTENT_LENGTH],
-                                'source_type': 'git_repo',
-                                'source_metadata': {
-                                    'filename': file,
-                                    'relative_path': relative_path,
-                                    'git_url': git_url,
-                                    'branch': branch,
-                                    'repo_name': repo_name,
-                                    'mime_type': mime_type,
-                                    'file_size': len(file_content),
-                                    'extraction_method': self._get_extraction_method(Path(file).suffix.lower(), mime_type)
-                                },
-                                'file_size': len(file_content),
-                                'file_mime_type': mime_type,
-                                'extracted_from_zip_id': repo_entry_id,  # Reuse this field for git repo reference
-                                'usage_context': 'always',
-                                'is_active': True
-                            }
-                            
-                            file_result = await client.table('agent_knowledge_base_entries').insert(file_entry_data).execute()
-                            
-                            processed_files.append({
-                                'filename': file,
-                                'relative_path': relative_path,
-                                'entry_id': file_result.data[0]['entry_id'],
-                                'content_length': len(content)
-                            })
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing {relative_path} from git repo: {str(e)}")
-                        failed_files.append({
-                            'filename': file,
-                            'relative_path': relative_path,
-                            'error': str(e)
-                        })
+                if isinstance(extraction, BaseException):
+                    logger.error(f"Error processing {relative_path} from git repo: {str(extraction)}")
+                    failed_files.append({
+                        'filename': file,
+                        'relative_path': relative_path,
+                        'error': str(extraction)
+                    })
+                    continue
+                
+                if extraction.get('duplicate'):
+                    duplicates.append((file, relative_path, extraction['content_hash']))
+                    continue
+                
+                content = extraction['content']
+                file_metrics.append({'file_size': extraction['file_size'], **extraction['metrics']})
+                
+                if content and content.strip():
+                    # Create entry for file
+                    entries.append(self._git_file_entry(
+                        agent_id, account_id, repo_entry_id, repo_name, git_url, branch,
+                        file, relative_path, extraction
+                    ))
+                    pending_files.append({
+                        'filename': file,
+                        'relative_path': relative_path,
+                        'content_length': len(content),
+                        **extraction['metrics']
+                    })
+            
+            created, insert_errors = await self._insert_entries(client, entries)
+            await self._index_stored_entries(client, agent_id, entries, created)
+            
+            for entry, file_info in zip(entries, pending_files):
+                content_hash = entry['content_hash']
+                if content_hash in created:
+                    processed_files.append({**file_info, 'entry_id': created[content_hash]})
+                else:
+                    failed_files.append({
+                        'filename': file_info['filename'],
+                        'relative_path': file_info['relative_path'],
+                        'error': insert_errors.get(content_hash, 'Failed to create knowledge base entry')
+                    })
             
+            for file, relative_path, content_hash in duplicates:
+                duplicate_files.append({
+                    'filename': file,
+                    'relative_path': relative_path,
+                    'duplicate_of': known_hashes.get(content_hash) or created.get(content_hash)
+                })
+            
+            succeeded = True
+            await asyncio.to_thread(self._prune_mirrors)
             return {
                 'success': True,
                 'repo_entry_id': repo_entry_id,
                 'repo_name': repo_name,
                 'git_url': git_url,
                 'branch': branch,
+                'commit_sha': commit_sha,
                 'processed_files': processed_files,
+                'duplicate_files': duplicate_files,
                 'failed_files': failed_files,
                 'total_processed': len(processed_files),
-                'total_failed': len(failed_files)
+                'total_duplicates': len(duplicate_files),
+                'total_failed': len(failed_files),
+                'extraction_stats': _summarize_extraction(file_metrics, extraction_seconds)
             }
             
         except Exception as e:
@@ -389,12 +786,509 @@ class FileProcessor:
             }
         
         finally:
-            # Clean up temporary directory
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            # Only a successfully ingested clone is worth keeping as a mirror
+            if not succeeded and os.path.exists(mirror_dir):
+                shutil.rmtree(mirror_dir, ignore_errors=True)
+    
+    async def sync_git_repository(self, agent_id: str, repo_entry_id: str) -> Dict[str, Any]:
+        """Bring a previously ingested Git repository source up to date.
+        
+        Fetches the branch into the source's mirror and diffs the recorded commit
+        against the new head, so only added or modified files are re-extracted and
+        upserted and only removed files are deleted. When the mirror or the recorded
+        commit is gone (new worker, evicted cache) the source is re-cloned and every
+        file is compared by content hash instead, which still skips unchanged files.
+        """
+        lock_key = f"{GIT_SYNC_LOCK_PREFIX}{repo_entry_id}"
+        lock_token = await self._acquire_sync_lock(lock_key)
+        if not lock_token:
+            return {
+                'success': False,
+                'repo_entry_id': repo_entry_id,
+                'error': 'A sync for this repository is already in progress'
+            }
+        
+        try:
+            client = await self.db.client
+            
+            repo_result = await client.table('agent_knowledge_base_entries').select('entry_id, account_id, source_metadata').eq('entry_id', repo_entry_id).eq('agent_id', agent_id).eq('source_type', 'git_repo').is_('extracted_from_zip_id', 'null').execute()
+            if not repo_result.data:
+                raise ValueError("Git repository source not found")
+            
+            account_id = repo_result.data[0]['account_id']
+            source_metadata = repo_result.data[0]['source_metadata'] or {}
+            git_url = source_metadata['git_url']
+            branch = source_metadata.get('branch', 'main')
+            include_patterns = source_metadata.get('include_patterns') or []
+            exclude_patterns = source_metadata.get('exclude_patterns') or []
+            previous_sha = source_metadata.get('commit_sha')
+            repo_name = git_url.split('/')[-1].replace('.git', '')
+            mirror_dir = self._mirror_path(repo_entry_id)
+            
+            # Paged: rows past PostgREST's cap would otherwise be re-inserted as new or never deleted
+            existing_rows = await select_all(lambda: client.table('agent_knowledge_base_entries').select('entry_id, content_hash, source_metadata').eq('extracted_from_zip_id', repo_entry_id).order('entry_id'))
+            existing = {
+                (row['source_metadata'] or {}).get('relative_path'): row
+                for row in existing_rows
+            }
+            
+            if await self._mirror_has_commit(mirror_dir, previous_sha):
+                mode = 'diff'
+                await self._run_git('fetch', '--depth', '1', 'origin', branch, cwd=mirror_dir)
+                await self._run_git('reset', '--hard', 'FETCH_HEAD', cwd=mirror_dir)
+                commit_sha = (await self._run_git('rev-parse', 'HEAD', cwd=mirror_dir)).strip()
+                changed_paths, removed_paths = await self._diff_commits(mirror_dir, previous_sha, commit_sha)
+                candidates = [
+                    (os.path.basename(relative_path), os.path.join(mirror_dir, relative_path), relative_path)
+                    for relative_path in changed_paths
+                    if os.path.isfile(os.path.join(mirror_dir, relative_path))
+                    and self._should_include_file(relative_path, include_patterns, exclude_patterns)
+                ]
+            else:
+                mode = 'full'
+                commit_sha = await self._clone_mirror(git_url, branch, mirror_dir)
+                candidates = self._list_repo_files(mirror_dir, include_patterns, exclude_patterns)
+                present = {relative_path for _, _, relative_path in candidates}
+                removed_paths = [relative_path for relative_path in existing if relative_path not in present]
+            removed_paths = set(removed_paths)
+            
+            # Hashes of entries this sync may rewrite must not count as duplicates of themselves
+            candidate_paths = {relative_path for _, _, relative_path in candidates}
+            replaceable_hashes = {
+                row['content_hash'] for relative_path, row in existing.items()
+                if relative_path in candidate_paths or relative_path in removed_paths
+            }
+            known_hashes = {
+                content_hash: entry_id
+                for content_hash, entry_id in (await self._load_content_hashes(client, agent_id)).items()
+                if content_hash not in replaceable_hashes
+            }
+            seen_hashes = set()
+            semaphore = asyncio.Semaphore(self.extraction_concurrency)
+            
+            extraction_started = time.perf_counter()
+            extractions = await asyncio.gather(
+                *(
+                    self._extract_repo_file(
+                        file, file_path, semaphore, known_hashes, seen_hashes,
+                        previous_hash=(existing.get(relative_path) or {}).get('content_hash')
+                    )
+                    for file, file_path, relative_path in candidates
+                ),
+                return_exceptions=True
+            )
+            extraction_seconds = time.perf_counter() - extraction_started
+            
+            new_entries = []
+            updated_entries = []
+            stale_entry_ids = [existing[path]['entry_id'] for path in removed_paths if path in existing]
+            unchanged = 0
+            duplicate_files = []
+            failed_files = []
+            file_metrics = []
+            
+            for (file, file_path, relative_path), extraction in zip(candidates, extractions):
+                current = existing.get(relative_path)
+                
+                if extraction is None:
+                    continue
+                
+                if isinstance(extraction, BaseException):
+                    logger.error(f"Error syncing {relative_path} from git repo: {str(extraction)}")
+                    failed_files.append({
+                        'filename': file,
+                        'relative_path': relative_path,
+                        'error': str(extraction)
+                    })
+                    continue
+                
+                if extraction.get('unchanged'):
+                    unchanged += 1
+                    continue
+                
+                if extraction.get('duplicate'):
+                    duplicate_files.append({
+                        'filename': file,
+                        'relative_path': relative_path,
+                        'duplicate_of': known_hashes.get(extraction['content_hash'])
+                    })
+                    if current:
+                        stale_entry_ids.append(current['entry_id'])
+                    continue
+                
+                content = extraction['content']
+                file_metrics.append({'file_size': extraction['file_size'], **extraction['metrics']})
+                
+                if not content or not content.strip():
+                    if current:
+                        stale_entry_ids.append(current['entry_id'])
+                    continue
+                
+                entry = self._git_file_entry(
+                    agent_id, account_id, repo_entry_id, repo_name, git_url, branch,
+                    file, relative_path, extraction
+                )
+                if current:
+                    updated_entries.append({**entry, 'entry_id': current['entry_id']})
+                else:
+                    new_entries.append(entry)
+            
+            created, insert_errors = await self._insert_entries(client, new_entries)
+            updated, update_errors = await self._insert_entries(client, updated_entries, upsert=True)
+            await self._delete_entries(client, stale_entry_ids)
+            await self._index_stored_entries(client, agent_id, new_entries, created)
+            await self._index_stored_entries(client, agent_id, updated_entries, updated)
+            kb_retriever.remove_entries(agent_id, stale_entry_ids)
+            
+            for entry in new_entries + updated_entries:
+                content_hash = entry['content_hash']
+                if content_hash not in created and content_hash not in updated:
+                    failed_files.append({
+                        'filename': entry['source_metadata']['filename'],
+                        'relative_path': entry['source_metadata']['relative_path'],
+                        'error': insert_errors.get(content_hash) or update_errors.get(content_hash, 'Failed to store knowledge base entry')
+                    })
+            
+            await client.table('agent_knowledge_base_entries').update({
+                'source_metadata': {
+                    **source_metadata,
+                    'commit_sha': commit_sha,
+                    'last_synced_at': datetime.now(timezone.utc).isoformat()
+                }
+            }).eq('entry_id', repo_entry_id).execute()
+            await asyncio.to_thread(self._prune_mirrors)
+            
+            return {
+                'success': True,
+                'repo_entry_id': repo_entry_id,
+                'git_url': git_url,
+                'branch': branch,
+                'mode': mode,
+                'previous_commit_sha': previous_sha,
+                'commit_sha': commit_sha,
+                'total_added': len(created),
+                'total_updated': len(updated),
+                'total_deleted': len(stale_entry_ids),
+                'total_unchanged': unchanged,
+                'total_duplicates': len(duplicate_files),
+                'total_failed': len(failed_files),
+                'duplicate_files': duplicate_files,
+                'failed_files': failed_files,
+                'extraction_stats': _summarize_extraction(file_metrics, extraction_seconds)
+            }
+        
+        except Exception as e:
+            logger.error(f"Error syncing git repository source {repo_entry_id}: {str(e)}")
+            return {
+                'success': False,
+                'repo_entry_id': repo_entry_id,
+                'error': str(e)
+            }
+        
+        finally:
+            await self._release_sync_lock(lock_key, lock_token)
+    
+    async def _extract_repo_file(
+        self,
+        file: str,
+        file_path: str,
+        semaphore: asyncio.Semaphore,
+        known_hashes: Dict[str, str],
+        seen_hashes: set,
+        previous_hash: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            if os.path.getsize(file_path) > self.MAX_FILE_SIZE:
+                return None  # Skip large files
+            
+            file_size = os.path.getsize(file_path)
+            content_hash = await asyncio.to_thread(_hash_source, file_path)
+            if previous_hash == content_hash:
+                seen_hashes.add(content_hash)
+                return {'content_hash': content_hash, 'unchanged': True}
+            if content_hash in known_hashes or content_hash in seen_hashes:
+                return {'content_hash': content_hash, 'duplicate': True}
+            seen_hashes.add(content_hash)
+            
+            # Detect MIME type
+            mime_type, _ = mimetypes.guess_type(file)
+            if not mime_type:
+                mime_type = 'application/octet-stream'
+            
+            try:
+                content, metrics = await self._extract_with_metrics(file_path, file, mime_type, file_size)
+            except ExtractionFailed:
+                seen_hashes.discard(content_hash)
+                raise
+            return {
+                'content_hash': content_hash,
+                'mime_type': mime_type,
+                'file_size': file_size,
+                'content': content,
+                'metrics': metrics
+            }
+    
+    def _git_file_entry(
+        self,
+        agent_id: str,
+        account_id: str,
+        repo_entry_id: str,
+        repo_name: str,
+        git_url: str,
+        branch: str,
+        file: str,
+        relative_path: str,
+        extraction: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        mime_type = extraction['mime_type']
+        return {
+            'agent_id': agent_id,
+            'account_id': account_id,
+            'name': f"📄 {file}",
+            'description': f"From {repo_name}: {relative_path}",
+            'content': extraction['content'][:self.MAX_CONTENT_LENGTH],
+            'source_type': 'git_repo',
+            'source_metadata': {
+                'filename': file,
+                'relative_path': relative_path,
+                'git_url': git_url,
+                'branch': branch,
+                'repo_name': repo_name,
+                'mime_type': mime_type,
+                'file_size': extraction['file_size'],
+                'extraction_method': self._get_extraction_method(Path(file).suffix.lower(), mime_type),
+                **extraction['metrics']
+            },
+            'file_size': extraction['file_size'],
+            'file_mime_type': mime_type,
+            'content_hash': extraction['content_hash'],
+            'extracted_from_zip_id': repo_entry_id,  # Reuse this field for git repo reference
+            'usage_context': 'always',
+            'is_active': True
+        }
+    
+    def _list_repo_files(self, repo_dir: str, include_patterns: List[str], exclude_patterns: List[str]) -> List[Tuple[str, str, str]]:
+        """(filename, absolute path, path relative to the repo) for every included file."""
+        candidates = []
+        for root, dirs, files in os.walk(repo_dir):
+            # Skip .git directory
+            if '.git' in dirs:
+                dirs.remove('.git')
+            
+            for file in files:
+                file_path = os.path.join(root, file)
+                relative_path = os.path.relpath(file_path, repo_dir)
+                
+                # Check if file should be included
+                if self._should_include_file(relative_path, include_patterns, exclude_patterns):
+                    candidates.append((file, file_path, relative_path))
+        return candidates
+    
+    @staticmethod
+    def _mirror_root() -> str:
+        return config.KB_GIT_MIRROR_DIR or os.path.join(tempfile.gettempdir(), 'kb-git-mirrors')
+    
+    def _mirror_path(self, source_id: str) -> str:
+        # Keyed by the repository source, so two sources of the same URL and branch never share a mirror
+        return os.path.join(self._mirror_root(), str(source_id))
+    
+    def _prune_mirrors(self) -> None:
+        """Delete mirrors unused for GIT_MIRROR_MAX_AGE_SECONDS and the least recently used past KB_GIT_MIRROR_MAX_ENTRIES."""
+        mirror_root = self._mirror_root()
+        try:
+            mirrors = [
+                (entry.stat().st_mtime, entry.path)
+                for entry in os.scandir(mirror_root)
+                if entry.is_dir(follow_symlinks=False)
+            ]
+        except FileNotFoundError:
+            return
+        
+        now = time.time()
+        mirrors.sort(reverse=True)
+        for position, (used_at, path) in enumerate(mirrors):
+            if now - used_at < GIT_SYNC_LOCK_TTL:
+                continue
+            if now - used_at > GIT_MIRROR_MAX_AGE_SECONDS or position >= config.KB_GIT_MIRROR_MAX_ENTRIES:
+                logger.info(f"Removing unused git mirror {path}")
+                shutil.rmtree(path, ignore_errors=True)
+    
+    async def _run_git(self, *args: str, cwd: Optional[str] = None) -> str:
+        process = await asyncio.create_subprocess_exec(
+            'git', *args,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        
+        if process.returncode != 0:
+            raise Exception(f"Git {args[0]} failed: {stderr.decode()}")
+        return stdout.decode()
+    
+    async def _clone_mirror(self, git_url: str, branch: str, mirror_dir: str) -> str:
+        """Fresh shallow clone into the mirror directory; returns the checked-out commit SHA."""
+        if os.path.exists(mirror_dir):
+            shutil.rmtree(mirror_dir, ignore_errors=True)
+        os.makedirs(os.path.dirname(mirror_dir), exist_ok=True)
+        
+        await self._run_git('clone', '--depth', '1', '--branch', branch, git_url, mirror_dir)
+        return (await self._run_git('rev-parse', 'HEAD', cwd=mirror_dir)).strip()
+    
+    async def _mirror_has_commit(self, mirror_dir: str, commit_sha: Optional[str]) -> bool:
+        if not commit_sha or not os.path.isdir(os.path.join(mirror_dir, '.git')):
+            return False
+        # The directory's mtime records when the mirror was last used, for pruning
+        os.utime(mirror_dir)
+        try:
+            await self._run_git('cat-file', '-e', f"{commit_sha}^{{commit}}", cwd=mirror_dir)
+            return True
+        except Exception:
+            return False
+    
+    async def _diff_commits(self, repo_dir: str, from_sha: str, to_sha: str) -> Tuple[List[str], List[str]]:
+        """Paths added or modified, and paths removed, between two commits."""
+        if from_sha == to_sha:
+            return [], []
+        
+        output = await self._run_git('diff', '--name-status', '--no-renames', '-z', from_sha, to_sha, cwd=repo_dir)
+        fields = [field for field in output.split('\0') if field]
+        changed_paths = []
+        removed_paths = []
+        
+        for status, relative_path in zip(fields[0::2], fields[1::2]):
+            if status.startswith('D'):
+                removed_paths.append(relative_path)
+            else:
+                changed_paths.append(relative_path)
+        return changed_paths, removed_paths
+    
+    async def _acquire_sync_lock(self, lock_key: str) -> Optional[str]:
+        """The lock's token if it was acquired, None if another sync holds it."""
+        token = str(uuid.uuid4())
+        try:
+            from services import redis
+            return token if await redis.set(lock_key, token, ex=GIT_SYNC_LOCK_TTL, nx=True) else None
+        except Exception as e:
+            # Without Redis there is no cross-worker lock; the mirror is still per source
+            logger.warning(f"Failed to acquire git sync lock {lock_key}: {e}")
+            return token
+    
+    async def _release_sync_lock(self, lock_key: str, token: str) -> None:
+        try:
+            from services import redis
+            # A sync that outlived the lock TTL must not release a lock another sync now holds
+            await redis.delete_if_equals(lock_key, token)
+        except Exception as e:
+            logger.warning(f"Failed to release git sync lock {lock_key}: {e}")
+    
+    @staticmethod
+    def _content_hash(file_content: bytes) -> str:
+        return hashlib.sha256(file_content).hexdigest()
+    
+    async def _find_content_hash(self, client, agent_id: str, content_hash: str) -> Optional[str]:
+        """entry_id of the agent's active entry with this content hash, if one is stored."""
+        result = await client.table('agent_knowledge_base_entries').select('entry_id').eq('agent_id', agent_id).eq('content_hash', content_hash).eq('is_active', True).limit(1).execute()
+        return result.data[0]['entry_id'] if result.data else None
+    
+    async def _load_content_hashes(self, client, agent_id: str) -> Dict[str, str]:
+        """Map content_hash -> entry_id for every hashed active entry already stored for the agent.
+
+        Deactivated entries are never injected, so re-adding their content must not be skipped as a duplicate.
+        """
+        rows = await select_all(lambda: client.table('agent_knowledge_base_entries').select('entry_id, content_hash').eq('agent_id', agent_id).eq('is_active', True).not_.is_('content_hash', 'null').order('entry_id'))
+        return {row['content_hash']: row['entry_id'] for row in rows}
+    
+    async def _insert_entries(self, client, entries: List[Dict[str, Any]], upsert: bool = False) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Insert entries in multi-row batches of KB_INSERT_BATCH_SIZE.
+        
+        Returns (content_hash -> entry_id for stored rows, content_hash -> error for
+        rows whose batch failed). A failed batch does not stop the remaining ones.
+        With upsert=True the entries carry their entry_id and replace existing rows.
+        """
+        batch_size = max(1, config.KB_INSERT_BATCH_SIZE)
+        created = {}
+        errors = {}
+        
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            try:
+                table = client.table('agent_knowledge_base_entries')
+                query = table.upsert(batch, on_conflict='entry_id') if upsert else table.insert(batch)
+                result = await query.execute()
+                for row in result.data or []:
+                    created[row['content_hash']] = row['entry_id']
+            except Exception as e:
+                logger.error(f"Error inserting knowledge base entries batch of {len(batch)}: {str(e)}")
+                for entry in batch:
+                    errors[entry['content_hash']] = str(e)
+        
+        return created, errors
+    
+    async def _index_stored_entries(self, client, agent_id: str, entries: List[Dict[str, Any]], stored: Dict[str, str]) -> None:
+        """Chunk the entries that were stored into the agent's retrieval index."""
+        await kb_retriever.index_entries(client, agent_id, [
+            {**entry, 'entry_id': stored[entry['content_hash']]}
+            for entry in entries if entry['content_hash'] in stored
+        ])
+    
+    async def _delete_entries(self, client, entry_ids: List[str]) -> None:
+        batch_size = max(1, config.KB_INSERT_BATCH_SIZE)
+        for start in range(0, len(entry_ids), batch_size):
+            await client.table('agent_knowledge_base_entries').delete().in_('entry_id', entry_ids[start:start + batch_size]).execute()
     
     async def _extract_file_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
         """Extract text content from various file types."""
+        content, _ = await self._extract_with_metrics(file_content, filename, mime_type)
+        return content
+    
+    async def _extract_with_metrics(self, file_content: Union[bytes, str], filename: str, mime_type: str, file_size: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Extract content in the process pool and report how long it took.
+        
+        PyPDF2, openpyxl, python-docx and pytesseract are CPU-bound; running them
+        inline would stall the event loop for every other request on this worker.
+        """
+        started = time.perf_counter()
+        try:
+            content = await self._run_in_extraction_pool(file_content, filename, mime_type)
+        except asyncio.TimeoutError as e:
+            logger.error(f"Extraction of {filename} did not finish within {config.KB_EXTRACTION_TIMEOUT_SECONDS}s")
+            raise ExtractionFailed(f"Error extracting content: extraction timed out after {config.KB_EXTRACTION_TIMEOUT_SECONDS}s") from e
+        except Exception as e:
+            logger.error(f"Error extracting content from {filename}: {str(e)}")
+            raise ExtractionFailed(f"Error extracting content: {str(e)}") from e
+        
+        if file_size is None:
+            file_size = len(file_content) if isinstance(file_content, bytes) else os.path.getsize(file_content)
+        return content, _extraction_metrics(file_size, time.perf_counter() - started)
+    
+    async def _run_in_extraction_pool(self, file_content: Union[bytes, str], filename: str, mime_type: str) -> str:
+        loop = asyncio.get_running_loop()
+        timeout = config.KB_EXTRACTION_TIMEOUT_SECONDS
+        
+        for attempt in range(2):
+            pool = _get_extraction_pool()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(
+                        pool, _extract_in_worker,
+                        file_content, filename, mime_type,
+                        config.KB_EXTRACTION_CPU_SECONDS, timeout
+                    ),
+                    timeout=timeout + EXTRACTION_TIMEOUT_GRACE_SECONDS
+                )
+            except BrokenProcessPool:
+                # A crashed or recycled sibling took the pool down; retry once on a fresh one
+                _reset_extraction_pool(pool)
+                if attempt:
+                    raise
+            except asyncio.TimeoutError:
+                # The worker ignored its own limits (stuck in native code), so kill it
+                _reset_extraction_pool(pool, terminate=True)
+                raise
+    
+    def _extract_content_sync(self, file_content: bytes, filename: str, mime_type: str) -> str:
+        """Dispatch to the extractor for the file type. Runs inside an extraction worker."""
         file_extension = Path(filename).suffix.lower()
         
         try:
@@ -439,8 +1333,9 @@ class FileProcessor:
                 return self._extract_text_content(file_content)
         
         except Exception as e:
+            # Raised to the caller so the failure isn't stored as the file's content
             logger.error(f"Error extracting content from {filename}: {str(e)}")
-            return f"Error extracting content: {str(e)}"
+            raise
     
     def _extract_text_content(self, file_content: bytes) -> str:
         """Extract content from text files with encoding detection."""
@@ -505,7 +1400,7 @@ class FileProcessor:
             raw_text = pytesseract.image_to_string(image)
             return self._sanitize_content(raw_text)
         except Exception as e:
-            return f"OCR extraction failed: {str(e)}"
+            raise ExtractionFailed(f"OCR extraction failed: {str(e)}") from e
     
     def _extract_json_content(self, file_content: bytes) -> str:
         """Extract and format JSON content."""
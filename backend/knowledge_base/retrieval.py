@@ -0,0 +1,472 @@
+import asyncio
+import heapq
+import json
+import math
+import re
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from supabase import AsyncClient
+
+from services.supabase import select_all
+from utils.config import config
+from utils.logger import logger
+
+# Other workers ingest too, so a loaded index is trusted for this long before it is reloaded
+INDEX_TTL_SECONDS = 60
+INDEX_MAX_ENTRIES = 256
+
+# Only these entries are ever injected, matching get_agent_knowledge_base_context
+INJECTABLE_USAGE_CONTEXTS = ('always', 'contextual')
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Same estimate the database triggers use for content_tokens
+CHARS_PER_TOKEN = 4
+
+BACKFILL_BATCH_SIZE = 50
+
+KB_CONTEXT_HEADER = "# AGENT KNOWLEDGE BASE\n\nThe following is your specialized knowledge base. Use this information as context when responding:"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+_STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'for', 'from', 'has',
+    'have', 'how', 'i', 'if', 'in', 'is', 'it', 'its', 'me', 'my', 'no', 'not', 'of', 'on',
+    'or', 'so', 'that', 'the', 'their', 'them', 'then', 'there', 'these', 'they', 'this', 'to',
+    'was', 'we', 'what', 'when', 'where', 'which', 'who', 'why', 'will', 'with', 'you', 'your'
+})
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def tokenize(text: str) -> List[str]:
+    return [term for term in _TOKEN_PATTERN.findall(text.lower()) if len(term) > 1 and term not in _STOPWORDS]
+
+
+def chunk_text(content: str, chunk_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[str]:
+    """Split content into chunks of roughly chunk_tokens, preferring paragraph boundaries.
+
+    Paragraphs are packed together up to the chunk size. A paragraph longer than a
+    chunk is cut into windows overlapping by overlap_tokens, so text that spans a
+    cut can still be retrieved from either side.
+    """
+    if chunk_tokens is None:
+        chunk_tokens = config.KB_CHUNK_TOKENS
+    if overlap_tokens is None:
+        overlap_tokens = config.KB_CHUNK_OVERLAP_TOKENS
+    chunk_chars = max(1, chunk_tokens) * CHARS_PER_TOKEN
+    overlap_chars = min(max(0, overlap_tokens) * CHARS_PER_TOKEN, chunk_chars // 2)
+
+    chunks = []
+    current = ''
+    for paragraph in re.split(r'\n\s*\n', content or ''):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ''
+            step = chunk_chars - overlap_chars
+            for start in range(0, len(paragraph), step):
+                chunks.append(paragraph[start:start + chunk_chars])
+                if start + chunk_chars >= len(paragraph):
+                    break
+            continue
+
+        if current and len(current) + 2 + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def message_text(content: Any) -> str:
+    """Plain text of a stored message's content: a JSON string or dict, possibly multimodal"""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except json.JSONDecodeError:
+            return content
+    if isinstance(content, dict):
+        content = content.get('content', '')
+    if isinstance(content, list):
+        return ' '.join(
+            part.get('text', '') for part in content
+            if isinstance(part, dict) and part.get('type') == 'text'
+        )
+    return content if isinstance(content, str) else ''
+
+
+@dataclass
+class IndexedChunk:
+    chunk_id: str
+    entry_id: str
+    chunk_index: int
+    token_count: int
+    term_count: int
+    terms: Dict[str, int]
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'IndexedChunk':
+        return cls(
+            chunk_id=row['chunk_id'],
+            entry_id=row['entry_id'],
+            chunk_index=row['chunk_index'],
+            token_count=row['token_count'],
+            term_count=row['term_count'],
+            terms=row.get('terms') or {}
+        )
+
+
+@dataclass
+class AgentChunkIndex:
+    """BM25 statistics for one agent's active chunks.
+
+    Only term frequencies live in memory; chunk text stays in agent_kb_chunks and is
+    fetched for the handful of chunks a run actually injects.
+    """
+    agent_id: str
+    entries: Dict[str, Dict[str, Optional[str]]] = field(default_factory=dict)
+    chunks: Dict[str, IndexedChunk] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+    _entry_chunks: Dict[str, List[str]] = field(default_factory=dict)
+    _postings: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    _total_terms: int = 0
+
+    def add_entry(self, entry_id: str, name: Optional[str], description: Optional[str], chunks: List[IndexedChunk]) -> None:
+        self.remove_entry(entry_id)
+        self.entries[entry_id] = {'name': name, 'description': description}
+        # An empty entry's placeholder chunk has no terms and can never match
+        chunks = [chunk for chunk in chunks if chunk.term_count]
+        self._entry_chunks[entry_id] = [chunk.chunk_id for chunk in chunks]
+        for chunk in chunks:
+            self.chunks[chunk.chunk_id] = chunk
+            self._total_terms += chunk.term_count
+            for term, frequency in chunk.terms.items():
+                self._postings.setdefault(term, {})[chunk.chunk_id] = frequency
+
+    def remove_entry(self, entry_id: str) -> None:
+        self.entries.pop(entry_id, None)
+        for chunk_id in self._entry_chunks.pop(entry_id, []):
+            chunk = self.chunks.pop(chunk_id, None)
+            if chunk is None:
+                continue
+            self._total_terms -= chunk.term_count
+            for term in chunk.terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, query_terms: List[str], top_k: int) -> List[Tuple[float, IndexedChunk]]:
+        chunk_count = len(self.chunks)
+        if not chunk_count or not query_terms:
+            return []
+
+        average_length = (self._total_terms / chunk_count) or 1
+        scores: Dict[str, float] = {}
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (chunk_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                length_norm = 1 - BM25_B + BM25_B * self.chunks[chunk_id].term_count / average_length
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(score, self.chunks[chunk_id]) for chunk_id, score in best]
+
+
+def _chunk_id(entry_id: str, chunk_index: int) -> str:
+    return str(uuid.uuid5(uuid.UUID(str(entry_id)), str(chunk_index)))
+
+
+class KnowledgeBaseRetriever:
+    """Process-wide chunk indexes keyed by agent_id, persisted in agent_kb_chunks.
+
+    Entries are chunked when they are ingested or edited. Entries written before
+    the index existed, or whose indexing failed, are chunked the next time their
+    agent's index is loaded.
+    """
+
+    def __init__(self, ttl_seconds: int = INDEX_TTL_SECONDS, max_entries: int = INDEX_MAX_ENTRIES):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._indexes: "OrderedDict[str, AgentChunkIndex]" = OrderedDict()
+        # Per-agent load locks with the number of tasks holding or waiting on each;
+        # a lock is dropped once nobody uses it, so only agents being loaded have one
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def _agent_lock(self, agent_id: str) -> AsyncIterator[None]:
+        lock = self._locks.get(agent_id)
+        if lock is None:
+            lock = self._locks[agent_id] = asyncio.Lock()
+        self._lock_users[agent_id] = self._lock_users.get(agent_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            remaining = self._lock_users[agent_id] - 1
+            if remaining:
+                self._lock_users[agent_id] = remaining
+            else:
+                del self._lock_users[agent_id]
+                del self._locks[agent_id]
+
+    def _store(self, agent_id: str, index: AgentChunkIndex) -> None:
+        self._indexes[agent_id] = index
+        self._indexes.move_to_end(agent_id)
+        while len(self._indexes) > self._max_entries:
+            self._indexes.popitem(last=False)
+
+    def _is_fresh(self, index: Optional[AgentChunkIndex]) -> bool:
+        return index is not None and (time.monotonic() - index.loaded_at) < self._ttl_seconds
+
+    async def get_index(self, client: AsyncClient, agent_id: str) -> AgentChunkIndex:
+        index = self._indexes.get(agent_id)
+        if self._is_fresh(index):
+            self._indexes.move_to_end(agent_id)
+            return index
+
+        async with self._agent_lock(agent_id):
+            index = self._indexes.get(agent_id)
+            if self._is_fresh(index):
+                return index
+            index = await self._load(client, agent_id)
+            self._store(agent_id, index)
+            return index
+
+    async def _load(self, client: AsyncClient, agent_id: str) -> AgentChunkIndex:
+        entries, chunk_rows = await asyncio.gather(
+            select_all(lambda: client.table('agent_knowledge_base_entries').select('entry_id, name, description').eq('agent_id', agent_id).eq('is_active', True).in_('usage_context', list(INJECTABLE_USAGE_CONTEXTS)).order('entry_id')),
+            select_all(lambda: client.table('agent_kb_chunks').select('chunk_id, entry_id, chunk_index, token_count, term_count, terms').eq('agent_id', agent_id).order('chunk_id'))
+        )
+
+        chunks_by_entry: Dict[str, List[IndexedChunk]] = {}
+        for row in chunk_rows:
+            chunks_by_entry.setdefault(row['entry_id'], []).append(IndexedChunk.from_row(row))
+
+        index = AgentChunkIndex(agent_id=agent_id)
+        missing = []
+        for entry in entries:
+            chunks = chunks_by_entry.get(entry['entry_id'])
+            if chunks:
+                index.add_entry(entry['entry_id'], entry.get('name'), entry.get('description'), chunks)
+            else:
+                missing.append(entry['entry_id'])
+
+        if missing:
+            logger.info(f"Chunking {len(missing)} unindexed knowledge base entries for agent {agent_id}")
+            for start in range(0, len(missing), BACKFILL_BATCH_SIZE):
+                result = await client.table('agent_knowledge_base_entries').select('entry_id, name, description, content').in_('entry_id', missing[start:start + BACKFILL_BATCH_SIZE]).execute()
+                for entry in result.data or []:
+                    rows = self._build_chunk_rows(agent_id, entry)
+                    await self._upsert_chunk_rows(client, rows)
+                    index.add_entry(entry['entry_id'], entry.get('name'), entry.get('description'), [IndexedChunk.from_row(row) for row in rows])
+
+        return index
+
+    def _build_chunk_rows(self, agent_id: str, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # The entry name (usually the filename) is counted in every chunk so queries naming the file match
+        name_terms = tokenize(entry.get('name') or '')
+        rows = []
+        for chunk_index, text in enumerate(chunk_text(entry.get('content') or '')):
+            terms = Counter(tokenize(text))
+            terms.update(name_terms)
+            rows.append({
+                'chunk_id': _chunk_id(entry['entry_id'], chunk_index),
+                'entry_id': entry['entry_id'],
+                'agent_id': agent_id,
+                'chunk_index': chunk_index,
+                'content': text,
+                'token_count': max(1, estimate_tokens(text)),
+                'term_count': sum(terms.values()),
+                'terms': dict(terms)
+            })
+        if not rows:
+            # Marks an empty entry as indexed so loads don't re-chunk it every time
+            rows.append({
+                'chunk_id': _chunk_id(entry['entry_id'], 0),
+                'entry_id': entry['entry_id'],
+                'agent_id': agent_id,
+                'chunk_index': 0,
+                'content': '',
+                'token_count': 0,
+                'term_count': 0,
+                'terms': {}
+            })
+        return rows
+
+    async def _insert_chunk_rows(self, client: AsyncClient, rows: List[Dict[str, Any]]) -> None:
+        batch_size = max(1, config.KB_INSERT_BATCH_SIZE)
+        for start in range(0, len(rows), batch_size):
+            await client.table('agent_kb_chunks').insert(rows[start:start + batch_size]).execute()
+
+    async def _upsert_chunk_rows(self, client: AsyncClient, rows: List[Dict[str, Any]]) -> None:
+        # Several workers may backfill the same entry; chunk ids are derived from
+        # (entry_id, chunk_index), so whichever write lands first is what every index holds
+        batch_size = max(1, config.KB_INSERT_BATCH_SIZE)
+        for start in range(0, len(rows), batch_size):
+            await client.table('agent_kb_chunks').upsert(rows[start:start + batch_size], on_conflict='entry_id,chunk_index', ignore_duplicates=True).execute()
+
+    async def index_entries(self, client: AsyncClient, agent_id: str, entries: List[Dict[str, Any]]) -> None:
+        """Chunk and persist new or edited entries and apply them to the loaded index.
+
+        Each entry needs entry_id and content, plus name and description;
+        is_active and usage_context default to an injectable entry. Failures are
+        logged rather than raised: the entries are re-chunked on the next load.
+        """
+        if not entries:
+            return
+
+        try:
+            rows_by_entry = {entry['entry_id']: self._build_chunk_rows(agent_id, entry) for entry in entries}
+            entry_ids = list(rows_by_entry)
+            for start in range(0, len(entry_ids), BACKFILL_BATCH_SIZE):
+                await client.table('agent_kb_chunks').delete().in_('entry_id', entry_ids[start:start + BACKFILL_BATCH_SIZE]).execute()
+            await self._insert_chunk_rows(client, [row for rows in rows_by_entry.values() for row in rows])
+        except Exception as e:
+            logger.error(f"Error indexing knowledge base entries for agent {agent_id}: {str(e)}")
+            self.invalidate(agent_id)
+            return
+
+        index = self._indexes.get(agent_id)
+        if index is None:
+            return
+        for entry in entries:
+            if entry.get('is_active', True) and entry.get('usage_context', 'always') in INJECTABLE_USAGE_CONTEXTS:
+                chunks = [IndexedChunk.from_row(row) for row in rows_by_entry[entry['entry_id']]]
+                index.add_entry(entry['entry_id'], entry.get('name'), entry.get('description'), chunks)
+            else:
+                index.remove_entry(entry['entry_id'])
+
+    def remove_entries(self, agent_id: str, entry_ids: List[str]) -> None:
+        """Drop deleted entries from the loaded index; their chunks cascade in the database"""
+        index = self._indexes.get(agent_id)
+        if index is None:
+            return
+        for entry_id in entry_ids:
+            index.remove_entry(entry_id)
+
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        if agent_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(agent_id, None)
+
+    async def build_agent_context(
+        self,
+        client: AsyncClient,
+        agent_id: str,
+        query: str,
+        max_tokens: int,
+        top_k: Optional[int] = None
+    ) -> Optional[str]:
+        """The top-k chunks most relevant to query that fit in max_tokens, grouped by entry"""
+        query_terms = tokenize(query)
+        if not query_terms:
+            return None
+
+        index = await self.get_index(client, agent_id)
+        ranked = index.search(query_terms, top_k or config.KB_RETRIEVAL_TOP_K)
+
+        selected: List[IndexedChunk] = []
+        used_tokens = 0
+        for _, chunk in ranked:
+            if used_tokens + chunk.token_count > max_tokens:
+                continue
+            selected.append(chunk)
+            used_tokens += chunk.token_count
+        if not selected:
+            return None
+
+        result = await client.table('agent_kb_chunks').select('chunk_id, content').in_('chunk_id', [chunk.chunk_id for chunk in selected]).execute()
+        contents = {row['chunk_id']: row['content'] for row in result.data or []}
+
+        # Entries appear in order of their best chunk; chunks within an entry in document order
+        sections: Dict[str, List[IndexedChunk]] = {}
+        for chunk in selected:
+            if chunk.chunk_id in contents:
+                sections.setdefault(chunk.entry_id, []).append(chunk)
+        if not sections:
+            return None
+
+        parts = [KB_CONTEXT_HEADER]
+        for entry_id, chunks in sections.items():
+            entry = index.entries.get(entry_id, {})
+            section = f"## {entry.get('name') or 'Knowledge'}\n"
+            if entry.get('description'):
+                section += entry['description'] + "\n\n"
+            section += "\n\n[...]\n\n".join(contents[chunk.chunk_id] for chunk in sorted(chunks, key=lambda chunk: chunk.chunk_index))
+            parts.append(section)
+
+        await self._log_usage(client, agent_id, sections)
+        return "\n\n".join(parts)
+
+    async def _log_usage(self, client: AsyncClient, agent_id: str, sections: Dict[str, List[IndexedChunk]]) -> None:
+        try:
+            await client.table('agent_knowledge_base_usage_log').insert([
+                {
+                    'entry_id': entry_id,
+                    'agent_id': agent_id,
+                    'usage_type': 'context_injection',
+                    'tokens_used': sum(chunk.token_count for chunk in chunks)
+                }
+                for entry_id, chunks in sections.items()
+            ]).execute()
+        except Exception as e:
+            logger.warning(f"Failed to log knowledge base usage for agent {agent_id}: {e}")
+
+    async def build_combined_context(
+        self,
+        client: AsyncClient,
+        thread_id: str,
+        agent_id: Optional[str],
+        query: str,
+        max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """Relevant agent chunks plus the thread's knowledge base, split like get_combined_knowledge_base_context.
+
+        Without an agent or any searchable terms in the query there is nothing to
+        rank against, so this falls back to the whole-entry RPC.
+        """
+        max_tokens = max_tokens or config.KB_RETRIEVAL_MAX_TOKENS
+        if not agent_id or not tokenize(query):
+            result = await client.rpc('get_combined_knowledge_base_context', {
+                'p_thread_id': thread_id,
+                'p_agent_id': agent_id,
+                'p_max_tokens': max_tokens
+            }).execute()
+            return result.data or None
+
+        agent_budget = max_tokens // 2
+        agent_context, thread_result = await asyncio.gather(
+            self.build_agent_context(client, agent_id, query, agent_budget),
+            client.rpc('get_knowledge_base_context', {
+                'p_thread_id': thread_id,
+                'p_max_tokens': max_tokens - agent_budget
+            }).execute()
+        )
+
+        parts = [context for context in (agent_context, thread_result.data) if context and context.strip()]
+        return "\n\n".join(parts) or None
+
+
+kb_retriever = KnowledgeBaseRetriever()
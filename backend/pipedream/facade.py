@@ -14,7 +14,7 @@ from .services.mcp_qualified_name_service import MCPQualifiedNameService
 from .services.profile_configuration_service import ProfileConfigurationService
 from .services.connection_status_service import ConnectionStatusService
 from .services.connection_token_service import ConnectionTokenService
-from .support.http_client import HttpClient
+from .support.http_client import get_http_client
 from .support.encryption_service import EncryptionService
 from .protocols import DatabaseConnection, Logger
 from utils.logger import logger
@@ -34,7 +34,7 @@ class PipedreamManager:
             self._db = db
         
         self._encryption_service = EncryptionService()
-        self._http_client = HttpClient()
+        self._http_client = get_http_client()
         
         self._profile_repo = SupabaseProfileRepository(self._db, self._encryption_service, self._logger)
         self._connection_repo = PipedreamConnectionRepository(self._http_client, self._logger)
@@ -443,7 +443,9 @@ class PipedreamManager:
         }
 
     async def close(self):
-        await self._http_client.close()
+        # The HTTP client is shared process-wide; it is closed on app shutdown
+        # via close_http_client() rather than by individual facades.
+        pass
 
     async def __aenter__(self):
         return self
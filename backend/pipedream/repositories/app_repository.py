@@ -1,11 +1,45 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import json
+import time
+import hashlib
+from collections import OrderedDict
+from utils.config import config
 from ..protocols import AppRepository, HttpClient, Logger
 from ..domain.entities import App, AuthType
 from ..domain.value_objects import AppSlug, SearchQuery, Category, PaginationCursor
 from ..domain.exceptions import HttpClientException
 
 
+# Process-local layer in front of Redis for hot UI listings (search, popular apps)
+LOCAL_CACHE_TTL_SECONDS = 60
+LOCAL_CACHE_MAX_ENTRIES = 1024
+_local_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+
+def _get_local(cache_key: str) -> Optional[Any]:
+    entry = _local_cache.get(cache_key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at <= time.monotonic():
+        _local_cache.pop(cache_key, None)
+        return None
+    _local_cache.move_to_end(cache_key)
+    return value
+
+
+def _set_local(cache_key: str, value: Any, ttl: float) -> None:
+    now = time.monotonic()
+    # Search params are arbitrary, so drop expired entries here rather than waiting
+    # for the same key to be read again
+    for key in [key for key, (expires_at, _) in _local_cache.items() if expires_at <= now]:
+        del _local_cache[key]
+    _local_cache[cache_key] = (now + ttl, value)
+    _local_cache.move_to_end(cache_key)
+    while len(_local_cache) > LOCAL_CACHE_MAX_ENTRIES:
+        _local_cache.popitem(last=False)
+
+
 class PipedreamAppRepository:
     def __init__(self, http_client: HttpClient, logger: Logger):
         self._http_client = http_client
@@ -13,6 +47,33 @@ class PipedreamAppRepository:
         import asyncio
         self._semaphore = asyncio.Semaphore(10)
 
+    async def _get_cached(self, cache_key: str) -> Optional[Any]:
+        value = _get_local(cache_key)
+        if value is not None:
+            return value
+        
+        try:
+            from services import redis
+            redis_client = await redis.get_client()
+            cached_data = await redis_client.get(cache_key)
+            if cached_data:
+                value = json.loads(cached_data)
+                _set_local(cache_key, value, LOCAL_CACHE_TTL_SECONDS)
+                return value
+        except Exception as e:
+            self._logger.warning(f"Redis cache error for {cache_key}: {e}")
+        
+        return None
+
+    async def _set_cached(self, cache_key: str, value: Any, ttl: int) -> None:
+        _set_local(cache_key, value, min(ttl, LOCAL_CACHE_TTL_SECONDS))
+        try:
+            from services import redis
+            redis_client = await redis.get_client()
+            await redis_client.setex(cache_key, ttl, json.dumps(value))
+        except Exception as e:
+            self._logger.warning(f"Failed to cache {cache_key}: {e}")
+
     async def search(self, query: SearchQuery, category: Optional[Category] = None, 
                     page: int = 1, limit: int = 20, cursor: Optional[PaginationCursor] = None) -> Dict[str, Any]:
         url = f"{self._http_client.base_url}/apps"
@@ -25,6 +86,18 @@ class PipedreamAppRepository:
         if cursor and cursor.value:
             params["after"] = cursor.value
         
+        params_digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:32]
+        cache_key = f"pipedream:search:{params_digest}"
+        cached = await self._get_cached(cache_key)
+        if cached is not None:
+            self._logger.debug(f"Found cached app search results for params: {params}")
+            return {
+                "success": True,
+                "apps": [self._map_cached_app_to_domain(app_data) for app_data in cached["apps"]],
+                "page_info": cached["page_info"],
+                "total_count": cached["total_count"]
+            }
+        
         try:
             data = await self._http_client.get(url, params=params)
             apps = []
@@ -41,6 +114,12 @@ class PipedreamAppRepository:
             
             self._logger.info(f"Found {len(apps)} apps from search")
             
+            await self._set_cached(cache_key, {
+                "apps": [self._map_domain_app_to_cache(app) for app in apps],
+                "page_info": page_info,
+                "total_count": page_info.get("total_count", 0)
+            }, config.PIPEDREAM_APP_CACHE_TTL_SECONDS)
+            
             return {
                 "success": True,
                 "apps": apps,
@@ -103,40 +182,21 @@ class PipedreamAppRepository:
                 return None
 
     async def get_icon_url(self, app_slug: AppSlug) -> Optional[str]:
-        url = f"{self._http_client.base_url}/apps"
-        params = {"q": app_slug.value, "pageSize": 20}
+        app = await self.get_by_slug(app_slug)
         
-        try:
-            data = await self._http_client.get(url, params=params)
-            
-            apps = data.get("data", [])
-            exact_match = next((app for app in apps if app.get("name_slug") == app_slug.value), None)
-            
-            if exact_match:
-                icon_url = exact_match.get("img_src")
-                self._logger.info(f"Found icon for {app_slug.value}: {icon_url}")
-                return icon_url
-            
-            self._logger.warning(f"No app found with slug: {app_slug.value}")
-            return None
-            
-        except Exception as e:
-            self._logger.error(f"Error getting icon for app {app_slug.value}: {str(e)}")
-            return None
+        if app:
+            self._logger.info(f"Found icon for {app_slug.value}: {app.logo_url}")
+            return app.logo_url
+        
+        self._logger.warning(f"No app found with slug: {app_slug.value}")
+        return None
 
     async def get_popular(self, category: Optional[Category] = None, limit: int = 100) -> List[App]:
         cache_key = f"pipedream:popular_apps:{category.value if category else 'all'}:{limit}"
-        try:
-            from services import redis
-            redis_client = await redis.get_client()
-            cached_data = await redis_client.get(cache_key)
-            
-            if cached_data:
-                self._logger.info(f"Found cached popular apps for category: {category.value if category else 'all'}")
-                cached_apps_data = json.loads(cached_data)
-                return [self._map_cached_app_to_domain(app_data) for app_data in cached_apps_data]
-        except Exception as e:
-            self._logger.warning(f"Redis cache error for popular apps: {e}")
+        cached_apps_data = await self._get_cached(cache_key)
+        if cached_apps_data is not None:
+            self._logger.debug(f"Found cached popular apps for category: {category.value if category else 'all'}")
+            return [self._map_cached_app_to_domain(app_data) for app_data in cached_apps_data]
         
         popular_slugs = [
             "slack", "microsoft_teams", "discord", "zoom", "telegram_bot_api", "whatsapp",
@@ -208,14 +268,9 @@ class PipedreamAppRepository:
             if len(apps) >= limit:
                 break
         
-        try:
-            from services import redis
-            redis_client = await redis.get_client()
-            apps_data = [self._map_domain_app_to_cache(app) for app in apps]
-            await redis_client.setex(cache_key, 86400, json.dumps(apps_data))
-            self._logger.info(f"Cached {len(apps)} popular apps for category: {category.value if category else 'all'}")
-        except Exception as e:
-            self._logger.warning(f"Failed to cache popular apps: {e}")
+        apps_data = [self._map_domain_app_to_cache(app) for app in apps]
+        await self._set_cached(cache_key, apps_data, 86400)
+        self._logger.info(f"Cached {len(apps)} popular apps for category: {category.value if category else 'all'}")
         
         return apps
 
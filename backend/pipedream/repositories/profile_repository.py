@@ -3,6 +3,8 @@ from uuid import UUID
 import json
 from datetime import datetime
 
+from utils.credential_cache import DecryptedConfigCache, decrypted_config_cache
+
 from ..protocols import ProfileRepository, DatabaseConnection, EncryptionService, Logger
 from ..domain.entities import Profile
 from ..domain.value_objects import ExternalUserId, AppSlug, ProfileName, EncryptedConfig, ConfigHash
@@ -10,10 +12,17 @@ from ..domain.exceptions import DatabaseException, ProfileNotFoundError
 
 
 class SupabaseProfileRepository:
-    def __init__(self, db: DatabaseConnection, encryption_service: EncryptionService, logger: Logger):
+    def __init__(
+        self,
+        db: DatabaseConnection,
+        encryption_service: EncryptionService,
+        logger: Logger,
+        config_cache: Optional[DecryptedConfigCache] = None
+    ):
         self._db = db
         self._encryption_service = encryption_service
         self._logger = logger
+        self._config_cache = config_cache or decrypted_config_cache
 
     async def create(self, profile: Profile) -> Profile:
         try:
@@ -68,8 +77,7 @@ class SupabaseProfileRepository:
             if result.data:
                 profile_data = result.data
                 self._logger.debug(f"Found profile: {profile_data.get('profile_name', 'unknown')}")
-                decrypted_config = self._encryption_service.decrypt(profile_data['encrypted_config'])
-                config = json.loads(decrypted_config)
+                config = self._decrypt_config(profile_data)
                 return self._map_to_domain(profile_data, config)
             
             self._logger.warning(f"Profile {profile_id} not found for user {account_id}")
@@ -114,8 +122,7 @@ class SupabaseProfileRepository:
                 else:
                     profile_data = next((p for p in result.data if p.get('is_default')), result.data[0])
                 
-                decrypted_config = self._encryption_service.decrypt(profile_data['encrypted_config'])
-                config = json.loads(decrypted_config)
+                config = self._decrypt_config(profile_data)
                 return self._map_to_domain(profile_data, config)
             
             return None
@@ -146,8 +153,7 @@ class SupabaseProfileRepository:
             profiles = []
             for profile_data in result.data:
                 try:
-                    decrypted_config = self._encryption_service.decrypt(profile_data['encrypted_config'])
-                    config = json.loads(decrypted_config)
+                    config = self._decrypt_config(profile_data)
                     profile = self._map_to_domain(profile_data, config)
                     profiles.append(profile)
                 except Exception as e:
@@ -188,6 +194,7 @@ class SupabaseProfileRepository:
                 'last_used_at': profile.last_used_at.isoformat() if profile.last_used_at else None
             }).eq('profile_id', str(profile.profile_id)).execute()
             
+            self._config_cache.evict(str(profile.profile_id))
             if result.data:
                 return self._map_to_domain(result.data[0], config)
             
@@ -205,6 +212,7 @@ class SupabaseProfileRepository:
                 'profile_id', str(profile_id)
             ).eq('account_id', str(account_id)).execute()
             
+            self._config_cache.evict(str(profile_id))
             return len(result.data) > 0
             
         except Exception as e:
@@ -227,6 +235,18 @@ class SupabaseProfileRepository:
             self._logger.error(f"Error setting default profile: {str(e)}")
             raise DatabaseException("set_default", str(e))
 
+    def _decrypt_config(self, profile_data: dict) -> dict:
+        profile_id = profile_data['profile_id']
+        config_hash = profile_data['config_hash']
+        
+        config = self._config_cache.get(profile_id, config_hash)
+        if config is None:
+            decrypted_config = self._encryption_service.decrypt(profile_data['encrypted_config'])
+            config = json.loads(decrypted_config)
+            self._config_cache.set(profile_id, config_hash, config)
+        
+        return config
+
     def _map_to_domain(self, profile_data: dict, config: dict) -> Profile:
         return Profile(
             profile_id=UUID(profile_data['profile_id']),
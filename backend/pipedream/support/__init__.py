@@ -1,4 +1,4 @@
-from .http_client import HttpClient
+from .http_client import HttpClient, get_http_client, close_http_client
 from .encryption_service import EncryptionService
 
-__all__ = ["HttpClient", "EncryptionService"] 
\ No newline at end of file
+__all__ = ["HttpClient", "get_http_client", "close_http_client", "EncryptionService"] 
\ No newline at end of file
@@ -1,35 +1,161 @@
 import os
+import json
+import time
+import asyncio
+import uuid
 import httpx
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
+from utils.config import config
+from utils.logger import logger
 from ..domain.exceptions import HttpClientException, AuthenticationException, RateLimitException
 
+# Shared across every worker process so only one of them talks to /oauth/token
+TOKEN_CACHE_KEY = "pipedream:oauth:access_token"
+TOKEN_REFRESH_LOCK_KEY = "pipedream:oauth:refresh_lock"
+TOKEN_REFRESH_LOCK_TTL = 30
+TOKEN_REFRESH_WAIT_SECONDS = 5.0
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=5)
+
 
 class HttpClient:
-    def __init__(self):
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None
+    ):
         self.base_url = "https://api.pipedream.com/v1"
         self.session: Optional[httpx.AsyncClient] = None
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
         self.rate_limit_token: Optional[str] = None
-        
+        self._limits = httpx.Limits(
+            max_connections=max_connections or config.PIPEDREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or config.PIPEDREAM_MAX_KEEPALIVE_CONNECTIONS
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+    
+    async def _bind_to_running_loop(self) -> None:
+        # The client is shared process-wide, but httpx sessions and asyncio locks
+        # belong to one event loop. Workers that spin up a fresh loop per task get
+        # their own session instead of reusing one bound to a closed loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            old_loop, old_session = self._loop, self.session
+            self._loop = loop
+            self._refresh_lock = asyncio.Lock()
+            self.session = None
+            if old_session is not None and not old_session.is_closed:
+                await self._close_stale_session(old_session, old_loop)
+    
+    async def _close_stale_session(self, session: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        if loop is not None and loop.is_running():
+            # Its connections belong to a loop still running in another thread
+            asyncio.run_coroutine_threadsafe(session.aclose(), loop)
+            return
+        try:
+            await session.aclose()
+        except Exception as e:
+            # Connections bound to a closed loop can't be shut down cleanly; they
+            # are released when the session is garbage collected
+            logger.debug(f"Failed to close stale Pipedream session: {e}")
+    
     async def _get_session(self) -> httpx.AsyncClient:
+        await self._bind_to_running_loop()
         if self.session is None or self.session.is_closed:
             self.session = httpx.AsyncClient(
                 timeout=httpx.Timeout(30.0),
+                limits=self._limits,
                 headers={"User-Agent": "Suna-Pipedream-Client/1.0"}
             )
         return self.session
     
-    async def _ensure_access_token(self) -> str:
+    def _has_valid_token(self) -> bool:
         if self.access_token and self.token_expires_at:
-            if datetime.utcnow() < (self.token_expires_at - timedelta(minutes=5)):
+            return datetime.utcnow() < (self.token_expires_at - TOKEN_EXPIRY_MARGIN)
+        return False
+    
+    async def _ensure_access_token(self) -> str:
+        if self._has_valid_token():
+            return self.access_token
+        
+        await self._bind_to_running_loop()
+        async with self._refresh_lock:
+            # Another coroutine may have refreshed while we waited on the lock
+            if self._has_valid_token():
                 return self.access_token
-            else:
-                self.access_token = None
-                self.token_expires_at = None
+            
+            self.access_token = None
+            self.token_expires_at = None
+            
+            if await self._load_shared_token():
+                return self.access_token
+            
+            return await self._refresh_shared_token()
+    
+    async def _load_shared_token(self) -> bool:
+        try:
+            from services import redis
+            cached = await redis.get(TOKEN_CACHE_KEY)
+            if not cached:
+                return False
+            
+            data = json.loads(cached)
+            self.access_token = data["access_token"]
+            self.token_expires_at = datetime.utcfromtimestamp(data["expires_at"])
+            return self._has_valid_token()
+        except Exception as e:
+            logger.warning(f"Failed to read shared Pipedream token: {e}")
+            return False
+    
+    async def _store_shared_token(self) -> None:
+        try:
+            from services import redis
+            ttl = int((self.token_expires_at - TOKEN_EXPIRY_MARGIN - datetime.utcnow()).total_seconds())
+            if ttl <= 0:
+                return
+            payload = json.dumps({
+                "access_token": self.access_token,
+                "expires_at": (self.token_expires_at - datetime(1970, 1, 1)).total_seconds()
+            })
+            await redis.set(TOKEN_CACHE_KEY, payload, ex=ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store shared Pipedream token: {e}")
+    
+    async def _refresh_shared_token(self) -> str:
+        lock_acquired = False
+        lock_token = uuid.uuid4().hex
+        try:
+            from services import redis
+            lock_acquired = await redis.set(
+                TOKEN_REFRESH_LOCK_KEY, lock_token, ex=TOKEN_REFRESH_LOCK_TTL, nx=True
+            )
+        except Exception as e:
+            logger.warning(f"Failed to acquire Pipedream token refresh lock: {e}")
+            return await self._fetch_fresh_token()
         
-        return await self._fetch_fresh_token()
+        if not lock_acquired:
+            # Another worker is refreshing; wait for it to publish the token
+            deadline = time.monotonic() + TOKEN_REFRESH_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.2)
+                if await self._load_shared_token():
+                    return self.access_token
+            logger.warning("Timed out waiting for shared Pipedream token, fetching directly")
+            return await self._fetch_fresh_token()
+        
+        try:
+            token = await self._fetch_fresh_token()
+            await self._store_shared_token()
+            return token
+        finally:
+            try:
+                from services import redis
+                # The lock may have expired and been taken by another worker mid-refresh
+                await redis.delete_if_equals(TOKEN_REFRESH_LOCK_KEY, lock_token)
+            except Exception as e:
+                logger.warning(f"Failed to release Pipedream token refresh lock: {e}")
     
     async def _fetch_fresh_token(self) -> str:
         project_id = os.getenv("PIPEDREAM_PROJECT_ID")
@@ -60,22 +186,34 @@ class HttpClient:
             self.token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
             
             return self.access_token
-            
+        
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 raise RateLimitException()
             raise AuthenticationException(f"Failed to obtain access token: {e}")
     
     async def _invalidate_token(self):
-        """Invalidate the current access token"""
+        """Invalidate the current access token locally and in the shared cache"""
+        rejected_token = self.access_token
         self.access_token = None
         self.token_expires_at = None
+        
+        if not rejected_token:
+            return
+        try:
+            from services import redis
+            cached = await redis.get(TOKEN_CACHE_KEY)
+            # Only drop the shared token if nobody has replaced it yet
+            if cached and json.loads(cached).get("access_token") == rejected_token:
+                await redis.delete(TOKEN_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate shared Pipedream token: {e}")
     
     async def get(self, url: str, headers: Dict[str, str] = None, params: Dict[str, Any] = None) -> Dict[str, Any]:
         return await self._make_request("GET", url, headers=headers, params=params)
     
-    async def _make_request(self, method: str, url: str, headers: Dict[str, str] = None, 
-                           params: Dict[str, Any] = None, json: Dict[str, Any] = None, 
+    async def _make_request(self, method: str, url: str, headers: Dict[str, str] = None,
+                           params: Dict[str, Any] = None, json: Dict[str, Any] = None,
                            retry_count: int = 0) -> Dict[str, Any]:
         """Make HTTP request with automatic token refresh on 401 errors"""
         session = await self._get_session()
@@ -102,14 +240,14 @@ class HttpClient:
             
             response.raise_for_status()
             return response.json()
-            
+        
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 raise RateLimitException()
             elif e.response.status_code == 401 and retry_count < 1:
                 # Token might be expired, invalidate it and retry once
                 await self._invalidate_token()
-                return await self._make_request(method, url, headers=headers, params=params, 
+                return await self._make_request(method, url, headers=headers, params=params,
                                               json=json, retry_count=retry_count + 1)
             else:
                 raise HttpClientException(url, e.response.status_code, str(e))
@@ -119,4 +257,22 @@ class HttpClient:
     
     async def close(self) -> None:
         if self.session and not self.session.is_closed:
-            await self.session.aclose() 
\ No newline at end of file
+            await self.session.aclose()
+
+
+_shared_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide Pipedream client shared by every facade and service."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClient()
+    return _shared_client
+
+
+async def close_http_client() -> None:
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
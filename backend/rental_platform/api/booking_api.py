@@ -1,5 +1,5 @@
-from typing import List, Optional
-from datetime import datetime, date
+from typing import List, Optional, Dict
+from datetime import datetime, date, time
 from fastapi import APIRouter, HTTPException, Depends, Query, Path, status
 from fastapi.responses import JSONResponse
 
@@ -450,6 +450,35 @@ async def get_agent_viewings(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+@router.get("/agents/available-slots", response_model=Dict[str, Dict[date, List[datetime]]], summary="Get available viewing slots for many agents")
+async def get_available_viewing_slots_batch(
+    agent_ids: List[str] = Query(..., description="Agent IDs to check"),
+    date_from: date = Query(..., description="First date to check"),
+    date_to: date = Query(..., description="Last date to check (inclusive)"),
+    duration_minutes: int = Query(30, ge=15, le=120, description="Duration of viewing in minutes"),
+    day_start: time = Query(time(9, 0), description="Start of working hours"),
+    day_end: time = Query(time(18, 0), description="Last slot start of working hours"),
+    slot_interval_minutes: int = Query(30, ge=5, le=120, description="Minutes between slot starts"),
+    booking_service: BookingService = Depends(get_booking_service),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get available viewing slots for several agents over a date range in one call.
+    
+    Returns slots keyed by agent ID and date, e.g. a week-long calendar for a whole team.
+    """
+    if len(agent_ids) > 100:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At most 100 agents per request")
+    if date_to < date_from or (date_to - date_from).days > 62:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Date range must be between 1 and 63 days")
+    try:
+        return await booking_service.get_available_viewing_slots_batch(
+            agent_ids, date_from, date_to, duration_minutes,
+            day_start, day_end, slot_interval_minutes
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @router.get("/agents/{agent_id}/available-slots", response_model=List[datetime], summary="Get available viewing slots")
 async def get_available_viewing_slots(
     agent_id: str = Path(..., description="Agent ID"),
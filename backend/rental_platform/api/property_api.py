@@ -370,4 +370,40 @@ async def check_property_availability(
         is_available = await property_service.check_property_available(property_id, check_date)
         return {"property_id": property_id, "date": check_date, "is_available": is_available}
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/{property_id}/free", response_model=dict, summary="Check property availability for a stay")
+async def check_property_free(
+    property_id: str = Path(..., description="Property ID"),
+    date_from: date = Query(..., description="First night of the stay"),
+    date_to: date = Query(..., description="Check-out date (not included)"),
+    property_service: PropertyService = Depends(get_property_service)
+):
+    """
+    Check if a property is free for every night between two dates.
+    
+    Considers both pending/confirmed bookings and blocked availability periods.
+    """
+    if date_to <= date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_to must be after date_from")
+    try:
+        is_free = await property_service.is_property_free(property_id, date_from, date_to)
+        return {"property_id": property_id, "date_from": date_from, "date_to": date_to, "is_free": is_free}
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/{property_id}/free-nights", response_model=dict, summary="Get free nights in a month")
+async def get_free_nights(
+    property_id: str = Path(..., description="Property ID"),
+    year: int = Query(..., ge=2000, le=2100, description="Calendar year"),
+    month: int = Query(..., ge=1, le=12, description="Calendar month (1-12)"),
+    property_service: PropertyService = Depends(get_property_service)
+):
+    """
+    Get every night in a month that is neither booked nor blocked, for calendar views.
+    """
+    try:
+        nights = await property_service.get_free_nights(property_id, year, month)
+        return {"property_id": property_id, "year": year, "month": month, "free_nights": nights}
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
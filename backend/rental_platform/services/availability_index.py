@@ -0,0 +1,266 @@
+import asyncio
+import bisect
+import calendar
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from supabase import AsyncClient
+
+# Bookings in these states hold their nights; anything else releases them
+BLOCKING_BOOKING_STATUSES = ('pending', 'confirmed')
+
+# Other workers write bookings and availability blocks too, so a loaded index is
+# only trusted for reads (search, calendars) for this long before it is reloaded.
+# Reservations never rely on it alone: the exclusion constraint on booking_requests
+# guards bookings and reserve() re-reads the blocks for the requested dates.
+INDEX_TTL_SECONDS = 60
+INDEX_MAX_ENTRIES = 1024
+
+
+class DateIntervalIndex:
+    """Sorted half-open [start, end) date intervals with a running max of end dates.
+
+    Overlap queries binary-search the intervals starting before the query end and
+    compare the running max end against the query start, so "is anything blocking
+    [a, b)" is O(log n) instead of a scan over every booking.
+    """
+
+    def __init__(self):
+        self._starts: List[date] = []
+        self._intervals: List[Tuple[date, date, str]] = []
+        self._max_ends: List[date] = []
+        self._keys: Dict[str, Tuple[date, date]] = {}
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def add(self, key: str, start: date, end: date) -> None:
+        if key in self._keys:
+            self.remove(key)
+        if end <= start:
+            return
+
+        position = bisect.bisect_right(self._starts, start)
+        self._starts.insert(position, start)
+        self._intervals.insert(position, (start, end, key))
+        self._keys[key] = (start, end)
+        self._rebuild_max_ends(position)
+
+    def remove(self, key: str) -> None:
+        span = self._keys.pop(key, None)
+        if span is None:
+            return
+
+        position = bisect.bisect_left(self._starts, span[0])
+        while position < len(self._intervals) and self._intervals[position][2] != key:
+            position += 1
+        if position < len(self._intervals):
+            del self._starts[position]
+            del self._intervals[position]
+            self._rebuild_max_ends(position)
+
+    def overlaps(self, start: date, end: date) -> bool:
+        candidates = bisect.bisect_left(self._starts, end)
+        return candidates > 0 and self._max_ends[candidates - 1] > start
+
+    def overlapping(self, start: date, end: date) -> List[Tuple[date, date, str]]:
+        candidates = bisect.bisect_left(self._starts, end)
+        return [interval for interval in self._intervals[:candidates] if interval[1] > start]
+
+    def _rebuild_max_ends(self, position: int) -> None:
+        del self._max_ends[position:]
+        running = self._max_ends[-1] if self._max_ends else date.min
+        for interval_start, interval_end, _ in self._intervals[position:]:
+            running = max(running, interval_end)
+            self._max_ends.append(running)
+
+
+@dataclass
+class PropertyAvailabilityIndex:
+    """Nights taken by bookings and nights blocked by availability records for one property"""
+    property_id: str
+    bookings: DateIntervalIndex = field(default_factory=DateIntervalIndex)
+    blocks: DateIntervalIndex = field(default_factory=DateIntervalIndex)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def is_free(self, start: date, end: date) -> bool:
+        return not self.bookings.overlaps(start, end) and not self.blocks.overlaps(start, end)
+
+    def free_nights(self, start: date, end: date) -> List[date]:
+        taken = set()
+        for index in (self.bookings, self.blocks):
+            for interval_start, interval_end, _ in index.overlapping(start, end):
+                night = max(interval_start, start)
+                last = min(interval_end, end)
+                while night < last:
+                    taken.add(night)
+                    night += timedelta(days=1)
+
+        nights = []
+        night = start
+        while night < end:
+            if night not in taken:
+                nights.append(night)
+            night += timedelta(days=1)
+        return nights
+
+
+def _parse_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+class AvailabilityIndexManager:
+    """Process-wide, lazily loaded availability indexes keyed by property_id"""
+
+    def __init__(self, ttl_seconds: int = INDEX_TTL_SECONDS, max_entries: int = INDEX_MAX_ENTRIES):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._indexes: "OrderedDict[str, PropertyAvailabilityIndex]" = OrderedDict()
+        # Per-property locks with the number of tasks holding or waiting on each;
+        # a lock is dropped once nobody uses it, so only busy properties have one
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def _property_lock(self, property_id: str) -> AsyncIterator[None]:
+        lock = self._locks.get(property_id)
+        if lock is None:
+            lock = self._locks[property_id] = asyncio.Lock()
+        self._lock_users[property_id] = self._lock_users.get(property_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            remaining = self._lock_users[property_id] - 1
+            if remaining:
+                self._lock_users[property_id] = remaining
+            else:
+                del self._lock_users[property_id]
+                del self._locks[property_id]
+
+    def _store(self, property_id: str, index: PropertyAvailabilityIndex) -> None:
+        self._indexes[property_id] = index
+        self._indexes.move_to_end(property_id)
+        while len(self._indexes) > self._max_entries:
+            self._indexes.popitem(last=False)
+
+    def _is_fresh(self, index: Optional[PropertyAvailabilityIndex]) -> bool:
+        return index is not None and (time.monotonic() - index.loaded_at) < self._ttl_seconds
+
+    async def get(self, supabase: AsyncClient, property_id: str) -> PropertyAvailabilityIndex:
+        """Return the property's index, loading it from the database on first use or after the TTL"""
+        index = self._indexes.get(property_id)
+        if self._is_fresh(index):
+            self._indexes.move_to_end(property_id)
+            return index
+
+        async with self._property_lock(property_id):
+            index = self._indexes.get(property_id)
+            if self._is_fresh(index):
+                return index
+            index = await self._load(supabase, property_id)
+            self._store(property_id, index)
+            return index
+
+    async def _load(self, supabase: AsyncClient, property_id: str) -> PropertyAvailabilityIndex:
+        today = date.today().isoformat()
+        bookings_result, blocks_result = await asyncio.gather(
+            supabase.table('booking_requests').select('id, check_in_date, check_out_date').eq('property_id', property_id).in_('booking_status', list(BLOCKING_BOOKING_STATUSES)).gt('check_out_date', today).execute(),
+            supabase.table('property_availability').select('id, available_from, available_to').eq('property_id', property_id).eq('is_available', False).execute()
+        )
+
+        index = PropertyAvailabilityIndex(property_id=property_id)
+        for booking in bookings_result.data or []:
+            index.bookings.add(booking['id'], _parse_date(booking['check_in_date']), _parse_date(booking['check_out_date']))
+        for block in blocks_result.data or []:
+            self._add_block(index, block)
+        return index
+
+    @staticmethod
+    def _add_block(index: PropertyAvailabilityIndex, row: dict) -> None:
+        # available_to is inclusive and may be open-ended
+        block_end = _parse_date(row['available_to']) + timedelta(days=1) if row.get('available_to') else date.max
+        index.blocks.add(row['id'], _parse_date(row['available_from']), block_end)
+
+    async def is_free(self, supabase: AsyncClient, property_id: str, start: date, end: date) -> bool:
+        """Whether every night in [start, end) is neither booked nor blocked"""
+        index = await self.get(supabase, property_id)
+        return index.is_free(start, end)
+
+    async def free_nights_in_month(self, supabase: AsyncClient, property_id: str, year: int, month: int) -> List[date]:
+        index = await self.get(supabase, property_id)
+        first = date(year, month, 1)
+        last = first + timedelta(days=calendar.monthrange(year, month)[1])
+        return index.free_nights(first, last)
+
+    @asynccontextmanager
+    async def reserve(self, supabase: AsyncClient, property_id: str, start: date, end: date) -> AsyncIterator[PropertyAvailabilityIndex]:
+        """Hold the property's reservation lock while the caller inserts a booking.
+
+        Raises ValueError if [start, end) is not free. Bookings are checked against the
+        index (the exclusion constraint catches what it misses) and blocks against the
+        database. Concurrent reservations for the same property in this process are
+        serialized, so two requests cannot both pass the check before either booking is
+        written.
+        """
+        index = await self.get(supabase, property_id)
+        async with self._property_lock(property_id):
+            index = self._indexes.get(property_id, index)
+            if await self._refresh_blocks(supabase, index, start, end):
+                raise ValueError("Property is not available for selected dates")
+            if index.bookings.overlaps(start, end):
+                raise ValueError("Property has conflicting bookings for selected dates")
+            yield index
+
+    async def _refresh_blocks(self, supabase: AsyncClient, index: PropertyAvailabilityIndex, start: date, end: date) -> bool:
+        """Re-read the blocks overlapping [start, end) into the index; returns whether any exist.
+
+        Blocks have no database constraint behind them, so a reservation checks them
+        against the database rather than an index another process may have outdated.
+        """
+        result = await supabase.table('property_availability').select('id, available_from, available_to').eq('property_id', index.property_id).eq('is_available', False).lt('available_from', end.isoformat()).or_(f'available_to.is.null,available_to.gte.{start.isoformat()}').execute()
+        rows = result.data or []
+
+        current = {row['id'] for row in rows}
+        for _, _, key in index.blocks.overlapping(start, end):
+            if key not in current:
+                index.blocks.remove(key)
+        for row in rows:
+            self._add_block(index, row)
+        return bool(rows)
+
+    def record_booking(self, booking: dict) -> None:
+        """Apply a booking row after it is written; non-blocking statuses release its nights"""
+        index = self._indexes.get(str(booking.get('property_id')))
+        if index is None:
+            return
+
+        status = booking.get('booking_status')
+        status = getattr(status, 'value', status)
+        if status in BLOCKING_BOOKING_STATUSES and booking.get('check_in_date') and booking.get('check_out_date'):
+            index.bookings.add(booking['id'], _parse_date(booking['check_in_date']), _parse_date(booking['check_out_date']))
+        else:
+            index.bookings.remove(booking['id'])
+
+    def record_availability(self, availability: dict) -> None:
+        index = self._indexes.get(str(availability.get('property_id')))
+        if index is None:
+            return
+
+        if availability.get('is_available', True):
+            index.blocks.remove(availability['id'])
+        else:
+            self._add_block(index, availability)
+
+    def invalidate(self, property_id: Optional[str] = None) -> None:
+        if property_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(property_id, None)
+
+
+availability_index = AvailabilityIndexManager()
@@ -1,7 +1,9 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime, date, timedelta
+import asyncio
+import bisect
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, date, time, timedelta, timezone
 from decimal import Decimal
-from supabase import Client
+from supabase import AsyncClient
 
 from ..models.booking_models import (
     BookingRequest, BookingRequestCreate, BookingRequestUpdate,
@@ -12,9 +14,17 @@ from ..models.booking_models import (
     BookingSearchResult, ApplicationSearchResult
 )
 from ..models.property_models import PropertyType
+from .availability_index import availability_index
+
+# Exclusion constraint that rejects overlapping pending/confirmed bookings
+BOOKING_OVERLAP_CONSTRAINT = 'excl_booking_requests_no_overlap'
+
+# Default working hours for viewing slots
+DEFAULT_VIEWING_DAY_START = time(9, 0)
+DEFAULT_VIEWING_DAY_END = time(18, 0)
 
 class BookingService:
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         self.supabase = supabase_client
 
     # ========================================================================
@@ -24,9 +34,17 @@ class BookingService:
     async def create_booking_request(self, booking_data: BookingRequestCreate, guest_id: str) -> BookingRequest:
         """Create a new booking request for short-term rental"""
         try:
-            # Verify property exists and is short-term rental
-            property_result = self.supabase.table('properties').select('id, property_type, price_per_night').eq('id', booking_data.property_id).single().execute()
+            # The property and fee lookups and the availability index load are
+            # independent, so issue them together instead of sequentially. The fee
+            # row is optional (and absent for long-term properties), so it must not
+            # raise before the property type is checked.
+            property_result, short_term_result, _ = await asyncio.gather(
+                self.supabase.table('properties').select('id, property_type, price_per_night').eq('id', booking_data.property_id).single().execute(),
+                self.supabase.table('short_term_rentals').select('cleaning_fee, security_deposit, extra_guest_fee, pet_fee').eq('property_id', booking_data.property_id).maybe_single().execute(),
+                availability_index.get(self.supabase, booking_data.property_id)
+            )
             
+            # Verify property exists and is short-term rental
             if not property_result.data:
                 raise Exception("Property not found")
             
@@ -34,27 +52,12 @@ class BookingService:
             if property['property_type'] != 'short_term':
                 raise Exception("Property is not available for short-term bookings")
             
-            # Check property availability for requested dates
-            availability_result = self.supabase.table('property_availability').select('is_available').eq('property_id', booking_data.property_id).lte('available_from', booking_data.check_in_date.isoformat()).gte('available_to', booking_data.check_out_date.isoformat()).execute()
-            
-            if availability_result.data and not all(avail['is_available'] for avail in availability_result.data):
-                raise Exception("Property is not available for selected dates")
-            
-            # Check for existing bookings that conflict
-            existing_bookings = self.supabase.table('booking_requests').select('id').eq('property_id', booking_data.property_id).in_('booking_status', ['pending', 'confirmed']).or_(f'check_in_date.lte.{booking_data.check_out_date.isoformat()},check_out_date.gte.{booking_data.check_in_date.isoformat()}').execute()
-            
-            if existing_bookings.data:
-                raise Exception("Property has conflicting bookings for selected dates")
-            
             # Calculate total amount
             nights = (booking_data.check_out_date - booking_data.check_in_date).days
             base_amount = Decimal(str(property['price_per_night'])) * nights
             
-            # Get short-term rental details for fees
-            short_term_result = self.supabase.table('short_term_rentals').select('cleaning_fee, security_deposit, extra_guest_fee, pet_fee').eq('property_id', booking_data.property_id).single().execute()
-            
             total_amount = base_amount
-            if short_term_result.data:
+            if short_term_result and short_term_result.data:
                 fees = short_term_result.data
                 if fees.get('cleaning_fee'):
                     total_amount += Decimal(str(fees['cleaning_fee']))
@@ -72,7 +75,24 @@ class BookingService:
                 'check_out_date': booking_data.check_out_date.isoformat()
             })
             
-            result = self.supabase.table('booking_requests').insert(booking_dict).execute()
+            # Check availability and conflicting bookings from the in-memory index and
+            # insert while holding the property's reservation lock
+            try:
+                async with availability_index.reserve(
+                    self.supabase, booking_data.property_id,
+                    booking_data.check_in_date, booking_data.check_out_date
+                ):
+                    result = await self.supabase.table('booking_requests').insert(booking_dict).execute()
+                    if result.data:
+                        availability_index.record_booking(result.data[0])
+            except ValueError as e:
+                raise Exception(str(e))
+            except Exception as e:
+                # Another worker reserved the same nights first (exclusion constraint)
+                if BOOKING_OVERLAP_CONSTRAINT in str(e):
+                    availability_index.invalidate(booking_data.property_id)
+                    raise Exception("Property has conflicting bookings for selected dates")
+                raise
             
             if result.data:
                 return BookingRequest(**result.data[0])
@@ -84,7 +104,7 @@ class BookingService:
     async def get_booking_request(self, booking_id: str) -> Optional[BookingRequest]:
         """Get booking request by ID"""
         try:
-            result = self.supabase.table('booking_requests').select('*').eq('id', booking_id).single().execute()
+            result = await self.supabase.table('booking_requests').select('*').eq('id', booking_id).single().execute()
             
             if result.data:
                 return BookingRequest(**result.data)
@@ -111,9 +131,10 @@ class BookingService:
                 elif update_dict['booking_status'] == BookingStatus.CANCELLED:
                     update_dict['cancelled_at'] = datetime.utcnow().isoformat()
             
-            result = self.supabase.table('booking_requests').update(update_dict).eq('id', booking_id).execute()
+            result = await self.supabase.table('booking_requests').update(update_dict).eq('id', booking_id).execute()
             
             if result.data:
+                availability_index.record_booking(result.data[0])
                 return BookingRequest(**result.data[0])
             return None
             
@@ -123,11 +144,13 @@ class BookingService:
     async def cancel_booking_request(self, booking_id: str) -> bool:
         """Cancel a booking request"""
         try:
-            result = self.supabase.table('booking_requests').update({
+            result = await self.supabase.table('booking_requests').update({
                 'booking_status': BookingStatus.CANCELLED,
                 'cancelled_at': datetime.utcnow().isoformat()
             }).eq('id', booking_id).execute()
             
+            for booking in result.data or []:
+                availability_index.record_booking(booking)
             return bool(result.data)
             
         except Exception as e:
@@ -160,7 +183,7 @@ class BookingService:
             # Apply pagination
             query = query.range(filters.offset, filters.offset + filters.limit - 1)
             
-            result = query.execute()
+            result = await query.execute()
             
             bookings = [BookingRequest(**booking) for booking in result.data] if result.data else []
             total_count = result.count or 0
@@ -178,7 +201,7 @@ class BookingService:
     async def get_bookings_by_guest(self, guest_id: str, limit: int = 20, offset: int = 0) -> List[BookingRequest]:
         """Get all bookings for a guest"""
         try:
-            result = self.supabase.table('booking_requests').select('*').eq('guest_id', guest_id).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
+            result = await self.supabase.table('booking_requests').select('*').eq('guest_id', guest_id).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
             
             return [BookingRequest(**booking) for booking in result.data] if result.data else []
             
@@ -188,7 +211,7 @@ class BookingService:
     async def get_bookings_by_property(self, property_id: str, limit: int = 20, offset: int = 0) -> List[BookingRequest]:
         """Get all bookings for a property"""
         try:
-            result = self.supabase.table('booking_requests').select('*').eq('property_id', property_id).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
+            result = await self.supabase.table('booking_requests').select('*').eq('property_id', property_id).range(offset, offset + limit - 1).order('created_at', desc=True).execute()
             
             return [BookingRequest(**booking) for booking in result.data] if result.data else []
             
@@ -202,9 +225,12 @@ class BookingService:
     async def create_rental_application(self, application_data: RentalApplicationCreate, applicant_id: str) -> RentalApplication:
         """Create a new rental application for long-term rental"""
         try:
-            # Verify property exists and is long-term rental
-            property_result = self.supabase.table('properties').select('id, property_type').eq('id', application_data.property_id).single().execute()
+            property_result, existing_application = await asyncio.gather(
+                self.supabase.table('properties').select('id, property_type').eq('id', application_data.property_id).single().execute(),
+                self.supabase.table('rental_applications').select('id').eq('property_id', application_data.property_id).eq('applicant_id', applicant_id).in_('application_status', ['submitted', 'under_review']).execute()
+            )
             
+            # Verify property exists and is long-term rental
             if not property_result.data:
                 raise Exception("Property not found")
             
@@ -212,8 +238,6 @@ class BookingService:
                 raise Exception("Property is not available for long-term rentals")
             
             # Check if user already has an active application for this property
-            existing_application = self.supabase.table('rental_applications').select('id').eq('property_id', application_data.property_id).eq('applicant_id', applicant_id).in_('application_status', ['submitted', 'under_review']).execute()
-            
             if existing_application.data:
                 raise Exception("You already have an active application for this property")
             
@@ -235,7 +259,7 @@ class BookingService:
             if 'move_in_date' in application_dict and application_dict['move_in_date']:
                 application_dict['move_in_date'] = application_dict['move_in_date'].isoformat()
             
-            result = self.supabase.table('rental_applications').insert(application_dict).execute()
+            result = await self.supabase.table('rental_applications').insert(application_dict).execute()
             
             if result.data:
                 return RentalApplication(**result.data[0])
@@ -247,7 +271,7 @@ class BookingService:
     async def get_rental_application(self, application_id: str) -> Optional[RentalApplication]:
         """Get rental application by ID"""
         try:
-            result = self.supabase.table('rental_applications').select('*').eq('id', application_id).single().execute()
+            result = await self.supabase.table('rental_applications').select('*').eq('id', application_id).single().execute()
             
             if result.data:
                 return RentalApplication(**result.data)
@@ -272,7 +296,7 @@ class BookingService:
             if 'move_in_date' in update_dict and update_dict['move_in_date']:
                 update_dict['move_in_date'] = update_dict['move_in_date'].isoformat()
             
-            result = self.supabase.table('rental_applications').update(update_dict).eq('id', application_id).execute()
+            result = await self.supabase.table('rental_applications').update(update_dict).eq('id', application_id).execute()
             
             if result.data:
                 return RentalApplication(**result.data[0])
@@ -304,7 +328,7 @@ class BookingService:
             # Apply pagination
             query = query.range(filters.offset, filters.offset + filters.limit - 1)
             
-            result = query.execute()
+            result = await query.execute()
             
             applications = [RentalApplication(**app) for app in result.data] if result.data else []
             total_count = result.count or 0
@@ -326,22 +350,23 @@ class BookingService:
     async def create_viewing_schedule(self, viewing_data: ViewingScheduleCreate) -> ViewingSchedule:
         """Create a new viewing schedule for property tour"""
         try:
-            # Verify property exists
-            property_result = self.supabase.table('properties').select('id').eq('id', viewing_data.property_id).single().execute()
+            property_result, agent_conflicts = await asyncio.gather(
+                self.supabase.table('properties').select('id').eq('id', viewing_data.property_id).single().execute(),
+                self.supabase.table('viewing_schedules').select('id').eq('agent_id', viewing_data.agent_id).eq('viewing_status', ViewingStatus.SCHEDULED).lte('scheduled_date', (viewing_data.scheduled_date + timedelta(minutes=viewing_data.duration_minutes)).isoformat()).gte('scheduled_date', (viewing_data.scheduled_date - timedelta(minutes=30)).isoformat()).execute()
+            )
             
+            # Verify property exists
             if not property_result.data:
                 raise Exception("Property not found")
             
             # Check if agent is available at the requested time
-            agent_conflicts = self.supabase.table('viewing_schedules').select('id').eq('agent_id', viewing_data.agent_id).eq('viewing_status', ViewingStatus.SCHEDULED).lte('scheduled_date', (viewing_data.scheduled_date + timedelta(minutes=viewing_data.duration_minutes)).isoformat()).gte('scheduled_date', (viewing_data.scheduled_date - timedelta(minutes=30)).isoformat()).execute()
-            
             if agent_conflicts.data:
                 raise Exception("Agent is not available at the requested time")
             
             viewing_dict = viewing_data.dict()
             viewing_dict['scheduled_date'] = viewing_data.scheduled_date.isoformat()
             
-            result = self.supabase.table('viewing_schedules').insert(viewing_dict).execute()
+            result = await self.supabase.table('viewing_schedules').insert(viewing_dict).execute()
             
             if result.data:
                 return ViewingSchedule(**result.data[0])
@@ -353,7 +378,7 @@ class BookingService:
     async def get_viewing_schedule(self, viewing_id: str) -> Optional[ViewingSchedule]:
         """Get viewing schedule by ID"""
         try:
-            result = self.supabase.table('viewing_schedules').select('*').eq('id', viewing_id).single().execute()
+            result = await self.supabase.table('viewing_schedules').select('*').eq('id', viewing_id).single().execute()
             
             if result.data:
                 return ViewingSchedule(**result.data)
@@ -378,7 +403,7 @@ class BookingService:
                 elif update_dict['viewing_status'] == ViewingStatus.CANCELLED:
                     update_dict['cancelled_at'] = datetime.utcnow().isoformat()
             
-            result = self.supabase.table('viewing_schedules').update(update_dict).eq('id', viewing_id).execute()
+            result = await self.supabase.table('viewing_schedules').update(update_dict).eq('id', viewing_id).execute()
             
             if result.data:
                 return ViewingSchedule(**result.data[0])
@@ -390,7 +415,7 @@ class BookingService:
     async def get_viewings_by_property(self, property_id: str, limit: int = 20, offset: int = 0) -> List[ViewingSchedule]:
         """Get all viewing schedules for a property"""
         try:
-            result = self.supabase.table('viewing_schedules').select('*').eq('property_id', property_id).range(offset, offset + limit - 1).order('scheduled_date', desc=False).execute()
+            result = await self.supabase.table('viewing_schedules').select('*').eq('property_id', property_id).range(offset, offset + limit - 1).order('scheduled_date', desc=False).execute()
             
             return [ViewingSchedule(**viewing) for viewing in result.data] if result.data else []
             
@@ -407,7 +432,7 @@ class BookingService:
             if date_to:
                 query = query.lte('scheduled_date', date_to.isoformat())
             
-            result = query.range(offset, offset + limit - 1).order('scheduled_date', desc=False).execute()
+            result = await query.range(offset, offset + limit - 1).order('scheduled_date', desc=False).execute()
             
             return [ViewingSchedule(**viewing) for viewing in result.data] if result.data else []
             
@@ -417,37 +442,98 @@ class BookingService:
     async def get_available_viewing_slots(self, agent_id: str, date: date, duration_minutes: int = 30) -> List[datetime]:
         """Get available viewing time slots for an agent on a specific date"""
         try:
-            # Get existing scheduled viewings for the date
-            start_of_day = datetime.combine(date, datetime.min.time())
-            end_of_day = datetime.combine(date, datetime.max.time())
-            
-            existing_viewings = self.supabase.table('viewing_schedules').select('scheduled_date, duration_minutes').eq('agent_id', agent_id).eq('viewing_status', ViewingStatus.SCHEDULED).gte('scheduled_date', start_of_day.isoformat()).lte('scheduled_date', end_of_day.isoformat()).execute()
-            
-            # Generate available slots (9 AM to 6 PM, excluding existing bookings)
-            available_slots = []
-            current_time = datetime.combine(date, datetime.strptime('09:00', '%H:%M').time())
-            end_time = datetime.combine(date, datetime.strptime('18:00', '%H:%M').time())
-            
-            while current_time <= end_time:
-                slot_end = current_time + timedelta(minutes=duration_minutes)
-                
-                # Check if this slot conflicts with existing viewings
-                conflicts = False
-                if existing_viewings.data:
-                    for viewing in existing_viewings.data:
-                        viewing_start = datetime.fromisoformat(viewing['scheduled_date'].replace('Z', '+00:00'))
-                        viewing_end = viewing_start + timedelta(minutes=viewing['duration_minutes'])
-                        
-                        if (current_time < viewing_end and slot_end > viewing_start):
-                            conflicts = True
-                            break
-                
-                if not conflicts:
-                    available_slots.append(current_time)
-                
-                current_time += timedelta(minutes=30)  # 30-minute intervals
-            
-            return available_slots
+            slots = await self.get_available_viewing_slots_batch([agent_id], date, date, duration_minutes)
+            return slots[agent_id][date]
             
         except Exception as e:
-            raise Exception(f"Error fetching available viewing slots: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Error fetching available viewing slots: {str(e)}")
+
+    async def get_available_viewing_slots_batch(
+        self,
+        agent_ids: List[str],
+        date_from: date,
+        date_to: date,
+        duration_minutes: int = 30,
+        day_start: time = DEFAULT_VIEWING_DAY_START,
+        day_end: time = DEFAULT_VIEWING_DAY_END,
+        slot_interval_minutes: int = 30
+    ) -> Dict[str, Dict[date, List[datetime]]]:
+        """Get available viewing slots for many agents over a date range with a single query"""
+        try:
+            if date_to < date_from:
+                raise Exception("date_to must not be before date_from")
+            
+            range_start = datetime.combine(date_from, datetime.min.time())
+            range_end = datetime.combine(date_to, datetime.max.time())
+            
+            existing_viewings = await self.supabase.table('viewing_schedules').select('agent_id, scheduled_date, duration_minutes').in_('agent_id', agent_ids).eq('viewing_status', ViewingStatus.SCHEDULED).gte('scheduled_date', range_start.isoformat()).lte('scheduled_date', range_end.isoformat()).order('scheduled_date', desc=False).execute()
+            
+            busy_by_agent: Dict[str, List[Tuple[datetime, datetime]]] = {agent_id: [] for agent_id in agent_ids}
+            for viewing in existing_viewings.data or []:
+                viewing_start = _to_naive_utc(viewing['scheduled_date'])
+                viewing_end = viewing_start + timedelta(minutes=viewing['duration_minutes'])
+                busy_by_agent.setdefault(viewing['agent_id'], []).append((viewing_start, viewing_end))
+            
+            days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+            slot_length = timedelta(minutes=duration_minutes)
+            step = timedelta(minutes=slot_interval_minutes)
+            
+            availability: Dict[str, Dict[date, List[datetime]]] = {}
+            for agent_id in agent_ids:
+                busy = _merge_intervals(busy_by_agent.get(agent_id, []))
+                availability[agent_id] = {
+                    day: _sweep_free_slots(busy, day, day_start, day_end, slot_length, step)
+                    for day in days
+                }
+            
+            return availability
+            
+        except Exception as e:
+            raise Exception(f"Error fetching available viewing slots: {str(e)}")
+
+
+def _to_naive_utc(timestamp: str) -> datetime:
+    parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _merge_intervals(intervals: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Collapse overlapping busy intervals so their end times are sorted as well"""
+    merged: List[Tuple[datetime, datetime]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _sweep_free_slots(
+    busy: List[Tuple[datetime, datetime]],
+    day: date,
+    day_start: time,
+    day_end: time,
+    slot_length: timedelta,
+    step: timedelta
+) -> List[datetime]:
+    """Walk the day's slots and the sorted busy intervals together in one pass"""
+    slots = []
+    current_time = datetime.combine(day, day_start)
+    end_time = datetime.combine(day, day_end)
+    # First busy interval that is still running when the day starts
+    position = bisect.bisect_right(busy, current_time, key=lambda interval: interval[1])
+    
+    while current_time <= end_time:
+        slot_end = current_time + slot_length
+        
+        while position < len(busy) and busy[position][1] <= current_time:
+            position += 1
+        
+        if position >= len(busy) or busy[position][0] >= slot_end:
+            slots.append(current_time)
+        
+        current_time += step
+    
+    return slots
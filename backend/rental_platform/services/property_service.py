@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime, date
-from supabase import Client
+from datetime import datetime, date, timedelta
+from supabase import AsyncClient
 from ..models.property_models import (
     Property, PropertyCreate, PropertyUpdate,
     ShortTermRental, ShortTermRentalCreate,
@@ -8,9 +8,10 @@ from ..models.property_models import (
     PropertySearchFilters, PropertySearchResult,
     PropertyAvailability, PropertyType
 )
+from .availability_index import availability_index
 
 class PropertyService:
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: AsyncClient):
         self.supabase = supabase_client
 
     async def create_property(self, property_data: PropertyCreate) -> Property:
@@ -20,7 +21,7 @@ class PropertyService:
             property_dict = property_data.dict()
             property_dict['address'] = property_dict['address'].dict() if hasattr(property_dict['address'], 'dict') else property_dict['address']
             
-            result = self.supabase.table('properties').insert(property_dict).execute()
+            result = await self.supabase.table('properties').insert(property_dict).execute()
             
             if not result.data:
                 raise Exception("Failed to create property")
@@ -41,7 +42,7 @@ class PropertyService:
     async def get_property(self, property_id: str) -> Optional[Property]:
         """Get a property by ID"""
         try:
-            result = self.supabase.table('properties').select('*').eq('id', property_id).single().execute()
+            result = await self.supabase.table('properties').select('*').eq('id', property_id).single().execute()
             
             if result.data:
                 return Property(**result.data)
@@ -58,7 +59,7 @@ class PropertyService:
             if 'address' in update_dict:
                 update_dict['address'] = update_dict['address'].dict() if hasattr(update_dict['address'], 'dict') else update_dict['address']
             
-            result = self.supabase.table('properties').update(update_dict).eq('id', property_id).execute()
+            result = await self.supabase.table('properties').update(update_dict).eq('id', property_id).execute()
             
             if result.data:
                 return Property(**result.data[0])
@@ -70,7 +71,7 @@ class PropertyService:
     async def delete_property(self, property_id: str) -> bool:
         """Soft delete a property by setting is_active to False"""
         try:
-            result = self.supabase.table('properties').update({'is_active': False}).eq('id', property_id).execute()
+            result = await self.supabase.table('properties').update({'is_active': False}).eq('id', property_id).execute()
             return bool(result.data)
             
         except Exception as e:
@@ -126,7 +127,7 @@ class PropertyService:
             # Apply pagination
             query = query.range(filters.offset, filters.offset + filters.limit - 1)
             
-            result = query.execute()
+            result = await query.execute()
             
             properties = [Property(**prop) for prop in result.data] if result.data else []
             total_count = result.count or 0
@@ -145,7 +146,7 @@ class PropertyService:
     async def get_properties_by_account(self, account_id: str, limit: int = 20, offset: int = 0) -> List[Property]:
         """Get all properties for an account"""
         try:
-            result = self.supabase.table('properties').select('*').eq('account_id', account_id).eq('is_active', True).range(offset, offset + limit - 1).execute()
+            result = await self.supabase.table('properties').select('*').eq('account_id', account_id).eq('is_active', True).range(offset, offset + limit - 1).execute()
             
             return [Property(**prop) for prop in result.data] if result.data else []
             
@@ -165,7 +166,7 @@ class PropertyService:
             if 'check_out_time' in rental_dict:
                 rental_dict['check_out_time'] = rental_dict['check_out_time'].strftime('%H:%M:%S')
             
-            result = self.supabase.table('short_term_rentals').insert(rental_dict).execute()
+            result = await self.supabase.table('short_term_rentals').insert(rental_dict).execute()
             
             if result.data:
                 return ShortTermRental(**result.data[0])
@@ -177,7 +178,7 @@ class PropertyService:
     async def get_short_term_rental(self, property_id: str) -> Optional[ShortTermRental]:
         """Get short-term rental details by property ID"""
         try:
-            result = self.supabase.table('short_term_rentals').select('*').eq('property_id', property_id).single().execute()
+            result = await self.supabase.table('short_term_rentals').select('*').eq('property_id', property_id).single().execute()
             
             if result.data:
                 return ShortTermRental(**result.data)
@@ -193,7 +194,7 @@ class PropertyService:
             rental_dict = rental_data.dict()
             rental_dict['property_id'] = property_id
             
-            result = self.supabase.table('long_term_rentals').insert(rental_dict).execute()
+            result = await self.supabase.table('long_term_rentals').insert(rental_dict).execute()
             
             if result.data:
                 return LongTermRental(**result.data[0])
@@ -205,7 +206,7 @@ class PropertyService:
     async def get_long_term_rental(self, property_id: str) -> Optional[LongTermRental]:
         """Get long-term rental details by property ID"""
         try:
-            result = self.supabase.table('long_term_rentals').select('*').eq('property_id', property_id).single().execute()
+            result = await self.supabase.table('long_term_rentals').select('*').eq('property_id', property_id).single().execute()
             
             if result.data:
                 return LongTermRental(**result.data)
@@ -226,9 +227,10 @@ class PropertyService:
                 'reason_unavailable': reason if not is_available else None
             }
             
-            result = self.supabase.table('property_availability').insert(availability_data).execute()
+            result = await self.supabase.table('property_availability').insert(availability_data).execute()
             
             if result.data:
+                availability_index.record_availability(result.data[0])
                 return PropertyAvailability(**result.data[0])
             raise Exception("Failed to set property availability")
             
@@ -245,7 +247,7 @@ class PropertyService:
             if date_to:
                 query = query.lte('available_to', date_to.isoformat())
             
-            result = query.execute()
+            result = await query.execute()
             
             return [PropertyAvailability(**avail) for avail in result.data] if result.data else []
             
@@ -255,15 +257,27 @@ class PropertyService:
     async def check_property_available(self, property_id: str, check_date: date) -> bool:
         """Check if property is available on a specific date"""
         try:
-            result = self.supabase.table('property_availability').select('is_available').eq('property_id', property_id).lte('available_from', check_date.isoformat()).gte('available_to', check_date.isoformat()).execute()
+            return await availability_index.is_free(self.supabase, property_id, check_date, check_date + timedelta(days=1))
             
-            if result.data:
-                return all(avail['is_available'] for avail in result.data)
-            return True  # No availability records means available by default
+        except Exception as e:
+            raise Exception(f"Error checking property availability: {str(e)}")
+
+    async def is_property_free(self, property_id: str, date_from: date, date_to: date) -> bool:
+        """Check if every night from date_from up to (not including) date_to is unbooked and unblocked"""
+        try:
+            return await availability_index.is_free(self.supabase, property_id, date_from, date_to)
             
         except Exception as e:
             raise Exception(f"Error checking property availability: {str(e)}")
 
+    async def get_free_nights(self, property_id: str, year: int, month: int) -> List[date]:
+        """Get the nights in a month that are neither booked nor blocked"""
+        try:
+            return await availability_index.free_nights_in_month(self.supabase, property_id, year, month)
+            
+        except Exception as e:
+            raise Exception(f"Error fetching free nights: {str(e)}")
+
     # Helper methods
     async def _create_short_term_rental(self, property_id: str):
         """Create default short-term rental record"""
@@ -9,11 +9,13 @@ from datetime import datetime, timezone
 from typing import Optional
 from services import redis
 from agent.run import run_agent
+from sandbox.sandbox import get_or_start_sandbox
 from utils.logger import logger, structlog
 import dramatiq
 import uuid
 from agentpress.thread_manager import ThreadManager
 from services.supabase import DBConnection
+from services import metrics
 from services import redis
 from dramatiq.brokers.rabbitmq import RabbitmqBroker
 import os
@@ -74,8 +76,13 @@ async def run_agent_background(
     is_agent_builder: Optional[bool] = False,
     target_agent_id: Optional[str] = None,
     request_id: Optional[str] = None,
+    sandbox_id: Optional[str] = None,
 ):
-    """Run the agent in the background using Redis for state."""
+    """Run the agent in the background using Redis for state.
+
+    When `sandbox_id` is given the sandbox is started here, alongside the Redis setup,
+    instead of on the API request path; the run fails if it cannot be started.
+    """
     structlog.contextvars.clear_contextvars()
     structlog.contextvars.bind_contextvars(
         agent_run_id=agent_run_id,
@@ -131,6 +138,7 @@ async def run_agent_background(
     pubsub = None
     stop_checker = None
     stop_signal_received = False
+    sandbox_warmup = None
 
     # Define Redis keys and channels
     response_list_key = f"agent_run:{agent_run_id}:responses"
@@ -164,6 +172,9 @@ async def run_agent_background(
             stop_signal_received = True # Stop the run if the checker fails
 
     trace = langfuse.trace(name="agent_run", id=agent_run_id, session_id=thread_id, metadata={"project_id": project_id, "instance_id": instance_id})
+    run_metrics = metrics.start_run(agent_run_id)
+    if sandbox_id:
+        sandbox_warmup = asyncio.create_task(get_or_start_sandbox(sandbox_id))
     try:
         # Setup Pub/Sub listener for control signals
         pubsub = await redis.create_pubsub()
@@ -179,6 +190,12 @@ async def run_agent_background(
         # Ensure active run key exists and has TTL
         await redis.set(instance_active_key, "running", ex=redis.REDIS_KEY_TTL)
 
+        if sandbox_warmup:
+            try:
+                await sandbox_warmup
+                logger.info(f"Successfully started sandbox {sandbox_id} for project {project_id}")
+            except Exception as e:
+                raise RuntimeError(f"Failed to initialize sandbox: {str(e)}") from e
 
         # Initialize agent generator
         agent_gen = run_agent(
@@ -206,8 +223,10 @@ async def run_agent_background(
 
             # Store response in Redis list and publish notification
             response_json = json.dumps(response)
-            pending_redis_operations.append(asyncio.create_task(redis.rpush(response_list_key, response_json)))
-            pending_redis_operations.append(asyncio.create_task(redis.publish(response_channel, "new")))
+            pending_redis_operations.append(asyncio.create_task(metrics.timed(
+                'redis_publish', 'push_and_publish',
+                redis.push_and_publish(response_list_key, [response_json], response_channel, "new")
+            )))
             total_responses += 1
 
             # Check for agent-signaled completion or error
@@ -227,8 +246,8 @@ async def run_agent_background(
              logger.info(f"Agent run {agent_run_id} completed normally (duration: {duration:.2f}s, responses: {total_responses})")
              completion_message = {"type": "status", "status": "completed", "message": "Agent run completed successfully"}
              trace.span(name="agent_run_completed").end(status_message="agent_run_completed")
-             await redis.rpush(response_list_key, json.dumps(completion_message))
-             await redis.publish(response_channel, "new") # Notify about the completion message
+             with metrics.measure('redis_publish', 'push_and_publish'):
+                 await redis.push_and_publish(response_list_key, [json.dumps(completion_message)], response_channel, "new")
 
         # Fetch final responses from Redis for DB update
         all_responses_json = await redis.lrange(response_list_key, 0, -1)
@@ -257,8 +276,8 @@ async def run_agent_background(
         # Push error message to Redis list
         error_response = {"type": "status", "status": "error", "message": error_message}
         try:
-            await redis.rpush(response_list_key, json.dumps(error_response))
-            await redis.publish(response_channel, "new")
+            with metrics.measure('redis_publish', 'push_and_publish'):
+                await redis.push_and_publish(response_list_key, [json.dumps(error_response)], response_channel, "new")
         except Exception as redis_err:
              logger.error(f"Failed to push error response to Redis for {agent_run_id}: {redis_err}")
 
@@ -282,6 +301,9 @@ async def run_agent_background(
             logger.warning(f"Failed to publish ERROR signal: {str(e)}")
 
     finally:
+        if sandbox_warmup and not sandbox_warmup.done():
+            sandbox_warmup.cancel()
+
         # Cleanup stop checker task
         if stop_checker and not stop_checker.done():
             stop_checker.cancel()
@@ -298,14 +320,8 @@ async def run_agent_background(
             except Exception as e:
                 logger.warning(f"Error closing pubsub for {agent_run_id}: {str(e)}")
 
-        # Set TTL on the response list in Redis
-        await _cleanup_redis_response_list(agent_run_id)
-
-        # Remove the instance-specific active run key
-        await _cleanup_redis_instance_key(agent_run_id)
-
-        # Clean up the run lock
-        await _cleanup_redis_run_lock(agent_run_id)
+        # Set TTL on the response list and remove the instance key and run lock
+        await _cleanup_redis_run_keys(agent_run_id)
 
         # Wait for all pending redis operations to complete, with timeout
         try:
@@ -313,30 +329,55 @@ async def run_agent_background(
         except asyncio.TimeoutError:
             logger.warning(f"Timeout waiting for pending Redis operations for {agent_run_id}")
 
+        # Export where the run spent its time
+        timings = metrics.finish_run(run_metrics, final_status)
+        logger.info(f"Agent run {agent_run_id} timings: {timings['stages']}")
+        trace.event(name="agent_run_timings", level="DEFAULT", metadata=timings)
+
         logger.info(f"Agent run background task fully completed for: {agent_run_id} (Instance: {instance_id}) with final status: {final_status}")
 
-async def _cleanup_redis_instance_key(agent_run_id: str):
-    """Clean up the instance-specific Redis key for an agent run."""
-    if not instance_id:
-        logger.warning("Instance ID not set, cannot clean up instance key.")
-        return
-    key = f"active_run:{instance_id}:{agent_run_id}"
-    logger.debug(f"Cleaning up Redis instance key: {key}")
+@dramatiq.actor(max_retries=3)
+async def process_trigger_webhook(
+    trigger_id: str,
+    delivery_id: str,
+    raw_data: Dict[str, Any],
+    request_id: Optional[str] = None,
+):
+    """Execute a trigger webhook delivery queued by the webhook endpoint."""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        trigger_id=trigger_id,
+        delivery_id=delivery_id,
+        request_id=request_id,
+    )
+
     try:
-        await redis.delete(key)
-        logger.debug(f"Successfully cleaned up Redis key: {key}")
+        await initialize()
     except Exception as e:
-        logger.warning(f"Failed to clean up Redis key {key}: {str(e)}")
+        logger.critical(f"Failed to initialize Redis connection: {e}")
+        raise e
 
-async def _cleanup_redis_run_lock(agent_run_id: str):
-    """Clean up the run lock Redis key for an agent run."""
+    # Imported here because the trigger services import this module
+    from triggers.services.webhook_queue import execute_queued_webhook
+    await execute_queued_webhook(db, trigger_id, delivery_id, raw_data, request_id=request_id)
+
+async def _cleanup_redis_run_keys(agent_run_id: str):
+    """Expire the response list and delete the instance key and run lock in one round trip."""
+    response_list_key = f"agent_run:{agent_run_id}:responses"
     run_lock_key = f"agent_run_lock:{agent_run_id}"
-    logger.debug(f"Cleaning up Redis run lock key: {run_lock_key}")
+    keys_to_delete = [run_lock_key]
+    if instance_id:
+        keys_to_delete.append(f"active_run:{instance_id}:{agent_run_id}")
+    else:
+        logger.warning("Instance ID not set, cannot clean up instance key.")
+    logger.debug(f"Cleaning up Redis keys for agent run {agent_run_id}: {keys_to_delete}")
     try:
-        await redis.delete(run_lock_key)
-        logger.debug(f"Successfully cleaned up Redis run lock key: {run_lock_key}")
+        async with redis.pipeline("cleanup_run_keys") as pipe:
+            pipe.expire(response_list_key, REDIS_RESPONSE_LIST_TTL)
+            pipe.delete(*keys_to_delete)
+        logger.debug(f"Successfully cleaned up Redis keys for agent run {agent_run_id}")
     except Exception as e:
-        logger.warning(f"Failed to clean up Redis run lock key {run_lock_key}: {str(e)}")
+        logger.warning(f"Failed to clean up Redis keys for agent run {agent_run_id}: {str(e)}")
 
 # TTL for Redis response lists (24 hours)
 REDIS_RESPONSE_LIST_TTL = 3600 * 24
@@ -362,9 +403,10 @@ async def update_agent_run_status(
     Returns True if update was successful.
     """
     try:
+        completed_at = datetime.now(timezone.utc)
         update_data = {
             "status": status,
-            "completed_at": datetime.now(timezone.utc).isoformat()
+            "completed_at": completed_at.isoformat()
         }
 
         if error:
@@ -374,10 +416,28 @@ async def update_agent_run_status(
             # Ensure responses are stored correctly as JSONB
             update_data["responses"] = responses
 
+        pool = await db.get_pool()
+
         # Retry up to 3 times
         for retry in range(3):
             try:
-                update_result = await client.table('agent_runs').update(update_data).eq("id", agent_run_id).execute()
+                if pool:
+                    row = await pool.fetchrow(
+                        'update_agent_run_status',
+                        agent_run_id, status, completed_at,
+                        update_data.get("error"), update_data.get("responses")
+                    )
+                    if row:
+                        logger.info(f"Successfully updated agent run {agent_run_id} status to '{row['status']}' (retry {retry}), completed_at={row['completed_at']}")
+                        return True
+                    logger.warning(f"Agent run {agent_run_id} not found on retry {retry}")
+                    if retry == 2:
+                        logger.error(f"Failed to update agent run status after all retries: {agent_run_id}")
+                        return False
+                    continue
+
+                with metrics.measure_query('update_agent_run_status', 'rest'):
+                    update_result = await client.table('agent_runs').update(update_data).eq("id", agent_run_id).execute()
 
                 if hasattr(update_result, 'data') and update_result.data:
                     logger.info(f"Successfully updated agent run {agent_run_id} status to '{status}' (retry {retry})")
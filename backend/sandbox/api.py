@@ -7,9 +7,10 @@ from fastapi.responses import Response
 from pydantic import BaseModel
 from daytona_sdk import AsyncSandbox
 
-from sandbox.sandbox import get_or_start_sandbox, delete_sandbox
+from sandbox.sandbox import get_or_start_sandbox, delete_sandbox, invalidate_sandbox_on_error
+from sandbox.pool import sandbox_pool
 from utils.logger import logger
-from utils.auth_utils import get_optional_user_id
+from utils.auth_utils import get_optional_user_id, verify_admin_api_key
 from services.supabase import DBConnection
 
 # Initialize shared resources
@@ -173,6 +174,7 @@ async def create_file(
         return {"status": "success", "created": True, "path": path}
     except Exception as e:
         logger.error(f"Error creating file in sandbox {sandbox_id}: {str(e)}")
+        invalidate_sandbox_on_error(sandbox_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sandboxes/{sandbox_id}/files")
@@ -218,6 +220,7 @@ async def list_files(
         return {"files": [file.dict() for file in result]}
     except Exception as e:
         logger.error(f"Error listing files in sandbox {sandbox_id}: {str(e)}")
+        invalidate_sandbox_on_error(sandbox_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sandboxes/{sandbox_id}/files/content")
@@ -250,6 +253,7 @@ async def read_file(
             content = await sandbox.fs.download_file(path)
         except Exception as download_err:
             logger.error(f"Error downloading file {path} from sandbox {sandbox_id}: {str(download_err)}")
+            invalidate_sandbox_on_error(sandbox_id, download_err)
             raise HTTPException(
                 status_code=404, 
                 detail=f"Failed to download file: {str(download_err)}"
@@ -274,6 +278,7 @@ async def read_file(
         raise
     except Exception as e:
         logger.error(f"Error reading file in sandbox {sandbox_id}: {str(e)}")
+        invalidate_sandbox_on_error(sandbox_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/sandboxes/{sandbox_id}/files")
@@ -304,6 +309,7 @@ async def delete_file(
         return {"status": "success", "deleted": True, "path": path}
     except Exception as e:
         logger.error(f"Error deleting file in sandbox {sandbox_id}: {str(e)}")
+        invalidate_sandbox_on_error(sandbox_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/sandboxes/{sandbox_id}")
@@ -328,6 +334,11 @@ async def delete_sandbox_route(
         logger.error(f"Error deleting sandbox {sandbox_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/sandboxes/pool/stats")
+async def get_sandbox_pool_stats(_: bool = Depends(verify_admin_api_key)):
+    """Warm sandbox pool hit/miss counters for this process and the current size of each bucket"""
+    return await sandbox_pool.stats()
+
 # Should happen on server-side fully
 @router.post("/project/{project_id}/sandbox/ensure-active")
 async def ensure_project_sandbox_active(
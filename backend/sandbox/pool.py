@@ -0,0 +1,356 @@
+"""
+Warm pool of started Daytona sandboxes.
+
+Creating a sandbox from a snapshot and launching supervisord dominates the latency of
+a project's first message. The pool keeps up to SANDBOX_POOL_SIZE ready sandboxes per
+snapshot so that a new project claims one and relabels it instead of waiting on
+daytona.create().
+
+Pool entries live in a Redis list per snapshot (`sandbox_pool:<snapshot>`), so every
+API and worker process shares one pool. Claims LPOP the oldest entry and are atomic
+across processes. Refills take a short Redis lock so processes do not overfill the
+pool, and they run in the background after every claim. Entries older than
+SANDBOX_POOL_MAX_IDLE_SECONDS are deleted rather than handed out, because Daytona
+auto-stops idle sandboxes and a stopped one would be no faster than a cold create.
+
+Between claims, `start()` runs a refill every SANDBOX_POOL_REFRESH_SECONDS. Each
+refill also replaces entries that would go stale before the next one, so the pool
+stays warm through quiet periods instead of expiring all at once.
+
+Pooled sandboxes carry the POOL_LABEL label until a claim relabels them for their
+project. A process that dies between popping an entry and relabelling it leaves a
+started sandbox in no bucket, so refills also delete pool-labelled sandboxes that
+stay out of every bucket for ORPHAN_GRACE_SECONDS.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from utils.config import config, Configuration
+from utils.logger import logger
+
+POOL_KEY_PREFIX = "sandbox_pool:"
+POOL_LABEL = "warm_pool"
+REFILL_LOCK_TTL_SECONDS = 300
+# A sandbox out of every bucket for longer than a refill can hold one is orphaned
+ORPHAN_GRACE_SECONDS = REFILL_LOCK_TTL_SECONDS
+
+
+class SandboxPool:
+    """Claim-or-create access to a shared pool of pre-started sandboxes.
+
+    The Daytona client, sandbox factory and Redis client factory are injectable, so
+    the pool can be exercised with fakes. They default to the real ones from
+    sandbox.sandbox and services.redis, imported on first use.
+    """
+
+    def __init__(
+        self,
+        target_size: Optional[int] = None,
+        max_idle_seconds: Optional[int] = None,
+        refresh_seconds: Optional[int] = None,
+        daytona_client: Any = None,
+        create_fn: Optional[Callable[..., Awaitable[Any]]] = None,
+        redis_client_factory: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.target_size = config.SANDBOX_POOL_SIZE if target_size is None else target_size
+        self.max_idle_seconds = config.SANDBOX_POOL_MAX_IDLE_SECONDS if max_idle_seconds is None else max_idle_seconds
+        self.refresh_seconds = config.SANDBOX_POOL_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self._daytona = daytona_client
+        self._create_fn = create_fn
+        self._redis_client_factory = redis_client_factory
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._refresher: Optional[asyncio.Task] = None
+        self._metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # Unlisted pool sandboxes and when a refill first saw them
+        self._unlisted: Dict[str, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.target_size > 0
+
+    def _client(self):
+        if self._daytona is None:
+            from sandbox.sandbox import daytona
+            self._daytona = daytona
+        return self._daytona
+
+    async def _create(self, password: str, project_id: Optional[str] = None, snapshot: Optional[str] = None, labels: Optional[Dict[str, str]] = None):
+        if self._create_fn is None:
+            from sandbox.sandbox import create_sandbox
+            self._create_fn = create_sandbox
+        return await self._create_fn(password, project_id, snapshot=snapshot, labels=labels)
+
+    async def _redis(self):
+        if self._redis_client_factory is None:
+            from services import redis
+            self._redis_client_factory = redis.get_client
+        return await self._redis_client_factory()
+
+    @staticmethod
+    def _key(snapshot: str) -> str:
+        return f"{POOL_KEY_PREFIX}{snapshot}"
+
+    def _is_stale(self, entry: Dict[str, Any], margin: float = 0) -> bool:
+        return time.time() - entry.get('created_at', 0) >= self.max_idle_seconds - margin
+
+    @property
+    def _refill_margin(self) -> float:
+        # Entries that won't last until the next periodic refill are replaced now
+        return min(self.refresh_seconds, self.max_idle_seconds / 2)
+
+    async def acquire(self, project_id: str, snapshot: Optional[str] = None) -> Tuple[Any, str]:
+        """Return a started sandbox labelled for `project_id` and its VNC password.
+
+        Served from the pool when possible, otherwise created on the spot. Either way
+        a background refill is scheduled.
+        """
+        snapshot = snapshot or Configuration.SANDBOX_SNAPSHOT_NAME
+        claimed = await self.claim(project_id, snapshot) if self.enabled else None
+        if claimed:
+            return claimed
+
+        password = str(uuid.uuid4())
+        sandbox = await self._create(password, project_id, snapshot=snapshot)
+        return sandbox, password
+
+    async def claim(self, project_id: str, snapshot: Optional[str] = None) -> Optional[Tuple[Any, str]]:
+        """Pop a ready sandbox from the snapshot's bucket and relabel it, or None on a miss"""
+        snapshot = snapshot or Configuration.SANDBOX_SNAPSHOT_NAME
+        metrics = self._metrics[snapshot]
+        try:
+            redis_client = await self._redis()
+            while True:
+                raw = await redis_client.lpop(self._key(snapshot))
+                if raw is None:
+                    metrics['misses'] += 1
+                    logger.info(f"Sandbox pool miss for snapshot {snapshot}")
+                    return None
+
+                entry = json.loads(raw)
+                if self._is_stale(entry):
+                    metrics['expired'] += 1
+                    self._spawn(self._discard(entry['id']))
+                    continue
+
+                sandbox = await self._ready_sandbox(entry['id'])
+                if sandbox is None:
+                    metrics['discarded'] += 1
+                    self._spawn(self._discard(entry['id']))
+                    continue
+
+                try:
+                    await sandbox.set_labels({'id': project_id})
+                except Exception as e:
+                    logger.warning(f"Failed to relabel pooled sandbox {entry['id']}: {e}")
+                    metrics['discarded'] += 1
+                    self._spawn(self._discard(entry['id']))
+                    continue
+
+                metrics['hits'] += 1
+                logger.info(f"Claimed pooled sandbox {sandbox.id} for project {project_id}")
+                return sandbox, entry['pass']
+        except Exception as e:
+            metrics['errors'] += 1
+            logger.warning(f"Sandbox pool claim failed for snapshot {snapshot}: {e}")
+            return None
+        finally:
+            self.schedule_refill(snapshot)
+
+    async def _ready_sandbox(self, sandbox_id: str):
+        from daytona_sdk import SandboxState
+
+        try:
+            sandbox = await self._client().get(sandbox_id)
+        except Exception as e:
+            logger.warning(f"Pooled sandbox {sandbox_id} is unavailable: {e}")
+            return None
+        return sandbox if sandbox.state == SandboxState.STARTED else None
+
+    async def _discard(self, sandbox_id: str) -> None:
+        try:
+            client = self._client()
+            await client.delete(await client.get(sandbox_id))
+            logger.info(f"Deleted pooled sandbox {sandbox_id}")
+        except Exception as e:
+            logger.warning(f"Failed to delete pooled sandbox {sandbox_id}: {e}")
+
+    def _spawn(self, coroutine: Awaitable) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def schedule_refill(self, snapshot: Optional[str] = None) -> None:
+        """Top the bucket up in the background; a no-op while this process is already refilling it"""
+        snapshot = snapshot or Configuration.SANDBOX_SNAPSHOT_NAME
+        if not self.enabled:
+            return
+        running = self._refills.get(snapshot)
+        if running and not running.done():
+            return
+        self._refills[snapshot] = self._spawn(self.refill(snapshot))
+
+    async def refill(self, snapshot: Optional[str] = None) -> int:
+        """Drop expired entries and create sandboxes until the bucket holds target_size.
+
+        Returns the number of sandboxes created. Only one process refills a bucket at
+        a time.
+        """
+        snapshot = snapshot or Configuration.SANDBOX_SNAPSHOT_NAME
+        key = self._key(snapshot)
+        lock_key = f"{key}:refill"
+        metrics = self._metrics[snapshot]
+
+        lock_token = str(uuid.uuid4())
+        try:
+            redis_client = await self._redis()
+            if not await redis_client.set(lock_key, lock_token, ex=REFILL_LOCK_TTL_SECONDS, nx=True):
+                return 0
+        except Exception as e:
+            logger.warning(f"Sandbox pool refill for {snapshot} could not take its lock: {e}")
+            return 0
+
+        try:
+            metrics['reaped'] += await self._reap_orphans(redis_client)
+
+            # Oldest entries sit at the head of the list
+            while True:
+                head = await redis_client.lindex(key, 0)
+                if head is None or not self._is_stale(json.loads(head), self._refill_margin):
+                    break
+                raw = await redis_client.lpop(key)
+                if raw is None:
+                    break
+                entry = json.loads(raw)
+                if not self._is_stale(entry, self._refill_margin):
+                    await redis_client.lpush(key, raw)
+                    break
+                metrics['expired'] += 1
+                await self._discard(entry['id'])
+
+            missing = self.target_size - await redis_client.llen(key)
+            if missing <= 0:
+                return 0
+
+            results = await asyncio.gather(
+                *(self._create_pooled(snapshot) for _ in range(missing)),
+                return_exceptions=True
+            )
+            entries = [result for result in results if isinstance(result, dict)]
+            for result in results:
+                if isinstance(result, BaseException):
+                    metrics['create_failures'] += 1
+                    logger.warning(f"Failed to create pooled sandbox for {snapshot}: {result}")
+            if entries:
+                await redis_client.rpush(key, *(json.dumps(entry) for entry in entries))
+                metrics['created'] += len(entries)
+                logger.info(f"Sandbox pool for {snapshot} refilled with {len(entries)} sandbox(es)")
+            return len(entries)
+        finally:
+            try:
+                # Only release the lock if a slow refill hasn't lost it to another process
+                from services.redis import DELETE_IF_EQUALS_SCRIPT
+                await redis_client.eval(DELETE_IF_EQUALS_SCRIPT, 1, lock_key, lock_token)
+            except Exception as e:
+                logger.warning(f"Failed to release sandbox pool refill lock for {snapshot}: {e}")
+
+    async def _reap_orphans(self, redis_client) -> int:
+        """Delete pool-labelled sandboxes that have been in no bucket for ORPHAN_GRACE_SECONDS.
+
+        The grace period leaves alone sandboxes that a claim has just popped or that a
+        refill has created but not pushed yet. Returns the number deleted.
+        """
+        try:
+            listed: Set[str] = set()
+            async for key in redis_client.scan_iter(match=f"{POOL_KEY_PREFIX}*"):
+                if key.endswith(":refill"):
+                    continue
+                listed.update(json.loads(raw)['id'] for raw in await redis_client.lrange(key, 0, -1))
+
+            client = self._client()
+            sandboxes = await client.list(labels={POOL_LABEL: 'true'})
+        except Exception as e:
+            logger.warning(f"Failed to look for orphaned pooled sandboxes: {e}")
+            return 0
+
+        now = time.time()
+        unlisted: Dict[str, float] = {}
+        reaped = 0
+        for sandbox in sandboxes:
+            # A claimed sandbox carries its project's id label
+            if sandbox.id in listed or 'id' in (sandbox.labels or {}):
+                continue
+            first_seen = self._unlisted.get(sandbox.id, now)
+            if now - first_seen < ORPHAN_GRACE_SECONDS:
+                unlisted[sandbox.id] = first_seen
+                continue
+            try:
+                await client.delete(sandbox)
+                reaped += 1
+                logger.info(f"Deleted orphaned pooled sandbox {sandbox.id}")
+            except Exception as e:
+                unlisted[sandbox.id] = first_seen
+                logger.warning(f"Failed to delete orphaned pooled sandbox {sandbox.id}: {e}")
+        self._unlisted = unlisted
+        return reaped
+
+    async def _refresh(self) -> None:
+        while True:
+            self.schedule_refill()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        """Refill the default snapshot's bucket now and every refresh_seconds after"""
+        if not self.enabled or (self._refresher and not self._refresher.done()):
+            return
+        self._refresher = asyncio.create_task(self._refresh())
+        logger.info(f"Sandbox pool refresher started (every {self.refresh_seconds}s)")
+
+    async def stop(self) -> None:
+        # Refills already running are left to finish so their sandboxes reach the pool
+        if self._refresher:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    async def _create_pooled(self, snapshot: str) -> Dict[str, Any]:
+        password = str(uuid.uuid4())
+        sandbox = await self._create(password, snapshot=snapshot, labels={POOL_LABEL: 'true'})
+        return {'id': sandbox.id, 'pass': password, 'created_at': time.time()}
+
+    async def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and the current size of each bucket"""
+        snapshots = set(self._metrics) | {Configuration.SANDBOX_SNAPSHOT_NAME}
+        buckets = {}
+        for snapshot in sorted(snapshots):
+            counters = dict(self._metrics[snapshot])
+            claims = counters.get('hits', 0) + counters.get('misses', 0)
+            size = None
+            try:
+                size = await (await self._redis()).llen(self._key(snapshot))
+            except Exception as e:
+                logger.warning(f"Failed to read sandbox pool size for {snapshot}: {e}")
+            buckets[snapshot] = {
+                **counters,
+                'size': size,
+                'hit_rate': round(counters.get('hits', 0) / claims, 4) if claims else None,
+            }
+        return {
+            'enabled': self.enabled,
+            'target_size': self.target_size,
+            'max_idle_seconds': self.max_idle_seconds,
+            'refresh_seconds': self.refresh_seconds,
+            'buckets': buckets,
+        }
+
+
+sandbox_pool = SandboxPool()
@@ -1,4 +1,8 @@
 from daytona_sdk import AsyncDaytona, DaytonaConfig, CreateSandboxFromSnapshotParams, AsyncSandbox, SessionExecuteRequest, Resources, SandboxState
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 from utils.logger import logger
 from utils.config import config
@@ -30,7 +34,70 @@ else:
 
 daytona = AsyncDaytona(daytona_config)
 
+# Sandboxes confirmed ready are trusted for this long before Daytona is asked again
+SANDBOX_STATE_TTL_SECONDS = 30
+SANDBOX_HANDLE_MAX_ENTRIES = 1000
+SANDBOX_UNAVAILABLE_ERROR_MARKERS = ('not running', 'is stopped', 'stopped state', 'archived', 'not started', 'sandbox not found')
+
+_sandbox_handles: "OrderedDict[str, Tuple[AsyncSandbox, float]]" = OrderedDict()
+_sandbox_starts: Dict[str, asyncio.Task] = {}
+
 async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
+    """Retrieve a sandbox by ID, starting it if needed.
+
+    A sandbox confirmed ready within the last SANDBOX_STATE_TTL_SECONDS is returned
+    from this process's handle cache without asking Daytona again. Concurrent callers
+    for the same sandbox share one get/start operation instead of racing to start it.
+    """
+    cached = _get_fresh_handle(sandbox_id)
+    if cached is not None:
+        return cached
+
+    task = _sandbox_starts.get(sandbox_id)
+    if task is None:
+        task = asyncio.create_task(_get_or_start_sandbox(sandbox_id))
+        _sandbox_starts[sandbox_id] = task
+        task.add_done_callback(lambda done: _sandbox_starts.pop(sandbox_id, None) if _sandbox_starts.get(sandbox_id) is done else None)
+
+    # A caller that gives up must not cancel the start other callers are waiting on
+    return await asyncio.shield(task)
+
+def _get_fresh_handle(sandbox_id: str) -> Optional[AsyncSandbox]:
+    cached = _sandbox_handles.get(sandbox_id)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[1] >= SANDBOX_STATE_TTL_SECONDS:
+        _sandbox_handles.pop(sandbox_id, None)
+        return None
+    _sandbox_handles.move_to_end(sandbox_id)
+    return cached[0]
+
+def _store_handle(sandbox_id: str, sandbox: AsyncSandbox) -> None:
+    _sandbox_handles[sandbox_id] = (sandbox, time.monotonic())
+    _sandbox_handles.move_to_end(sandbox_id)
+    while len(_sandbox_handles) > SANDBOX_HANDLE_MAX_ENTRIES:
+        _sandbox_handles.popitem(last=False)
+
+def is_sandbox_handle_fresh(sandbox_id: str) -> bool:
+    return _get_fresh_handle(sandbox_id) is not None
+
+def invalidate_sandbox(sandbox_id: str) -> None:
+    """Forget the cached handle so the next get_or_start_sandbox re-checks the sandbox state"""
+    _sandbox_handles.pop(sandbox_id, None)
+
+def is_sandbox_unavailable_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in SANDBOX_UNAVAILABLE_ERROR_MARKERS)
+
+def invalidate_sandbox_on_error(sandbox_id: str, error: Exception) -> bool:
+    """Drop the cached handle if `error` says the sandbox is stopped or gone; returns whether it did"""
+    if sandbox_id and is_sandbox_unavailable_error(error):
+        logger.info(f"Invalidating cached handle for sandbox {sandbox_id} after error: {error}")
+        invalidate_sandbox(sandbox_id)
+        return True
+    return False
+
+async def _get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
     """Retrieve a sandbox by ID, check its state, and start it if needed."""
     
     logger.info(f"Getting or starting sandbox with ID: {sandbox_id}")
@@ -55,6 +122,8 @@ async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
                 raise e
         
         logger.info(f"Sandbox {sandbox_id} is ready")
+        if sandbox.state == SandboxState.STARTED:
+            _store_handle(sandbox_id, sandbox)
         return sandbox
         
     except Exception as e:
@@ -78,19 +147,18 @@ async def start_supervisord_session(sandbox: AsyncSandbox):
         logger.error(f"Error starting supervisord session: {str(e)}")
         raise e
 
-async def create_sandbox(password: str, project_id: str = None) -> AsyncSandbox:
+async def create_sandbox(password: str, project_id: str = None, snapshot: str = None, labels: dict = None) -> AsyncSandbox:
     """Create a new sandbox with all required services configured and running."""
     
     logger.debug("Creating new Daytona sandbox environment")
     logger.debug("Configuring sandbox with snapshot and environment variables")
     
-    labels = None
     if project_id:
         logger.debug(f"Using sandbox_id as label: {project_id}")
-        labels = {'id': project_id}
+        labels = {**(labels or {}), 'id': project_id}
         
     params = CreateSandboxFromSnapshotParams(
-        snapshot=Configuration.SANDBOX_SNAPSHOT_NAME,
+        snapshot=snapshot or Configuration.SANDBOX_SNAPSHOT_NAME,
         public=True,
         labels=labels,
         env_vars={
@@ -135,6 +203,7 @@ async def delete_sandbox(sandbox_id: str) -> bool:
         
         # Delete the sandbox
         await daytona.delete(sandbox)
+        invalidate_sandbox(sandbox_id)
         
         logger.info(f"Successfully deleted sandbox {sandbox_id}")
         return True
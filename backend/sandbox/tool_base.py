@@ -3,7 +3,7 @@ from typing import Optional
 from agentpress.thread_manager import ThreadManager
 from agentpress.tool import Tool
 from daytona_sdk import AsyncSandbox
-from sandbox.sandbox import get_or_start_sandbox
+from sandbox.sandbox import get_or_start_sandbox, is_sandbox_handle_fresh, invalidate_sandbox_on_error
 from utils.logger import logger
 from utils.files_utils import clean_path
 
@@ -23,26 +23,32 @@ class SandboxToolsBase(Tool):
         self._sandbox_pass = None
 
     async def _ensure_sandbox(self) -> AsyncSandbox:
-        """Ensure we have a valid sandbox instance, retrieving it from the project if needed."""
-        if self._sandbox is None:
+        """Ensure we have a valid sandbox instance, retrieving it from the project if needed.
+
+        The project lookup happens once per tool instance. The handle itself is
+        refreshed through get_or_start_sandbox whenever the process-wide handle cache
+        no longer vouches for it, so a sandbox that stopped mid-run gets restarted.
+        """
+        if self._sandbox is None or not is_sandbox_handle_fresh(self._sandbox_id):
             try:
-                # Get database client
-                client = await self.thread_manager.db.client
-                
-                # Get project data
-                project = await client.table('projects').select('*').eq('project_id', self.project_id).execute()
-                if not project.data or len(project.data) == 0:
-                    raise ValueError(f"Project {self.project_id} not found")
-                
-                project_data = project.data[0]
-                sandbox_info = project_data.get('sandbox', {})
-                
-                if not sandbox_info.get('id'):
-                    raise ValueError(f"No sandbox found for project {self.project_id}")
-                
-                # Store sandbox info
-                self._sandbox_id = sandbox_info['id']
-                self._sandbox_pass = sandbox_info.get('pass')
+                if self._sandbox_id is None:
+                    # Get database client
+                    client = await self.thread_manager.db.client
+                    
+                    # Get project data
+                    project = await client.table('projects').select('*').eq('project_id', self.project_id).execute()
+                    if not project.data or len(project.data) == 0:
+                        raise ValueError(f"Project {self.project_id} not found")
+                    
+                    project_data = project.data[0]
+                    sandbox_info = project_data.get('sandbox', {})
+                    
+                    if not sandbox_info.get('id'):
+                        raise ValueError(f"No sandbox found for project {self.project_id}")
+                    
+                    # Store sandbox info
+                    self._sandbox_id = sandbox_info['id']
+                    self._sandbox_pass = sandbox_info.get('pass')
                 
                 # Get or start the sandbox
                 self._sandbox = await get_or_start_sandbox(self._sandbox_id)
@@ -67,6 +73,11 @@ class SandboxToolsBase(Tool):
         
         return self._sandbox
 
+    def _invalidate_sandbox_on_error(self, error: Exception) -> None:
+        """Drop the sandbox handle if `error` says the sandbox stopped, so the next call restarts it"""
+        if invalidate_sandbox_on_error(self._sandbox_id, error):
+            self._sandbox = None
+
     @property
     def sandbox(self) -> AsyncSandbox:
         """Get the sandbox instance, ensuring it exists."""
@@ -16,11 +16,17 @@ Usage:
     python manage_suna_agents.py update-user <id>     # Update Suna agent for specific user
     python manage_suna_agents.py version <version>    # Update all agents to specific version
 
+    # ⚙️  BULK OPTIONS (sync, install-all, update-all, version)
+    --batch-size N          # Rows per multi-row insert/update (default 100)
+    --concurrency N         # Batches written at the same time (default 4)
+    --checkpoint FILE       # Save progress to FILE and resume from it if the run is interrupted
+
 Examples:
     python manage_suna_agents.py sync                 # Most common - sync config changes
     python manage_suna_agents.py install-all
     python manage_suna_agents.py stats
     python manage_suna_agents.py install-user 123e4567-e89b-12d3-a456-426614174000
+    python manage_suna_agents.py install-all --concurrency 8 --checkpoint install.json
 """
 
 import asyncio
@@ -38,26 +44,38 @@ from services.supabase import DBConnection
 from utils.logger import logger
 
 
+def print_report(report):
+    if not report:
+        return
+    
+    print(f"\n📈 Throughput:")
+    print(f"   Processed: {report['processed_count']} in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)")
+    print(f"   Written: {report['synced_count']}, skipped: {report['skipped_count']}, failed: {report['failed_count']}")
+    if report.get('resumed_from'):
+        print(f"   Resumed after: {report['resumed_from']}")
+
+
 class SunaAgentManager:
-    def __init__(self):
+    def __init__(self, engine_options=None):
         self.service = SunaDefaultAgentService()
+        self.engine_options = engine_options or {}
     
     async def sync_config(self):
         """🚀 EASY SYNC: Push current suna_config.py changes to all users"""
         print("🔄 Syncing Suna configuration from suna_config.py to all users...")
         print("📝 This will update system prompt, tools, and settings for all Suna agents")
         
-        result = await self.service.sync_all_suna_agents()
+        result = await self.service.sync_all_suna_agents(**self.engine_options)
         
         print(f"✅ Configuration sync completed!")
         print(f"   🔄 Synced: {result['updated_count']}")
         print(f"   ❌ Failed: {result['failed_count']}")
+        print_report(result['report'])
         
         if result['failed_count'] > 0:
             print("\n❌ Failed syncs:")
-            for detail in result['details']:
-                if detail['status'] == 'failed':
-                    print(f"   - Agent {detail['agent_id']} (User {detail['account_id']}): {detail.get('error', 'Unknown error')}")
+            for error in result['errors']:
+                print(f"   - {error}")
         
         if result['updated_count'] > 0:
             print(f"\n🎉 Successfully synced configuration to {result['updated_count']} users!")
@@ -67,17 +85,17 @@ class SunaAgentManager:
         """Install Suna agent for all users who don't have it"""
         print("🚀 Installing Suna default agent for all users who don't have it...")
         
-        result = await self.service.install_for_all_users()
+        result = await self.service.install_for_all_users(**self.engine_options)
         
         print(f"✅ Installation completed!")
         print(f"   📦 Installed: {result['installed_count']}")
         print(f"   ❌ Failed: {result['failed_count']}")
+        print_report(result['report'])
         
         if result['failed_count'] > 0:
             print("\n❌ Failed installations:")
-            for detail in result['details']:
-                if detail['status'] == 'failed':
-                    print(f"   - User {detail['account_id']}: {detail.get('error', 'Unknown error')}")
+            for error in result['errors']:
+                print(f"   - {error}")
         
         if result['installed_count'] > 0:
             print(f"\n✅ Successfully installed Suna for {result['installed_count']} users")
@@ -87,17 +105,17 @@ class SunaAgentManager:
         version_text = target_version or "latest"
         print(f"🔄 Updating all Suna default agents to {version_text} version...")
         
-        result = await self.service.update_all_suna_agents(target_version)
+        result = await self.service.update_all_suna_agents(target_version, **self.engine_options)
         
         print(f"✅ Update completed!")
         print(f"   🔄 Updated: {result['updated_count']}")
         print(f"   ❌ Failed: {result['failed_count']}")
+        print_report(result['report'])
         
         if result['failed_count'] > 0:
             print("\n❌ Failed updates:")
-            for detail in result['details']:
-                if detail['status'] == 'failed':
-                    print(f"   - Agent {detail['agent_id']} (User {detail['account_id']}): {detail.get('error', 'Unknown error')}")
+            for error in result['errors']:
+                print(f"   - {error}")
         
         if result['updated_count'] > 0:
             print(f"\n✅ Successfully updated {result['updated_count']} Suna agents")
@@ -163,12 +181,12 @@ async def main():
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # 🚀 EASY COMMANDS
-    subparsers.add_parser('sync', help='🚀 Sync suna_config.py changes to all users (RECOMMENDED)')
-    subparsers.add_parser('install-all', help='Install Suna agent for all users who don\'t have it')
+    sync_parser = subparsers.add_parser('sync', help='🚀 Sync suna_config.py changes to all users (RECOMMENDED)')
+    install_all_parser = subparsers.add_parser('install-all', help='Install Suna agent for all users who don\'t have it')
     subparsers.add_parser('stats', help='Show Suna agent statistics')
     
     # 🔧 ADVANCED COMMANDS  
-    subparsers.add_parser('update-all', help='Update all Suna agents to latest version')
+    update_all_parser = subparsers.add_parser('update-all', help='Update all Suna agents to latest version')
     
     # Install user command
     install_user_parser = subparsers.add_parser('install-user', help='Install Suna agent for specific user')
@@ -182,13 +200,25 @@ async def main():
     version_parser = subparsers.add_parser('version', help='Update all agents to specific version')
     version_parser.add_argument('target_version', help='Version to update to (e.g., 1.1.0)')
     
+    for bulk_parser in (sync_parser, install_all_parser, update_all_parser, version_parser):
+        bulk_parser.add_argument('--batch-size', type=int, default=100, help='Rows per multi-row insert/update')
+        bulk_parser.add_argument('--concurrency', type=int, default=4, help='Batches written at the same time')
+        bulk_parser.add_argument('--checkpoint', help='Checkpoint file to save progress to and resume from')
+    
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
     
-    manager = SunaAgentManager()
+    engine_options = {}
+    if hasattr(args, 'batch_size'):
+        engine_options = {
+            'batch_size': args.batch_size,
+            'concurrency': args.concurrency,
+            'checkpoint_path': args.checkpoint
+        }
+    manager = SunaAgentManager(engine_options)
     
     try:
         if args.command == 'sync':
@@ -11,6 +11,7 @@ from datetime import datetime, timezone
 from utils.logger import logger
 from utils.config import config, EnvMode
 from services.supabase import DBConnection
+from services.single_flight import SingleFlight
 from utils.auth_utils import get_current_user_id_from_jwt
 from pydantic import BaseModel
 from utils.constants import MODEL_ACCESS_TIERS, MODEL_NAME_ALIASES, HARDCODED_MODEL_PRICES
@@ -26,6 +27,9 @@ TOKEN_PRICE_MULTIPLIER = 1.5
 # Initialize router
 router = APIRouter(prefix="/billing", tags=["billing"])
 
+# Billing checks from several handlers of one request share one subscription lookup
+subscription_flight = SingleFlight("subscription", ttl_seconds=config.SUBSCRIPTION_CACHE_TTL_SECONDS)
+
 def get_model_pricing(model: str) -> tuple[float, float] | None:
     """
     Get pricing for a model. Returns (input_cost_per_million, output_cost_per_million) or None.
@@ -119,6 +123,9 @@ async def create_stripe_customer(client, user_id: str, email: str) -> str:
 
 async def get_user_subscription(user_id: str) -> Optional[Dict]:
     """Get the current subscription for a user from Stripe or manual database entries."""
+    return await subscription_flight.do(user_id, lambda: _load_user_subscription(user_id))
+
+async def _load_user_subscription(user_id: str) -> Optional[Dict]:
     try:
         # First check for manual subscriptions in the database
         db = DBConnection()
@@ -574,6 +581,8 @@ async def create_checkout_session(
             raise HTTPException(status_code=400, detail="Price ID does not belong to the correct product.")
             
         # Check for existing subscription for our product
+        # Decide on the plan change from Stripe's current state, not a reused lookup
+        subscription_flight.forget(current_user_id)
         existing_subscription = await get_user_subscription(current_user_id)
         # print("Existing subscription for product:", existing_subscription)
         
@@ -1059,6 +1068,9 @@ async def stripe_webhook(request: Request):
         
         # Handle the event
         if event.type in ['customer.subscription.created', 'customer.subscription.updated', 'customer.subscription.deleted']:
+            # The event only names the Stripe customer, so drop every reused lookup
+            subscription_flight.forget()
+            
             # Extract the subscription and customer information
             subscription = event.data.object
             customer_id = subscription.get('customer')
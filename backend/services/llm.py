@@ -14,11 +14,13 @@ from typing import Union, Dict, Any, Optional, AsyncGenerator, List
 import os
 import json
 import asyncio
+import time
 from openai import OpenAIError
 import litellm
 from litellm.files.main import ModelResponse
 from utils.logger import logger
 from utils.config import config
+from services import metrics
 
 # litellm.set_verbose=True
 litellm.modify_params=True
@@ -258,6 +260,15 @@ def prepare_params(
 
     return params
 
+async def _record_time_to_first_chunk(response: AsyncGenerator, model_name: str, started: float) -> AsyncGenerator:
+    """Pass a streaming response through, recording how long its first chunk took."""
+    first_chunk = True
+    async for chunk in response:
+        if first_chunk:
+            metrics.record('llm_ttft', model_name, time.perf_counter() - started)
+            first_chunk = False
+        yield chunk
+
 async def make_llm_api_call(
     messages: List[Dict[str, Any]],
     model_name: str,
@@ -325,7 +336,14 @@ async def make_llm_api_call(
             logger.debug(f"Attempt {attempt + 1}/{MAX_RETRIES}")
             # logger.debug(f"API request parameters: {json.dumps(params, indent=2)}")
 
-            response = await litellm.acompletion(**params)
+            started = time.perf_counter()
+            if stream:
+                response = await litellm.acompletion(**params)
+                logger.debug(f"Successfully received API response from {model_name}")
+                return _record_time_to_first_chunk(response, model_name, started)
+
+            with metrics.measure('llm_call', model_name):
+                response = await litellm.acompletion(**params)
             logger.debug(f"Successfully received API response from {model_name}")
             # logger.debug(f"Response: {response}")
             return response
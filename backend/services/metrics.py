@@ -0,0 +1,200 @@
+"""
+Timing of the agent hot path, the hot queries and Redis, exported as Prometheus metrics.
+
+Each timed operation belongs to a stage:
+
+- db: the hot queries in services.postgres, on either backend
+- context_compression: ContextManager.compress_messages before each LLM call
+- llm_ttft: time from sending a streaming LLM request to its first chunk
+- llm_call: full latency of a non-streaming LLM request
+- tool: one tool execution, labelled with the tool's class (MCPToolWrapper for MCP tools)
+- redis_publish: pushing and publishing a response in run_agent_background
+
+Every operation is observed in the `agent_stage_seconds` histogram, except db
+queries, which go to `db_query_seconds` labelled with the query and its backend
+(`rest` for the Supabase client, `postgres` for the asyncpg pool) so the two paths
+can be compared directly. While an agent run is active (between `start_run` and `finish_run`) it is also added to that run's
+totals, which are logged and observed in `agent_run_stage_seconds` when the run
+ends. The run is tracked in a context variable, so tasks spawned by the run are
+attributed to it without passing anything around.
+
+Redis batched operations are observed in `redis_operation_seconds`, and waits for
+a free connection from the Redis pool in `redis_pool_wait_seconds`.
+
+Recording is a perf_counter call and a histogram observation per operation, a few
+microseconds against operations that take milliseconds to seconds.
+
+Agent runs execute in the Dramatiq worker, not the API process. Set
+PROMETHEUS_MULTIPROC_DIR to a directory shared by the API and worker processes
+(and empty it when they start), and GET /api/metrics reports every process in it.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+T = TypeVar("T")
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+RUN_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+stage_seconds = Histogram(
+    "agent_stage_seconds",
+    "Latency of one hot-path operation in an agent run",
+    ["stage", "operation"],
+    buckets=STAGE_BUCKETS
+)
+stage_errors = Counter(
+    "agent_stage_errors_total",
+    "Hot-path operations that raised",
+    ["stage", "operation"]
+)
+run_seconds = Histogram(
+    "agent_run_seconds",
+    "Wall time of agent runs",
+    ["status"],
+    buckets=RUN_BUCKETS
+)
+run_stage_seconds = Histogram(
+    "agent_run_stage_seconds",
+    "Time one agent run spent in each stage",
+    ["stage"],
+    buckets=RUN_BUCKETS
+)
+
+db_query_seconds = Histogram(
+    "db_query_seconds",
+    "Latency of the hot queries per backend",
+    ["query", "backend"],
+    buckets=STAGE_BUCKETS
+)
+redis_operation_seconds = Histogram(
+    "redis_operation_seconds",
+    "Latency of batched Redis operations",
+    ["operation"],
+    buckets=STAGE_BUCKETS
+)
+redis_pool_wait_seconds = Histogram(
+    "redis_pool_wait_seconds",
+    "Time spent waiting for a free Redis pool connection",
+    buckets=POOL_WAIT_BUCKETS
+)
+redis_pool_timeouts = Counter(
+    "redis_pool_timeouts_total",
+    "Redis connection requests that timed out waiting for the pool"
+)
+
+_current_run: ContextVar[Optional['RunMetrics']] = ContextVar("agent_run_metrics", default=None)
+
+
+class RunMetrics:
+    """Stage totals for one agent run"""
+
+    def __init__(self, agent_run_id: str):
+        self.agent_run_id = agent_run_id
+        self.started = time.perf_counter()
+        # stage -> [count, total seconds, max seconds]
+        self.stages: Dict[str, list] = {}
+        self._token = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        totals = self.stages.get(stage)
+        if totals is None:
+            totals = self.stages[stage] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "agent_run_id": self.agent_run_id,
+            "elapsed_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": {
+                stage: {
+                    "count": count,
+                    "total_seconds": round(total, 3),
+                    "max_seconds": round(longest, 3),
+                }
+                for stage, (count, total, longest) in self.stages.items()
+            },
+        }
+
+
+def start_run(agent_run_id: str) -> RunMetrics:
+    """Attribute operations in the current context, and tasks it spawns, to a new run"""
+    run = RunMetrics(agent_run_id)
+    run._token = _current_run.set(run)
+    return run
+
+
+def finish_run(run: RunMetrics, status: str) -> Dict[str, Any]:
+    """Export the run's totals and stop attributing operations to it; returns its summary"""
+    summary = run.summary()
+    run_seconds.labels(status=status).observe(summary["elapsed_seconds"])
+    for stage, (_, total, _) in run.stages.items():
+        run_stage_seconds.labels(stage=stage).observe(total)
+    if run._token is not None:
+        try:
+            _current_run.reset(run._token)
+        except ValueError:
+            # Finished from a different context than it was started in
+            _current_run.set(None)
+        run._token = None
+    return summary
+
+
+def _add_to_run(stage: str, seconds: float) -> None:
+    run = _current_run.get()
+    if run is not None:
+        run.add(stage, seconds)
+
+
+def record(stage: str, operation: str, seconds: float) -> None:
+    stage_seconds.labels(stage=stage, operation=operation).observe(seconds)
+    _add_to_run(stage, seconds)
+
+
+@contextmanager
+def measure(stage: str, operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        # Cancellation and generator exits aren't failures of the operation
+        stage_errors.labels(stage=stage, operation=operation).inc()
+        raise
+    finally:
+        record(stage, operation, time.perf_counter() - started)
+
+
+@contextmanager
+def measure_query(query: str, backend: str) -> Iterator[None]:
+    """Time one of the hot queries on `backend` (rest or postgres); counts toward the run's db stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        db_query_seconds.labels(query=query, backend=backend).observe(seconds)
+        _add_to_run("db", seconds)
+
+
+async def timed(stage: str, operation: str, awaitable: Awaitable[T]) -> T:
+    """Await `awaitable` under `measure`; handy for operations started as tasks"""
+    with measure(stage, operation):
+        return await awaitable
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Metrics of this process, or of every process sharing PROMETHEUS_MULTIPROC_DIR"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,128 @@
+"""
+Optional direct Postgres path for the hottest queries.
+
+Every query normally goes through the Supabase client, which means one PostgREST
+HTTP request plus JSON encoding per call. When DATABASE_URL is set and asyncpg is
+installed, DBConnection also opens an asyncpg pool and the call sites below run
+their query on it instead:
+
+- messages inserts and LLM message reads in ThreadManager
+- agent_runs status updates in run_agent_background
+- the thread access check in verify_thread_access
+
+The SQL for these lives in HOT_QUERIES. The statements are fixed strings, so
+asyncpg's per-connection statement cache prepares each one once per connection
+and reuses it afterwards; set DB_STATEMENT_CACHE_SIZE=0 when DATABASE_URL points
+at a transaction-mode pooler that can't keep prepared statements. The pool
+connects with the URL's role, which should be one that bypasses RLS like the
+service role key does. Rows come back in the same shape PostgREST returns them,
+with UUIDs and timestamps as strings.
+
+Both paths record their latency with metrics.measure_query under the same query
+name, so the REST and Postgres numbers for a hot query can be compared directly.
+"""
+
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from services import metrics
+from utils.config import config
+from utils.logger import logger
+
+HOT_QUERIES = {
+    "insert_message": """
+        INSERT INTO messages (thread_id, type, content, is_llm_message, metadata, agent_id, agent_version_id)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        RETURNING *
+    """,
+    "get_llm_messages": """
+        SELECT message_id, content
+        FROM messages
+        WHERE thread_id = $1 AND is_llm_message = TRUE
+        ORDER BY created_at
+    """,
+    "update_agent_run_status": """
+        UPDATE agent_runs
+        SET status = $2,
+            completed_at = $3,
+            error = COALESCE($4, error),
+            responses = COALESCE($5, responses)
+        WHERE id = $1
+        RETURNING id, status, completed_at
+    """,
+    "get_thread_access": """
+        SELECT
+            t.account_id,
+            COALESCE(p.is_public, FALSE) AS is_public,
+            EXISTS (
+                SELECT 1 FROM basejump.account_user au
+                WHERE au.account_id = t.account_id AND au.user_id = $2
+            ) AS is_member
+        FROM threads t
+        LEFT JOIN projects p ON p.project_id = t.project_id
+        WHERE t.thread_id = $1
+    """,
+}
+
+
+def _to_rest_value(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _to_rest_row(record) -> Dict[str, Any]:
+    return {key: _to_rest_value(value) for key, value in record.items()}
+
+
+async def _init_connection(connection) -> None:
+    # Encode and decode JSON columns the way PostgREST does
+    for type_name in ("json", "jsonb"):
+        await connection.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+
+
+class PostgresPool:
+    """asyncpg pool that runs the queries named in HOT_QUERIES"""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    @classmethod
+    async def create(cls, dsn: str) -> 'PostgresPool':
+        import asyncpg
+
+        pool = await asyncpg.create_pool(
+            dsn,
+            min_size=config.DB_POOL_MIN_SIZE,
+            max_size=max(config.DB_POOL_MAX_SIZE, config.DB_POOL_MIN_SIZE),
+            command_timeout=config.DB_COMMAND_TIMEOUT_SECONDS,
+            statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+            init=_init_connection
+        )
+        logger.info(f"Postgres pool ready ({config.DB_POOL_MIN_SIZE}-{config.DB_POOL_MAX_SIZE} connections)")
+        return cls(pool)
+
+    async def fetch(self, name: str, *args) -> List[Dict[str, Any]]:
+        with metrics.measure_query(name, "postgres"):
+            records = await self._pool.fetch(HOT_QUERIES[name], *args)
+        return [_to_rest_row(record) for record in records]
+
+    async def fetchrow(self, name: str, *args) -> Optional[Dict[str, Any]]:
+        with metrics.measure_query(name, "postgres"):
+            record = await self._pool.fetchrow(HOT_QUERIES[name], *args)
+        return _to_rest_row(record) if record is not None else None
+
+    async def close(self) -> None:
+        await self._pool.close()
@@ -1,10 +1,14 @@
 import redis.asyncio as redis
 import os
 import ssl
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import asyncio
+from services import metrics
 from utils.logger import logger
-from typing import List, Any
+from utils.config import config
+from typing import AsyncIterator, Dict, Iterable, List, Any, Optional
 from utils.retry import retry
 
 # Redis client and connection pool
@@ -17,6 +21,23 @@ _init_lock = asyncio.Lock()
 REDIS_KEY_TTL = 3600 * 24  # 24 hour TTL as safety mechanism
 
 
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    """Blocking pool that waits for a free connection instead of failing, and records how long.
+
+    Waiting longer than REDIS_POOL_TIMEOUT_SECONDS raises a ConnectionError.
+    """
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            metrics.redis_pool_timeouts.inc()
+            raise
+        finally:
+            metrics.redis_pool_wait_seconds.observe(time.perf_counter() - started)
+
+
 def initialize():
     """Initialize Redis connection pool and client using environment variables."""
     global client, pool
@@ -39,7 +60,7 @@ def initialize():
                 logger.info("Converted Upstash Redis URL to use SSL (rediss://)")
         
         # Create connection pool - let redis-py handle SSL automatically  
-        pool = redis.ConnectionPool.from_url(
+        pool = InstrumentedConnectionPool.from_url(
             redis_url,
             decode_responses=True,
             socket_timeout=15.0,
@@ -47,7 +68,8 @@ def initialize():
             socket_keepalive=True,
             retry_on_timeout=True,
             health_check_interval=30,
-            max_connections=5  # Reduced to 5 connections to save memory
+            max_connections=config.REDIS_MAX_CONNECTIONS,
+            timeout=config.REDIS_POOL_TIMEOUT_SECONDS
         )
     else:
         # Fallback to individual components for Docker/local development
@@ -58,7 +80,7 @@ def initialize():
         logger.info(f"Using Redis host configuration: {redis_host}:{redis_port}")
         
         # Create connection pool with production-optimized settings
-        pool = redis.ConnectionPool(
+        pool = InstrumentedConnectionPool(
             host=redis_host,
             port=redis_port,
             password=redis_password,
@@ -68,7 +90,8 @@ def initialize():
             socket_keepalive=True,
             retry_on_timeout=True,
             health_check_interval=30,
-            max_connections=5,  # Reduced to 5 connections to save memory
+            max_connections=config.REDIS_MAX_CONNECTIONS,
+            timeout=config.REDIS_POOL_TIMEOUT_SECONDS,
         )
 
     # Create Redis client from connection pool
@@ -162,6 +185,21 @@ async def delete(key: str):
     return await redis_client.delete(key)
 
 
+# Deletes the key only while it still holds the caller's value
+DELETE_IF_EQUALS_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+async def delete_if_equals(key: str, value: str) -> bool:
+    """Release a lock key set with a caller-owned token, leaving it alone if another holder took it over."""
+    redis_client = await get_client()
+    return bool(await redis_client.eval(DELETE_IF_EQUALS_SCRIPT, 1, key, value))
+
+
 async def publish(channel: str, message: str):
     """Publish a message to a Redis channel."""
     redis_client = await get_client()
@@ -198,3 +236,74 @@ async def keys(pattern: str) -> List[str]:
 async def expire(key: str, seconds: int):
     redis_client = await get_client()
     return await redis_client.expire(key, seconds)
+
+
+async def scan_keys(pattern: str, count: int = 1000) -> List[str]:
+    """Find keys matching a pattern with SCAN, which unlike KEYS doesn't block the server."""
+    redis_client = await get_client()
+    return [key async for key in redis_client.scan_iter(match=pattern, count=count)]
+
+
+# Batched operations: every helper below sends its commands in one round trip
+
+
+@asynccontextmanager
+async def pipeline(name: str = "pipeline", transaction: bool = False) -> AsyncIterator[Any]:
+    """Queue commands on the yielded pipeline; they are sent together when the block exits.
+
+    Nothing is sent if the block raises. Latency is recorded under `name`.
+    """
+    redis_client = await get_client()
+    async with redis_client.pipeline(transaction=transaction) as pipe:
+        yield pipe
+        with metrics.redis_operation_seconds.labels(operation=name).time():
+            await pipe.execute()
+
+
+async def set_many(mapping: Dict[str, str], ex: Optional[int] = None):
+    """Set several keys, each with the same optional TTL."""
+    if not mapping:
+        return
+    async with pipeline("set_many") as pipe:
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=ex)
+
+
+async def expire_many(keys: Iterable[str], seconds: int):
+    """Set the same TTL on several keys."""
+    keys = list(keys)
+    if not keys:
+        return
+    async with pipeline("expire_many") as pipe:
+        for key in keys:
+            pipe.expire(key, seconds)
+
+
+async def delete_many(keys: Iterable[str]) -> int:
+    """Delete several keys with one DEL; returns how many existed."""
+    keys = list(keys)
+    if not keys:
+        return 0
+    redis_client = await get_client()
+    with metrics.redis_operation_seconds.labels(operation="delete_many").time():
+        return await redis_client.delete(*keys)
+
+
+async def publish_many(channels: Iterable[str], message: str):
+    """Publish the same message to several channels."""
+    channels = list(channels)
+    if not channels:
+        return
+    async with pipeline("publish_many") as pipe:
+        for channel in channels:
+            pipe.publish(channel, message)
+
+
+async def push_and_publish(key: str, values: List[Any], channel: str, message: str):
+    """Append values to a list and notify a channel, in that order on one connection.
+
+    Subscribers woken by the message always find the values already in the list.
+    """
+    async with pipeline("push_and_publish") as pipe:
+        pipe.rpush(key, *values)
+        pipe.publish(channel, message)
@@ -0,0 +1,127 @@
+"""
+Request coalescing for duplicate concurrent reads.
+
+Several browser tabs polling the same endpoints, or several handlers of one request
+asking the same question, end up running identical queries at the same moment. A
+SingleFlight group runs one load per key at a time within the worker: callers that
+arrive while a load is in flight wait for its result instead of starting their own.
+With a TTL the result is also reused for that many seconds after it completes.
+
+Errors are shared with the callers waiting on the load but never cached. A caller
+that is cancelled, e.g. because its client disconnected, doesn't cancel the load
+for the others. Every caller gets its own deep copy of the result, so a caller
+mutating a returned dict can't affect anyone else.
+
+Each group counts loads, coalesced waits and TTL hits; `get_single_flight_stats()`
+reports them with the hit rate for every group in the process.
+"""
+
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ENTRIES = 10000
+
+_groups: Dict[str, 'SingleFlight'] = {}
+
+
+class SingleFlight:
+    def __init__(self, name: str, ttl_seconds: float = 0, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        # Bumped by forget() so loads that started before it don't cache their result
+        self._generation = 0
+        self.calls = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.errors = 0
+        _groups[name] = self
+
+    def _get_fresh(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._results.pop(key, None)
+            return False, None
+        self._results.move_to_end(key)
+        return True, value
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        """Return `loader()`'s result, sharing it with every concurrent call for `key`"""
+        self.calls += 1
+        if self.ttl_seconds > 0:
+            found, value = self._get_fresh(key)
+            if found:
+                self.cache_hits += 1
+                return copy.deepcopy(value)
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.loads += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            generation = self._generation
+            task.add_done_callback(lambda done: self._finish(key, done, generation))
+        else:
+            self.coalesced += 1
+
+        # Shielded so a cancelled caller leaves the load running for the others
+        value = await asyncio.shield(task)
+        return copy.deepcopy(value)
+
+    def _finish(self, key: Hashable, task: asyncio.Task, generation: int) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # Retrieving the exception here also keeps asyncio from logging it when
+            # every caller was cancelled before the load failed
+            self.errors += 1
+            return
+        if self.ttl_seconds > 0 and generation == self._generation:
+            self._results[key] = (task.result(), time.monotonic() + self.ttl_seconds)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def forget(self, key: Optional[Hashable] = None) -> None:
+        """Drop the cached result for `key`, or all of them.
+
+        Loads already in flight still answer the callers waiting on them, but later
+        callers start a new load and the old one's result isn't cached.
+        """
+        self._generation += 1
+        if key is None:
+            self._results.clear()
+            self._inflight.clear()
+        else:
+            self._results.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        served = self.coalesced + self.cache_hits
+        return {
+            "calls": self.calls,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "hit_rate": round(served / self.calls, 3) if self.calls else 0.0,
+            "in_flight": len(self._inflight),
+            "cached": len(self._results),
+        }
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: group.get_stats() for name, group in _groups.items()}
@@ -2,15 +2,19 @@
 Centralized database connection management for AgentPress using Supabase.
 """
 
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 from supabase import create_async_client, AsyncClient
 from utils.logger import logger
 from utils.config import config
+from services.postgres import PostgresPool
 import base64
 import uuid
 from datetime import datetime
 import threading
 
+# PostgREST returns at most this many rows per request
+SELECT_PAGE_SIZE = 1000
+
 class DBConnection:
     """Thread-safe singleton database connection manager using Supabase."""
     
@@ -25,6 +29,7 @@ class DBConnection:
                     cls._instance = super().__new__(cls)
                     cls._instance._initialized = False
                     cls._instance._client = None
+                    cls._instance._pool = None
         return cls._instance
 
     def __init__(self):
@@ -53,6 +58,9 @@ class DBConnection:
                 supabase_key,
             )
             
+            if config.DATABASE_URL:
+                self._pool = await self._create_pool()
+            
             self._initialized = True
             key_type = "SERVICE_ROLE_KEY" if config.SUPABASE_SERVICE_ROLE_KEY else "ANON_KEY"
             logger.debug(f"Database connection initialized with Supabase using {key_type}")
@@ -61,6 +69,16 @@ class DBConnection:
             logger.error(f"Database initialization error: {e}")
             raise RuntimeError(f"Failed to initialize database connection: {str(e)}")
 
+    async def _create_pool(self) -> Optional[PostgresPool]:
+        """Open the direct Postgres pool; hot queries fall back to Supabase REST without it."""
+        try:
+            return await PostgresPool.create(config.DATABASE_URL)
+        except ImportError:
+            logger.warning("DATABASE_URL is set but asyncpg is not installed, using Supabase REST only")
+        except Exception as e:
+            logger.warning(f"Failed to open Postgres pool, using Supabase REST only: {e}")
+        return None
+
     @classmethod
     async def disconnect(cls):
         """Disconnect from the database."""
@@ -77,6 +95,14 @@ class DBConnection:
                 cls._instance._initialized = False
                 cls._instance._client = None
                 logger.info("Database disconnected successfully")
+        
+        if cls._instance and cls._instance._pool:
+            try:
+                await cls._instance._pool.close()
+            except Exception as e:
+                logger.warning(f"Error closing Postgres pool: {e}")
+            finally:
+                cls._instance._pool = None
 
     @property
     async def client(self) -> AsyncClient:
@@ -88,3 +114,26 @@ class DBConnection:
             logger.error("Database client is None after initialization")
             raise RuntimeError("Database not initialized")
         return self._client
+
+    async def get_pool(self) -> Optional[PostgresPool]:
+        """Get the direct Postgres pool for hot queries, or None when it isn't configured."""
+        if not self._initialized:
+            await self.initialize()
+        return self._pool
+
+
+async def select_all(build_query: Callable[[], Any]) -> List[Dict[str, Any]]:
+    """Page through a select past PostgREST's row cap.
+
+    build_query must return a fresh, ordered query each time it is called, so pages
+    are stable.
+    """
+    rows = []
+    offset = 0
+    while True:
+        result = await build_query().range(offset, offset + SELECT_PAGE_SIZE - 1).execute()
+        page = result.data or []
+        rows.extend(page)
+        if len(page) < SELECT_PAGE_SIZE:
+            return rows
+        offset += SELECT_PAGE_SIZE
@@ -0,0 +1,49 @@
+-- Prevent overlapping pending/confirmed bookings for the same property.
+-- The booking service checks an in-memory availability index and serializes
+-- reservations per property within a worker; this constraint makes the
+-- reservation atomic across workers as well.
+--
+-- Databases that already hold overlapping pending/confirmed bookings can't take
+-- the constraint. Those are not resolved here: the migration fails listing the
+-- conflicting booking pairs so an operator can cancel or move them first.
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+DO $$
+DECLARE
+    conflicts TEXT;
+BEGIN
+    SELECT string_agg(format('%s overlaps %s', later.id, earlier.id), ', ' ORDER BY later.property_id, later.created_at)
+    INTO conflicts
+    FROM public.booking_requests earlier
+    JOIN public.booking_requests later
+        ON later.property_id = earlier.property_id
+        AND (later.created_at, later.id) > (earlier.created_at, earlier.id)
+        AND daterange(later.check_in_date, later.check_out_date, '[)')
+            && daterange(earlier.check_in_date, earlier.check_out_date, '[)')
+    WHERE earlier.booking_status IN ('pending', 'confirmed')
+        AND later.booking_status IN ('pending', 'confirmed');
+
+    IF conflicts IS NOT NULL THEN
+        RAISE EXCEPTION 'Overlapping pending/confirmed bookings must be resolved before adding excl_booking_requests_no_overlap: %', conflicts;
+    END IF;
+END $$;
+
+ALTER TABLE public.booking_requests
+    DROP CONSTRAINT IF EXISTS excl_booking_requests_no_overlap;
+
+ALTER TABLE public.booking_requests
+    ADD CONSTRAINT excl_booking_requests_no_overlap
+    EXCLUDE USING gist (
+        property_id WITH =,
+        daterange(check_in_date, check_out_date, '[)') WITH &&
+    )
+    WHERE (booking_status IN ('pending', 'confirmed'));
+
+-- Supports loading unavailable periods into the availability index
+CREATE INDEX IF NOT EXISTS idx_property_availability_blocked
+    ON public.property_availability(property_id)
+    WHERE is_available = false;
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- Content hash of the original file bytes, used to deduplicate knowledge base
+-- ingestion per agent. Re-uploading an archive or re-cloning a repository skips
+-- files whose bytes are already stored for the agent instead of re-extracting them.
+BEGIN;
+
+ALTER TABLE agent_knowledge_base_entries
+    ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_agent_kb_entries_agent_content_hash
+    ON agent_knowledge_base_entries(agent_id, content_hash)
+    WHERE content_hash IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,38 @@
+-- Chunked retrieval index for agent knowledge bases. Entries are split into
+-- chunks at ingestion time and each chunk stores its term frequencies, so agent
+-- runs can rank chunks with BM25 against the latest user message and inject only
+-- the most relevant ones instead of whole entries.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS agent_kb_chunks (
+    chunk_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    entry_id UUID NOT NULL REFERENCES agent_knowledge_base_entries(entry_id) ON DELETE CASCADE,
+    agent_id UUID NOT NULL REFERENCES agents(agent_id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    token_count INTEGER NOT NULL,
+    term_count INTEGER NOT NULL,
+    terms JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_agent_kb_chunks_agent_id ON agent_kb_chunks(agent_id);
+CREATE INDEX IF NOT EXISTS idx_agent_kb_chunks_entry_id ON agent_kb_chunks(entry_id);
+
+ALTER TABLE agent_kb_chunks ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY agent_kb_chunks_user_access ON agent_kb_chunks
+    FOR ALL
+    USING (
+        EXISTS (
+            SELECT 1 FROM agents a
+            WHERE a.agent_id = agent_kb_chunks.agent_id
+            AND basejump.has_role_on_account(a.account_id) = true
+        )
+    );
+
+GRANT ALL PRIVILEGES ON TABLE agent_kb_chunks TO authenticated, service_role;
+
+COMMENT ON TABLE agent_kb_chunks IS 'Chunked, term-indexed agent knowledge base content used for BM25 retrieval';
+
+COMMIT;
@@ -0,0 +1,37 @@
+-- Agent listing: tools_count sort in the database
+-- Stores each version's tool count (MCP servers plus enabled AgentPress tools) so
+-- the agents listing can order by the current version's tools_count in SQL
+-- instead of loading every version and sorting in Python.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION agent_config_tools_count(p_config JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(
+        CASE WHEN jsonb_typeof(p_config->'tools'->'mcp') = 'array'
+            THEN jsonb_array_length(p_config->'tools'->'mcp')
+        END,
+        0
+    ) + (
+        SELECT COUNT(*)::INTEGER
+        FROM jsonb_each(
+            CASE WHEN jsonb_typeof(p_config->'tools'->'agentpress') = 'object'
+                THEN p_config->'tools'->'agentpress'
+                ELSE '{}'::jsonb
+            END
+        ) AS tool(name, value)
+        WHERE tool.value = 'true'::jsonb
+           OR (jsonb_typeof(tool.value) = 'object' AND tool.value->>'enabled' = 'true')
+    )
+$$;
+
+ALTER TABLE agent_versions
+    ADD COLUMN IF NOT EXISTS tools_count INTEGER
+    GENERATED ALWAYS AS (agent_config_tools_count(config)) STORED;
+
+COMMENT ON COLUMN agent_versions.tools_count IS 'MCP servers plus enabled AgentPress tools in config, used to sort agent listings';
+
+COMMIT;
@@ -0,0 +1,147 @@
+-- Per-minute trigger event rollups. The backend buffers trigger event logs and
+-- flushes them in batches; each flush also adds its success/failure counts and
+-- latency histogram per trigger and minute here, so trigger stats read a few
+-- rollup rows instead of scanning the raw event logs. Existing event logs are
+-- backfilled into the rollups.
+BEGIN;
+
+-- No foreign keys: a flushed batch must not fail because a trigger was deleted
+-- after its events were buffered
+CREATE TABLE IF NOT EXISTS trigger_event_minute_stats (
+    trigger_id UUID NOT NULL,
+    minute TIMESTAMPTZ NOT NULL,
+    agent_id UUID NOT NULL,
+    success_count INTEGER NOT NULL DEFAULT 0,
+    failure_count INTEGER NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    latency_total_ms BIGINT NOT NULL DEFAULT 0,
+    latency_max_ms INTEGER NOT NULL DEFAULT 0,
+    -- Counts per latency bucket; bounds are defined by the backend
+    latency_buckets INTEGER[] NOT NULL DEFAULT '{}',
+    PRIMARY KEY (trigger_id, minute)
+);
+
+CREATE INDEX IF NOT EXISTS idx_trigger_event_minute_stats_agent_id ON trigger_event_minute_stats(agent_id);
+
+ALTER TABLE trigger_event_minute_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY trigger_event_minute_stats_select_policy ON trigger_event_minute_stats
+    FOR SELECT USING (
+        EXISTS (
+            SELECT 1 FROM agents
+            WHERE agents.agent_id = trigger_event_minute_stats.agent_id
+            AND basejump.has_role_on_account(agents.account_id)
+        )
+    );
+
+GRANT ALL PRIVILEGES ON TABLE trigger_event_minute_stats TO service_role;
+GRANT SELECT ON TABLE trigger_event_minute_stats TO authenticated;
+
+-- Adds a batch of rollup increments; rows for the same trigger and minute from
+-- different processes accumulate instead of overwriting each other.
+CREATE OR REPLACE FUNCTION record_trigger_event_rollups(p_rows JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO trigger_event_minute_stats AS s (
+        trigger_id, minute, agent_id, success_count, failure_count,
+        latency_count, latency_total_ms, latency_max_ms, latency_buckets
+    )
+    SELECT
+        r.trigger_id, r.minute, r.agent_id, r.success_count, r.failure_count,
+        r.latency_count, r.latency_total_ms, r.latency_max_ms, r.latency_buckets
+    FROM jsonb_to_recordset(p_rows) AS r(
+        trigger_id UUID,
+        minute TIMESTAMPTZ,
+        agent_id UUID,
+        success_count INTEGER,
+        failure_count INTEGER,
+        latency_count INTEGER,
+        latency_total_ms BIGINT,
+        latency_max_ms INTEGER,
+        latency_buckets INTEGER[]
+    )
+    ON CONFLICT (trigger_id, minute) DO UPDATE SET
+        success_count = s.success_count + EXCLUDED.success_count,
+        failure_count = s.failure_count + EXCLUDED.failure_count,
+        latency_count = s.latency_count + EXCLUDED.latency_count,
+        latency_total_ms = s.latency_total_ms + EXCLUDED.latency_total_ms,
+        latency_max_ms = GREATEST(s.latency_max_ms, EXCLUDED.latency_max_ms),
+        latency_buckets = ARRAY(
+            SELECT COALESCE(a, 0) + COALESCE(b, 0)
+            FROM unnest(s.latency_buckets, EXCLUDED.latency_buckets) WITH ORDINALITY AS u(a, b, i)
+            ORDER BY u.i
+        )
+$$;
+
+GRANT EXECUTE ON FUNCTION record_trigger_event_rollups(JSONB) TO service_role;
+
+-- Totals and the summed latency histogram for one trigger since p_since
+CREATE OR REPLACE FUNCTION get_trigger_event_stats(p_trigger_id UUID, p_since TIMESTAMPTZ)
+RETURNS TABLE (
+    success_count BIGINT,
+    failure_count BIGINT,
+    latency_count BIGINT,
+    latency_total_ms BIGINT,
+    latency_max_ms INTEGER,
+    latency_buckets BIGINT[]
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        COALESCE(SUM(s.success_count), 0)::BIGINT,
+        COALESCE(SUM(s.failure_count), 0)::BIGINT,
+        COALESCE(SUM(s.latency_count), 0)::BIGINT,
+        COALESCE(SUM(s.latency_total_ms), 0)::BIGINT,
+        COALESCE(MAX(s.latency_max_ms), 0),
+        ARRAY(
+            SELECT SUM(b.count)::BIGINT
+            FROM trigger_event_minute_stats s2,
+                unnest(s2.latency_buckets) WITH ORDINALITY AS b(count, i)
+            WHERE s2.trigger_id = p_trigger_id AND s2.minute >= p_since
+            GROUP BY b.i
+            ORDER BY b.i
+        )
+    FROM trigger_event_minute_stats s
+    WHERE s.trigger_id = p_trigger_id AND s.minute >= p_since
+$$;
+
+GRANT EXECUTE ON FUNCTION get_trigger_event_stats(UUID, TIMESTAMPTZ) TO service_role;
+
+-- Backfill the rollups from the events already logged, so stats for existing
+-- triggers don't start from zero. Buckets match the backend's LATENCY_BUCKETS_MS
+-- (50, 100, 250, 500, 1000, 2500, 5000, 10000 ms, then everything slower).
+INSERT INTO trigger_event_minute_stats (
+    trigger_id, minute, agent_id, success_count, failure_count,
+    latency_count, latency_total_ms, latency_max_ms, latency_buckets
+)
+SELECT
+    l.trigger_id,
+    date_trunc('minute', l.logged_at),
+    (array_agg(l.agent_id))[1],
+    COUNT(*) FILTER (WHERE l.success),
+    COUNT(*) FILTER (WHERE l.success IS NOT TRUE),
+    COUNT(l.execution_time_ms),
+    COALESCE(SUM(l.execution_time_ms), 0),
+    COALESCE(MAX(l.execution_time_ms), 0),
+    ARRAY[
+        COUNT(*) FILTER (WHERE l.execution_time_ms <= 50),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 50 AND l.execution_time_ms <= 100),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 100 AND l.execution_time_ms <= 250),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 250 AND l.execution_time_ms <= 500),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 500 AND l.execution_time_ms <= 1000),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 1000 AND l.execution_time_ms <= 2500),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 2500 AND l.execution_time_ms <= 5000),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 5000 AND l.execution_time_ms <= 10000),
+        COUNT(*) FILTER (WHERE l.execution_time_ms > 10000)
+    ]::INTEGER[]
+FROM trigger_event_logs l
+WHERE l.logged_at IS NOT NULL
+    AND l.agent_id IS NOT NULL
+GROUP BY l.trigger_id, date_trunc('minute', l.logged_at)
+ON CONFLICT (trigger_id, minute) DO NOTHING;
+
+COMMENT ON TABLE trigger_event_minute_stats IS 'Per-trigger, per-minute event counts and latency histograms used by trigger stats';
+
+COMMIT;
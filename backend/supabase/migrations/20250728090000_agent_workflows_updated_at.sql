@@ -0,0 +1,12 @@
+-- Restore the updated_at trigger on agent_workflows. It was dropped while fixing the
+-- workflow policies and never recreated, so updated_at stopped changing on edits.
+-- The backend caches rendered workflow prompts per workflow id and updated_at, which
+-- needs every update to bump it.
+BEGIN;
+
+DROP TRIGGER IF EXISTS update_agent_workflows_updated_at ON agent_workflows;
+CREATE TRIGGER update_agent_workflows_updated_at
+    BEFORE UPDATE ON agent_workflows
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- Knowledge base entries whose extraction failed used to be stored with the
+-- error message as content and the file's real content hash, so re-uploading
+-- the same file matched the broken entry instead of retrying. Failed
+-- extractions are no longer stored; clearing the hash on the old ones lets
+-- those files be uploaded again.
+BEGIN;
+
+UPDATE agent_knowledge_base_entries
+SET content_hash = NULL
+WHERE content_hash IS NOT NULL
+    AND (content LIKE 'Error extracting content:%' OR content LIKE 'OCR extraction failed:%');
+
+COMMIT;
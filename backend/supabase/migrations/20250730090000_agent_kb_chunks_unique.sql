@@ -0,0 +1,26 @@
+-- Workers backfilling chunks for the same unindexed entry at the same time could
+-- each insert the entry's chunks. Chunks are derived data, so duplicates are
+-- dropped (keeping the oldest copy) and each (entry_id, chunk_index) is made
+-- unique; backfills upsert against it.
+BEGIN;
+
+DELETE FROM agent_kb_chunks
+WHERE chunk_id IN (
+    SELECT chunk_id
+    FROM (
+        SELECT chunk_id, row_number() OVER (
+            PARTITION BY entry_id, chunk_index
+            ORDER BY created_at NULLS FIRST, chunk_id
+        ) AS copy
+        FROM agent_kb_chunks
+    ) ranked
+    WHERE copy > 1
+);
+
+ALTER TABLE agent_kb_chunks
+    DROP CONSTRAINT IF EXISTS agent_kb_chunks_entry_chunk_key;
+
+ALTER TABLE agent_kb_chunks
+    ADD CONSTRAINT agent_kb_chunks_entry_chunk_key UNIQUE (entry_id, chunk_index);
+
+COMMIT;
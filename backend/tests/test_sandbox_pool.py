@@ -0,0 +1,212 @@
+import asyncio
+import json
+import time
+
+import pytest
+from daytona_sdk import SandboxState
+
+from sandbox import pool as pool_module
+from sandbox.pool import POOL_LABEL, SandboxPool
+
+SNAPSHOT = "test-snapshot"
+KEY = f"sandbox_pool:{SNAPSHOT}"
+
+
+class FakeRedis:
+    """The subset of the async Redis client the pool uses"""
+
+    def __init__(self):
+        self.lists = {}
+        self.values = {}
+
+    async def lpop(self, key):
+        items = self.lists.get(key)
+        return items.pop(0) if items else None
+
+    async def lpush(self, key, *values):
+        self.lists.setdefault(key, [])[:0] = reversed(values)
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    async def lindex(self, key, index):
+        items = self.lists.get(key, [])
+        return items[index] if -len(items) <= index < len(items) else None
+
+    async def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        for key in list(self.lists) + list(self.values):
+            if key.startswith(prefix):
+                yield key
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, value):
+        if self.values.get(key) == value:
+            del self.values[key]
+            return 1
+        return 0
+
+
+class FakeSandbox:
+    def __init__(self, sandbox_id, state=SandboxState.STARTED, labels=None, fail_relabel=False):
+        self.id = sandbox_id
+        self.state = state
+        self.labels = labels or {}
+        self.fail_relabel = fail_relabel
+
+    async def set_labels(self, labels):
+        if self.fail_relabel:
+            raise RuntimeError("relabel failed")
+        self.labels = labels
+        return labels
+
+
+class FakeDaytona:
+    def __init__(self, *sandboxes):
+        self.sandboxes = {sandbox.id: sandbox for sandbox in sandboxes}
+        self.deleted = []
+
+    async def get(self, sandbox_id):
+        if sandbox_id not in self.sandboxes:
+            raise RuntimeError(f"Sandbox {sandbox_id} not found")
+        return self.sandboxes[sandbox_id]
+
+    async def delete(self, sandbox):
+        self.deleted.append(sandbox.id)
+        self.sandboxes.pop(sandbox.id, None)
+
+    async def list(self, labels=None):
+        return [
+            sandbox for sandbox in self.sandboxes.values()
+            if all(sandbox.labels.get(name) == value for name, value in (labels or {}).items())
+        ]
+
+
+def make_pool(daytona, redis_client, target_size=0, create_fn=None):
+    async def redis_client_factory():
+        return redis_client
+
+    return SandboxPool(
+        target_size=target_size,
+        max_idle_seconds=600,
+        refresh_seconds=60,
+        daytona_client=daytona,
+        create_fn=create_fn,
+        redis_client_factory=redis_client_factory,
+    )
+
+
+def pool_entry(sandbox_id, age=0):
+    return json.dumps({'id': sandbox_id, 'pass': f"pass-{sandbox_id}", 'created_at': time.time() - age})
+
+
+async def drain(pool):
+    while pool._background:
+        await asyncio.gather(*pool._background)
+
+
+@pytest.mark.asyncio
+async def test_claim_hit_relabels_the_pooled_sandbox():
+    sandbox = FakeSandbox("sb-1", labels={POOL_LABEL: 'true'})
+    redis_client = FakeRedis()
+    await redis_client.rpush(KEY, pool_entry("sb-1"))
+    pool = make_pool(FakeDaytona(sandbox), redis_client)
+
+    claimed = await pool.claim("project-1", SNAPSHOT)
+
+    assert claimed == (sandbox, "pass-sb-1")
+    assert sandbox.labels == {'id': "project-1"}
+    assert await redis_client.llen(KEY) == 0
+    assert pool._metrics[SNAPSHOT]['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_miss_returns_none():
+    pool = make_pool(FakeDaytona(), FakeRedis())
+
+    assert await pool.claim("project-1", SNAPSHOT) is None
+    assert pool._metrics[SNAPSHOT]['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_deletes_stale_entries_instead_of_handing_them_out():
+    stale = FakeSandbox("sb-stale", labels={POOL_LABEL: 'true'})
+    fresh = FakeSandbox("sb-fresh", labels={POOL_LABEL: 'true'})
+    daytona = FakeDaytona(stale, fresh)
+    redis_client = FakeRedis()
+    await redis_client.rpush(KEY, pool_entry("sb-stale", age=3600), pool_entry("sb-fresh"))
+    pool = make_pool(daytona, redis_client)
+
+    claimed = await pool.claim("project-1", SNAPSHOT)
+    await drain(pool)
+
+    assert claimed == (fresh, "pass-sb-fresh")
+    assert daytona.deleted == ["sb-stale"]
+    assert pool._metrics[SNAPSHOT]['expired'] == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_discards_a_sandbox_that_fails_to_relabel():
+    broken = FakeSandbox("sb-broken", labels={POOL_LABEL: 'true'}, fail_relabel=True)
+    daytona = FakeDaytona(broken)
+    redis_client = FakeRedis()
+    await redis_client.rpush(KEY, pool_entry("sb-broken"))
+    pool = make_pool(daytona, redis_client)
+
+    assert await pool.claim("project-1", SNAPSHOT) is None
+    await drain(pool)
+
+    assert daytona.deleted == ["sb-broken"]
+    assert pool._metrics[SNAPSHOT]['discarded'] == 1
+    assert pool._metrics[SNAPSHOT]['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_refill_reaps_unclaimed_sandboxes_missing_from_every_bucket(monkeypatch):
+    monkeypatch.setattr(pool_module, "ORPHAN_GRACE_SECONDS", 0)
+    listed = FakeSandbox("sb-listed", labels={POOL_LABEL: 'true'})
+    orphan = FakeSandbox("sb-orphan", labels={POOL_LABEL: 'true'})
+    claimed = FakeSandbox("sb-claimed", labels={'id': "project-1"})
+    daytona = FakeDaytona(listed, orphan, claimed)
+    redis_client = FakeRedis()
+    await redis_client.rpush(KEY, pool_entry("sb-listed"))
+    pool = make_pool(daytona, redis_client, target_size=1)
+
+    assert await pool.refill(SNAPSHOT) == 0
+
+    assert daytona.deleted == ["sb-orphan"]
+    assert pool._metrics[SNAPSHOT]['reaped'] == 1
+
+
+@pytest.mark.asyncio
+async def test_refill_spares_unlisted_sandboxes_within_the_grace_period():
+    orphan = FakeSandbox("sb-orphan", labels={POOL_LABEL: 'true'})
+    daytona = FakeDaytona(orphan)
+    created = []
+
+    async def create_fn(password, project_id=None, snapshot=None, labels=None):
+        sandbox = FakeSandbox(f"sb-new-{len(created)}", labels=labels)
+        created.append(sandbox)
+        return sandbox
+
+    redis_client = FakeRedis()
+    pool = make_pool(daytona, redis_client, target_size=1, create_fn=create_fn)
+
+    assert await pool.refill(SNAPSHOT) == 1
+
+    assert daytona.deleted == []
+    assert "sb-orphan" in pool._unlisted
+    assert created[0].labels == {POOL_LABEL: 'true'}
+    assert json.loads(await redis_client.lindex(KEY, 0))['id'] == "sb-new-0"
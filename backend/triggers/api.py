@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Body, Query
 from fastapi.responses import JSONResponse
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel
 import os
 from datetime import datetime, timezone
@@ -12,10 +12,11 @@ from .support.exceptions import TriggerError, ConfigurationError, ProviderError
 from .services.trigger_service import TriggerService
 from .services.execution_service import TriggerExecutionService
 from .services.provider_service import ProviderService
+from .services.webhook_queue import enqueue_webhook
 from .endpoints import workflows_router, set_workflows_db_connection
 from services.supabase import DBConnection
 from utils.auth_utils import get_current_user_id_from_jwt
-from utils.logger import logger
+from utils.logger import logger, structlog
 from flags.flags import is_enabled
 from utils.config import config, EnvMode
 
@@ -221,18 +222,23 @@ async def get_agent_upcoming_runs(
             if trigger.is_active and trigger.trigger_type.value == "schedule"
         ]
         
+        scheduled_runs = {}
+        if config.TRIGGER_LOCAL_SCHEDULER:
+            from .services.scheduler import local_scheduler
+            scheduled_runs = await local_scheduler.get_next_runs([trigger.trigger_id for trigger in schedule_triggers])
+        
         upcoming_runs = []
         now = datetime.now(timezone.utc)
         for trigger in schedule_triggers:
-            config = trigger.config.config
-            cron_expression = config.get('cron_expression')
-            user_timezone = config.get('timezone', 'UTC')
+            trigger_config = trigger.config.config
+            cron_expression = trigger_config.get('cron_expression')
+            user_timezone = trigger_config.get('timezone', 'UTC')
             
             if not cron_expression:
                 continue
                 
             try:
-                next_run = _get_next_run_time(cron_expression, user_timezone)
+                next_run = scheduled_runs.get(trigger.trigger_id) or _get_next_run_time(cron_expression, user_timezone)
                 if not next_run:
                     continue
                     
@@ -249,9 +255,9 @@ async def get_agent_upcoming_runs(
                     next_run_time_local=next_run_local.isoformat(),
                     timezone=user_timezone,
                     cron_expression=cron_expression,
-                    execution_type=config.get('execution_type', 'agent'),
-                    agent_prompt=config.get('agent_prompt'),
-                    workflow_id=config.get('workflow_id'),
+                    execution_type=trigger_config.get('execution_type', 'agent'),
+                    agent_prompt=trigger_config.get('agent_prompt'),
+                    workflow_id=trigger_config.get('workflow_id'),
                     is_active=trigger.is_active,
                     human_readable=human_readable
                 ))
@@ -273,7 +279,17 @@ async def get_agent_upcoming_runs(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Next run per (cron expression, timezone), reused until that time has passed
+_next_run_cache: Dict[Tuple[str, str], datetime] = {}
+NEXT_RUN_CACHE_MAX_ENTRIES = 10000
+
+
 def _get_next_run_time(cron_expression: str, user_timezone: str) -> Optional[datetime]:
+    key = (cron_expression, user_timezone)
+    cached = _next_run_cache.get(key)
+    if cached and cached > datetime.now(timezone.utc):
+        return cached
+    
     try:
         tz = pytz.timezone(user_timezone)
         now_local = datetime.now(tz)
@@ -283,6 +299,9 @@ def _get_next_run_time(cron_expression: str, user_timezone: str) -> Optional[dat
         next_run_local = cron.get_next(datetime)
         next_run_utc = next_run_local.astimezone(timezone.utc)
         
+        if len(_next_run_cache) >= NEXT_RUN_CACHE_MAX_ENTRIES:
+            _next_run_cache.clear()
+        _next_run_cache[key] = next_run_utc
         return next_run_utc
         
     except Exception as e:
@@ -527,6 +546,37 @@ async def delete_trigger(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def _queue_webhook(trigger_svc: TriggerService, trigger_id: str, raw_data: Dict[str, Any], request: Request) -> JSONResponse:
+    trigger = await trigger_svc.get_trigger(trigger_id)
+    if not trigger:
+        return JSONResponse(
+            status_code=404,
+            content={"success": False, "error": "Trigger not found"}
+        )
+    if not trigger.is_active:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": f"Trigger {trigger_id} is not active"}
+        )
+    
+    delivery = await enqueue_webhook(
+        trigger_id,
+        raw_data,
+        request.headers,
+        await request.body(),
+        request_id=structlog.contextvars.get_contextvars().get('request_id')
+    )
+    return JSONResponse(
+        status_code=200 if delivery["duplicate"] else 202,
+        content={
+            "success": True,
+            "queued": True,
+            "duplicate": delivery["duplicate"],
+            "delivery_id": delivery["delivery_id"]
+        }
+    )
+
+
 @router.post("/{trigger_id}/webhook")
 async def trigger_webhook(
     trigger_id: str,
@@ -542,6 +592,9 @@ async def trigger_webhook(
         except:
             raw_data = {}
         
+        if config.TRIGGER_WEBHOOK_QUEUED:
+            return await _queue_webhook(trigger_svc, trigger_id, raw_data, request)
+        
         result = await trigger_svc.process_trigger_event(trigger_id, raw_data)
         
         if not result.success:
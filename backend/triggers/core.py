@@ -513,18 +513,26 @@ class TriggerManager:
         }).execute()
     
     async def _update_trigger(self, trigger_config: TriggerConfig):
+        from .repositories.cache import trigger_row_cache
         client = await self.db.client
-        await client.table('agent_triggers').update({
-            'name': trigger_config.name,
-            'description': trigger_config.description,
-            'is_active': trigger_config.is_active,
-            'config': trigger_config.config,
-            'updated_at': trigger_config.updated_at.isoformat()
-        }).eq('trigger_id', trigger_config.trigger_id).execute()
+        try:
+            await client.table('agent_triggers').update({
+                'name': trigger_config.name,
+                'description': trigger_config.description,
+                'is_active': trigger_config.is_active,
+                'config': trigger_config.config,
+                'updated_at': trigger_config.updated_at.isoformat()
+            }).eq('trigger_id', trigger_config.trigger_id).execute()
+        finally:
+            trigger_row_cache.invalidate(trigger_config.trigger_id)
     
     async def _delete_trigger(self, trigger_id: str):
+        from .repositories.cache import trigger_row_cache
         client = await self.db.client
-        await client.table('agent_triggers').delete().eq('trigger_id', trigger_id).execute()
+        try:
+            await client.table('agent_triggers').delete().eq('trigger_id', trigger_id).execute()
+        finally:
+            trigger_row_cache.invalidate(trigger_id)
     
     async def _load_trigger(self, trigger_id: str) -> Optional[Dict[str, Any]]:
         client = await self.db.client
@@ -538,8 +546,8 @@ class TriggerManager:
     
     async def _log_trigger_event(self, event: TriggerEvent, result: TriggerResult):
         try:
-            client = await self.db.client
-            await client.table('trigger_event_logs').insert({
+            from .repositories.event_log_buffer import trigger_event_log_buffer
+            trigger_event_log_buffer.add({
                 'trigger_id': event.trigger_id,
                 'agent_id': event.agent_id,
                 'trigger_type': event.trigger_type.value if hasattr(event.trigger_type, 'value') else str(event.trigger_type),
@@ -553,7 +561,7 @@ class TriggerManager:
                 'execution_variables': result.execution_variables,
                 'error_message': result.error_message,
                 'logged_at': datetime.now(timezone.utc).isoformat()
-            }).execute()
+            })
         except Exception as e:
             from utils.logger import logger
             logger.error(f"Failed to log trigger event: {e}") 
\ No newline at end of file
@@ -83,6 +83,7 @@ class ProviderRegistryService:
         self._providers: Dict[str, TriggerProvider] = {}
         self._provider_definitions: Dict[str, ProviderDefinition] = {}
         self._provider_factory = ProviderFactory()
+        self._builtin_providers_loaded = False
     
     def register_provider_definition(self, definition: ProviderDefinition) -> None:
         self._provider_definitions[definition.provider_id] = definition
@@ -115,6 +116,9 @@ class ProviderRegistryService:
         return provider_id in self._provider_definitions
     
     async def load_builtin_providers(self) -> None:
+        if self._builtin_providers_loaded:
+            return
+        
         builtin_providers = [
             ProviderDefinition(
                 provider_id="schedule",
@@ -187,6 +191,7 @@ class ProviderRegistryService:
         
         for provider_def in builtin_providers:
             self.register_provider_definition(provider_def)
+        self._builtin_providers_loaded = True
 
 
 class ProviderFactory:
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Query
 from fastapi.responses import JSONResponse
+import asyncio
 import json
 import uuid
 from datetime import datetime, timezone
@@ -135,6 +136,52 @@ def convert_json_to_steps(steps_json: List[Dict[str, Any]]) -> List[WorkflowStep
         result.append(step)
     return result
 
+def convert_legacy_step(step_data: Dict[str, Any]) -> WorkflowStepResponse:
+    return WorkflowStepResponse(
+        id=step_data['id'],
+        name=step_data['name'],
+        description=step_data.get('description'),
+        type=step_data['type'],
+        config=step_data.get('config', {}),
+        conditions=step_data.get('conditions'),
+        order=step_data['step_order'],
+        created_at=step_data['created_at'],
+        updated_at=step_data['updated_at']
+    )
+
+async def load_legacy_steps(client, workflow_ids: List[str]) -> Dict[str, List[WorkflowStepResponse]]:
+    """Rows from the old workflow_steps table for several workflows in one query"""
+    steps_by_workflow: Dict[str, List[WorkflowStepResponse]] = {workflow_id: [] for workflow_id in workflow_ids}
+    if not workflow_ids:
+        return steps_by_workflow
+    
+    steps_result = await client.table('workflow_steps').select('*').in_('workflow_id', workflow_ids).order('step_order').execute()
+    for step_data in steps_result.data:
+        steps_by_workflow.setdefault(step_data['workflow_id'], []).append(convert_legacy_step(step_data))
+    return steps_by_workflow
+
+def build_workflow_response(
+    workflow_data: Dict[str, Any],
+    legacy_steps: Dict[str, List[WorkflowStepResponse]]
+) -> WorkflowResponse:
+    if workflow_data.get('steps'):
+        steps = convert_json_to_steps(workflow_data['steps'])
+    else:
+        steps = legacy_steps.get(workflow_data['id'], [])
+    
+    return WorkflowResponse(
+        id=workflow_data['id'],
+        agent_id=workflow_data['agent_id'],
+        name=workflow_data['name'],
+        description=workflow_data.get('description'),
+        status=workflow_data['status'],
+        trigger_phrase=workflow_data.get('trigger_phrase'),
+        is_default=workflow_data['is_default'],
+        steps=steps,
+        created_at=workflow_data['created_at'],
+        updated_at=workflow_data['updated_at']
+    )
+
 async def get_db_connection() -> DBConnection:
     if not hasattr(get_db_connection, '_db'):
         from services.supabase import DBConnection
@@ -153,41 +200,13 @@ async def get_agent_workflows(
     client = await db.client
     
     workflows_result = await client.table('agent_workflows').select('*').eq('agent_id', agent_id).order('created_at', desc=True).execute()
-    workflows = []
     
-    for workflow_data in workflows_result.data:
-        steps = []
-        if workflow_data.get('steps'):
-            steps = convert_json_to_steps(workflow_data['steps'])
-        else:
-            workflow_steps_result = await client.table('workflow_steps').select('*').eq('workflow_id', workflow_data['id']).order('step_order').execute()
-            for step_data in workflow_steps_result.data:
-                steps.append(WorkflowStepResponse(
-                    id=step_data['id'],
-                    name=step_data['name'],
-                    description=step_data.get('description'),
-                    type=step_data['type'],
-                    config=step_data.get('config', {}),
-                    conditions=step_data.get('conditions'),
-                    order=step_data['step_order'],
-                    created_at=step_data['created_at'],
-                    updated_at=step_data['updated_at']
-                ))
-        
-        workflows.append(WorkflowResponse(
-            id=workflow_data['id'],
-            agent_id=workflow_data['agent_id'],
-            name=workflow_data['name'],
-            description=workflow_data.get('description'),
-            status=workflow_data['status'],
-            trigger_phrase=workflow_data.get('trigger_phrase'),
-            is_default=workflow_data['is_default'],
-            steps=steps,
-            created_at=workflow_data['created_at'],
-            updated_at=workflow_data['updated_at']
-        ))
+    # Workflows saved before steps moved into agent_workflows.steps keep them in
+    # workflow_steps; fetch those for all such workflows at once
+    legacy_ids = [workflow_data['id'] for workflow_data in workflows_result.data if not workflow_data.get('steps')]
+    legacy_steps = await load_legacy_steps(client, legacy_ids)
     
-    return workflows
+    return [build_workflow_response(workflow_data, legacy_steps) for workflow_data in workflows_result.data]
 
 @router.post("/agents/{agent_id}/workflows")
 async def create_agent_workflow(
@@ -264,45 +283,27 @@ async def update_agent_workflow(
     if workflow_data.steps is not None:
         steps_json = convert_steps_to_json(workflow_data.steps)
         update_data['steps'] = steps_json
-        
-        await client.table('workflow_steps').delete().eq('workflow_id', workflow_id).execute()
     
+    pending = []
     if update_data:
-        await client.table('agent_workflows').update(update_data).eq('id', workflow_id).execute()
-    
-    updated_workflow = await client.table('agent_workflows').select('*').eq('id', workflow_id).execute()
-    workflow_data = updated_workflow.data[0]
+        # Also bumped by the table trigger; updated_at is the version the workflow
+        # prompt cache is keyed on
+        update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+        pending.append(client.table('agent_workflows').update(update_data).eq('id', workflow_id).execute())
+    if workflow_data.steps is not None:
+        pending.append(client.table('workflow_steps').delete().eq('workflow_id', workflow_id).execute())
+    results = await asyncio.gather(*pending)
     
-    steps = []
-    if workflow_data.get('steps'):
-        steps = convert_json_to_steps(workflow_data['steps'])
+    if update_data and results[0].data:
+        updated_workflow = results[0].data[0]
     else:
-        workflow_steps_result = await client.table('workflow_steps').select('*').eq('workflow_id', workflow_id).order('step_order').execute()
-        for step_data in workflow_steps_result.data:
-            steps.append(WorkflowStepResponse(
-                id=step_data['id'],
-                name=step_data['name'],
-                description=step_data.get('description'),
-                type=step_data['type'],
-                config=step_data.get('config', {}),
-                conditions=step_data.get('conditions'),
-                order=step_data['step_order'],
-                created_at=step_data['created_at'],
-                updated_at=step_data['updated_at']
-            ))
+        updated_workflow = workflow_result.data[0]
     
-    return WorkflowResponse(
-        id=workflow_data['id'],
-        agent_id=workflow_data['agent_id'],
-        name=workflow_data['name'],
-        description=workflow_data.get('description'),
-        status=workflow_data['status'],
-        trigger_phrase=workflow_data.get('trigger_phrase'),
-        is_default=workflow_data['is_default'],
-        steps=steps,
-        created_at=workflow_data['created_at'],
-        updated_at=workflow_data['updated_at']
-    )
+    legacy_steps = {}
+    if not updated_workflow.get('steps'):
+        legacy_steps = await load_legacy_steps(client, [workflow_id])
+    
+    return build_workflow_response(updated_workflow, legacy_steps)
 
 @router.delete("/agents/{agent_id}/workflows/{workflow_id}")
 async def delete_agent_workflow(
@@ -24,8 +24,12 @@ class ScheduleTriggerProvider(TriggerProvider):
         else:
             self._qstash = QStash(token=self._qstash_token)
     
+    @property
+    def _use_local_scheduler(self) -> bool:
+        return config.TRIGGER_LOCAL_SCHEDULER
+    
     async def validate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        if not self._qstash:
+        if not self._use_local_scheduler and not self._qstash:
             raise ValueError("QSTASH_TOKEN environment variable is required for QStash scheduling")
         
         if 'cron_expression' not in config:
@@ -119,6 +123,16 @@ class ScheduleTriggerProvider(TriggerProvider):
             return cron_expression
     
     async def setup_trigger(self, trigger: Trigger) -> bool:
+        if self._use_local_scheduler:
+            try:
+                from ...services.scheduler import local_scheduler
+                next_run = await local_scheduler.add(trigger)
+                logger.info(f"Scheduled trigger {trigger.trigger_id} locally, next run at {datetime.fromtimestamp(next_run, timezone.utc).isoformat()}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to schedule trigger {trigger.trigger_id} locally: {e}")
+                return False
+        
         if not self._qstash:
             logger.error("QStash client not available")
             return False
@@ -171,6 +185,17 @@ class ScheduleTriggerProvider(TriggerProvider):
             return False
     
     async def teardown_trigger(self, trigger: Trigger) -> bool:
+        if self._use_local_scheduler:
+            try:
+                from ...services.scheduler import local_scheduler
+                await local_scheduler.remove(trigger.trigger_id)
+            except Exception as e:
+                logger.error(f"Failed to unschedule trigger {trigger.trigger_id} locally: {e}")
+                return False
+            # Schedules created before the switch may still exist in QStash
+            if not trigger.config.config.get('qstash_schedule_id'):
+                return True
+        
         if not self._qstash:
             logger.warning("QStash client not available, skipping teardown")
             return True
@@ -248,6 +273,14 @@ class ScheduleTriggerProvider(TriggerProvider):
             )
     
     async def health_check(self, trigger: Trigger) -> bool:
+        if self._use_local_scheduler:
+            try:
+                from ...services.scheduler import local_scheduler
+                return await local_scheduler.is_scheduled(trigger.trigger_id)
+            except Exception as e:
+                logger.error(f"Health check failed for trigger {trigger.trigger_id}: {e}")
+                return False
+        
         if not self._qstash:
             logger.warning("QStash client not available for health check")
             return False
@@ -286,7 +319,7 @@ class ScheduleTriggerProvider(TriggerProvider):
         return await self.setup_trigger(trigger)
     
     async def update_trigger(self, trigger: Trigger) -> bool:
-        if not self._qstash:
+        if not self._use_local_scheduler and not self._qstash:
             logger.warning("QStash client not available for trigger update")
             return True
         
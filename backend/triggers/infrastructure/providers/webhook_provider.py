@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from ...domain.entities import TriggerProvider, TriggerEvent, TriggerResult, Trigger
 from ...domain.value_objects import ProviderDefinition, ExecutionVariables
 
@@ -6,6 +6,10 @@ from ...domain.value_objects import ProviderDefinition, ExecutionVariables
 class GenericWebhookProvider(TriggerProvider):
     def __init__(self, provider_definition: ProviderDefinition):
         super().__init__(provider_definition)
+        self._field_paths = {
+            output_field: tuple(input_path.split('.'))
+            for output_field, input_path in (provider_definition.field_mappings or {}).items()
+        }
     
     async def validate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
         required_fields = self.provider_definition.config_schema.get("required", [])
@@ -24,11 +28,10 @@ class GenericWebhookProvider(TriggerProvider):
         try:
             execution_variables = ExecutionVariables()
             
-            if self.provider_definition.field_mappings:
-                for output_field, input_path in self.provider_definition.field_mappings.items():
-                    value = self._extract_field(event.raw_data, input_path)
-                    if value is not None:
-                        execution_variables = execution_variables.add(output_field, value)
+            for output_field, keys in self._field_paths.items():
+                value = self._extract_field(event.raw_data, keys)
+                if value is not None:
+                    execution_variables = execution_variables.add(output_field, value)
             
             agent_prompt = self._create_agent_prompt(event.raw_data, execution_variables.variables)
             
@@ -56,8 +59,7 @@ class GenericWebhookProvider(TriggerProvider):
     async def health_check(self, trigger: Trigger) -> bool:
         return True
     
-    def _extract_field(self, data: Dict[str, Any], path: str) -> Any:
-        keys = path.split('.')
+    def _extract_field(self, data: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
         current = data
         
         for key in keys:
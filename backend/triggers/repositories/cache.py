@@ -0,0 +1,108 @@
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+# Writes through the trigger repository or TriggerManager invalidate this process's
+# entry; other processes see the change once their entry expires.
+TRIGGER_CACHE_TTL_SECONDS = 60
+TRIGGER_CACHE_MAX_ENTRIES = 5000
+
+
+class TriggerRowCache:
+    """Process-wide cache of agent_triggers rows keyed by trigger_id.
+    
+    Webhook deliveries look the same trigger up several times per request and
+    high-frequency triggers are hit constantly, so rows read by id are kept here and
+    mapped to a fresh Trigger on every read. Callers get their own copy of the row
+    and can mutate the entity without touching the cache. Missing triggers are not
+    cached, so a trigger created in another process is visible immediately.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int = TRIGGER_CACHE_TTL_SECONDS,
+        max_entries: int = TRIGGER_CACHE_MAX_ENTRIES
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._rows: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Per-trigger load locks with the number of tasks holding or waiting on each.
+        # The webhook endpoint looks up arbitrary ids, so a lock only lives while in use.
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        # Bumped by invalidate() so loads that started before it don't cache their row
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @asynccontextmanager
+    async def _trigger_lock(self, trigger_id: str) -> AsyncIterator[None]:
+        lock = self._locks.get(trigger_id)
+        if lock is None:
+            lock = self._locks[trigger_id] = asyncio.Lock()
+        self._lock_users[trigger_id] = self._lock_users.get(trigger_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            remaining = self._lock_users[trigger_id] - 1
+            if remaining:
+                self._lock_users[trigger_id] = remaining
+            else:
+                del self._lock_users[trigger_id]
+                del self._locks[trigger_id]
+    
+    def _get_fresh(self, trigger_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._rows.get(trigger_id)
+        if entry is None:
+            return None
+        row, loaded_at = entry
+        if time.monotonic() - loaded_at >= self._ttl_seconds:
+            self._rows.pop(trigger_id, None)
+            return None
+        self._rows.move_to_end(trigger_id)
+        return row
+    
+    async def get_row(
+        self,
+        trigger_id: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """The trigger's row, from memory when possible, otherwise from `loader`"""
+        row = self._get_fresh(trigger_id)
+        if row is not None:
+            self.hits += 1
+            return copy.deepcopy(row)
+        
+        async with self._trigger_lock(trigger_id):
+            row = self._get_fresh(trigger_id)
+            if row is not None:
+                self.hits += 1
+                return copy.deepcopy(row)
+            
+            self.misses += 1
+            generation = self._generation
+            row = await loader()
+            if row is not None and generation == self._generation:
+                self._rows[trigger_id] = (row, time.monotonic())
+                while len(self._rows) > self._max_entries:
+                    self._rows.popitem(last=False)
+            return copy.deepcopy(row)
+    
+    def invalidate(self, trigger_id: Optional[str] = None) -> None:
+        """Drop the cached row for `trigger_id`, or all of them.
+        
+        A load already in flight still answers its caller, but its row isn't cached.
+        """
+        self._generation += 1
+        if trigger_id is None:
+            self._rows.clear()
+            return
+        
+        self._rows.pop(trigger_id, None)
+
+
+trigger_row_cache = TriggerRowCache()
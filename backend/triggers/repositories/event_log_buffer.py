@@ -0,0 +1,145 @@
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services.supabase import DBConnection
+from utils.config import config
+from utils.logger import logger
+
+# Upper bounds of the latency histogram buckets; one more bucket holds everything slower
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+MAX_PENDING_EVENTS = 10000
+MAX_PENDING_ROLLUPS = 10000
+
+
+class TriggerEventLogBuffer:
+    """Process-wide buffer for trigger event logs and their per-minute rollups.
+    
+    Events are written to trigger_event_logs in one bulk insert once
+    TRIGGER_EVENT_LOG_BATCH_SIZE of them are pending or TRIGGER_EVENT_LOG_FLUSH_MS
+    after the first one, whichever comes first. Each flush also adds the buffered
+    success/failure counts and latency histograms to trigger_event_minute_stats,
+    which trigger stats read instead of the raw logs. Events still in memory when a
+    process dies are lost, so the flush interval bounds how many can go missing.
+    """
+    
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        db: Optional[DBConnection] = None
+    ):
+        self.batch_size = batch_size or config.TRIGGER_EVENT_LOG_BATCH_SIZE
+        self.flush_interval_ms = flush_interval_ms or config.TRIGGER_EVENT_LOG_FLUSH_MS
+        self._db = db
+        self._rows: List[Dict[str, Any]] = []
+        self._rollups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self.flushed = 0
+        self.dropped = 0
+    
+    def add(self, row: Dict[str, Any], execution_time_ms: Optional[int] = None) -> None:
+        """Buffer one trigger_event_logs row; must be called from a running event loop"""
+        self._add_to_rollup(row, execution_time_ms)
+        if len(self._rows) >= MAX_PENDING_EVENTS:
+            self.dropped += 1
+            return
+        
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._spawn(self.flush())
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = self._spawn(self._flush_later())
+    
+    def _add_to_rollup(self, row: Dict[str, Any], execution_time_ms: Optional[int]) -> None:
+        minute = datetime.now(timezone.utc).replace(second=0, microsecond=0).isoformat()
+        key = (row['trigger_id'], minute)
+        rollup = self._rollups.get(key)
+        if rollup is None:
+            if len(self._rollups) >= MAX_PENDING_ROLLUPS:
+                return
+            rollup = self._rollups[key] = {
+                'trigger_id': row['trigger_id'],
+                'minute': minute,
+                'agent_id': row['agent_id'],
+                'success_count': 0,
+                'failure_count': 0,
+                'latency_count': 0,
+                'latency_total_ms': 0,
+                'latency_max_ms': 0,
+                'latency_buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        
+        if row.get('success'):
+            rollup['success_count'] += 1
+        else:
+            rollup['failure_count'] += 1
+        
+        if execution_time_ms is not None:
+            rollup['latency_count'] += 1
+            rollup['latency_total_ms'] += execution_time_ms
+            rollup['latency_max_ms'] = max(rollup['latency_max_ms'], execution_time_ms)
+            rollup['latency_buckets'][bisect_left(LATENCY_BUCKETS_MS, execution_time_ms)] += 1
+    
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+    
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval_ms / 1000)
+        await self.flush()
+    
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of log rows written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            rows, self._rows = self._rows, []
+            rollups, self._rollups = self._rollups, {}
+            if not rows and not rollups:
+                return 0
+            
+            try:
+                client = await (self._db or DBConnection()).client
+            except Exception as e:
+                logger.error(f"Failed to flush {len(rows)} trigger event log(s): {e}")
+                self.dropped += len(rows)
+                return 0
+            
+            # A bulk insert needs the same columns in every row, and the legacy
+            # TriggerManager logs fewer columns than the repository
+            batches: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for row in rows:
+                batches.setdefault(tuple(sorted(row)), []).append(row)
+            
+            written = 0
+            for batch in batches.values():
+                try:
+                    await client.table('trigger_event_logs').insert(batch).execute()
+                    written += len(batch)
+                except Exception as e:
+                    logger.error(f"Failed to write {len(batch)} trigger event log(s): {e}")
+                    self.dropped += len(batch)
+            self.flushed += written
+            
+            if rollups:
+                try:
+                    await client.rpc('record_trigger_event_rollups', {'p_rows': list(rollups.values())}).execute()
+                except Exception as e:
+                    logger.error(f"Failed to record trigger event rollups: {e}")
+            
+            return written
+    
+    async def close(self) -> None:
+        if self._flusher and not self._flusher.done():
+            self._flusher.cancel()
+        await self.flush()
+
+
+trigger_event_log_buffer = TriggerEventLogBuffer()
@@ -1,12 +1,16 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import uuid
 
 from .interfaces import TriggerRepository, TriggerEventLogRepository, RepositoryError, NotFoundError
+from .cache import trigger_row_cache
+from .event_log_buffer import trigger_event_log_buffer, LATENCY_BUCKETS_MS
 from ..domain.entities import Trigger, TriggerEvent, TriggerResult
 from ..domain.value_objects import TriggerIdentity, TriggerConfig, TriggerMetadata, TriggerType, ExecutionVariables
 from services.supabase import DBConnection
 
+TRIGGER_PAGE_SIZE = 1000
+
 
 class SupabaseTriggerRepository(TriggerRepository):
     
@@ -35,16 +39,19 @@ class SupabaseTriggerRepository(TriggerRepository):
     
     async def find_by_id(self, trigger_id: str) -> Optional[Trigger]:
         try:
-            client = await self._db.client
-            result = await client.table('agent_triggers').select('*').eq('trigger_id', trigger_id).execute()
-            
-            if not result.data:
+            data = await trigger_row_cache.get_row(trigger_id, lambda: self._load_row(trigger_id))
+            if not data:
                 return None
             
-            return self._map_to_trigger(result.data[0])
+            return self._map_to_trigger(data)
         except Exception as e:
             raise RepositoryError(f"Failed to find trigger by ID: {str(e)}")
     
+    async def _load_row(self, trigger_id: str) -> Optional[Dict[str, Any]]:
+        client = await self._db.client
+        result = await client.table('agent_triggers').select('*').eq('trigger_id', trigger_id).execute()
+        return result.data[0] if result.data else None
+    
     async def find_by_agent_id(self, agent_id: str) -> List[Trigger]:
         try:
             client = await self._db.client
@@ -54,12 +61,24 @@ class SupabaseTriggerRepository(TriggerRepository):
         except Exception as e:
             raise RepositoryError(f"Failed to find triggers by agent ID: {str(e)}")
     
-    async def find_active_triggers(self) -> List[Trigger]:
+    async def find_active_triggers(self, trigger_type: Optional[TriggerType] = None) -> List[Trigger]:
+        """Every active trigger, paged by trigger_id past PostgREST's row cap"""
         try:
             client = await self._db.client
-            result = await client.table('agent_triggers').select('*').eq('is_active', True).execute()
-            
-            return [self._map_to_trigger(data) for data in result.data]
+            triggers = []
+            last_id = None
+            while True:
+                query = client.table('agent_triggers').select('*').eq('is_active', True)
+                if trigger_type is not None:
+                    query = query.eq('trigger_type', trigger_type.value)
+                if last_id is not None:
+                    query = query.gt('trigger_id', last_id)
+                result = await query.order('trigger_id').limit(TRIGGER_PAGE_SIZE).execute()
+                page = result.data or []
+                triggers.extend(self._map_to_trigger(data) for data in page)
+                if len(page) < TRIGGER_PAGE_SIZE:
+                    return triggers
+                last_id = page[-1]['trigger_id']
         except Exception as e:
             raise RepositoryError(f"Failed to find active triggers: {str(e)}")
     
@@ -98,6 +117,8 @@ class SupabaseTriggerRepository(TriggerRepository):
             raise
         except Exception as e:
             raise RepositoryError(f"Failed to update trigger: {str(e)}")
+        finally:
+            trigger_row_cache.invalidate(trigger.trigger_id)
     
     async def delete(self, trigger_id: str) -> bool:
         try:
@@ -107,6 +128,8 @@ class SupabaseTriggerRepository(TriggerRepository):
             return len(result.data) > 0
         except Exception as e:
             raise RepositoryError(f"Failed to delete trigger: {str(e)}")
+        finally:
+            trigger_row_cache.invalidate(trigger_id)
     
     async def exists(self, trigger_id: str) -> bool:
         try:
@@ -173,9 +196,8 @@ class SupabaseTriggerEventLogRepository(TriggerEventLogRepository):
     ) -> str:
         try:
             log_id = str(uuid.uuid4())
-            client = await self._db.client
             
-            await client.table('trigger_event_logs').insert({
+            trigger_event_log_buffer.add({
                 'log_id': log_id,
                 'trigger_id': event.trigger_id,
                 'agent_id': event.agent_id,
@@ -193,7 +215,7 @@ class SupabaseTriggerEventLogRepository(TriggerEventLogRepository):
                 'execution_time_ms': execution_time_ms,
                 'event_timestamp': event.timestamp.isoformat(),
                 'logged_at': datetime.now(timezone.utc).isoformat()
-            }).execute()
+            }, execution_time_ms)
             
             return log_id
         except Exception as e:
@@ -267,34 +289,55 @@ class SupabaseTriggerEventLogRepository(TriggerEventLogRepository):
     ) -> Dict[str, Any]:
         try:
             client = await self._db.client
-            since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-            since = since.replace(hour=since.hour - hours)
-            
-            result = await client.table('trigger_event_logs')\
-                .select('success, execution_time_ms')\
-                .eq('trigger_id', trigger_id)\
-                .gte('logged_at', since.isoformat())\
-                .execute()
+            since = (datetime.now(timezone.utc) - timedelta(hours=hours)).replace(second=0, microsecond=0)
             
-            logs = result.data
-            total_executions = len(logs)
-            successful_executions = sum(1 for log in logs if log['success'])
-            failed_executions = total_executions - successful_executions
+            result = await client.rpc('get_trigger_event_stats', {
+                'p_trigger_id': trigger_id,
+                'p_since': since.isoformat()
+            }).execute()
             
-            execution_times = [log['execution_time_ms'] for log in logs if log['execution_time_ms'] is not None]
-            avg_execution_time = sum(execution_times) / len(execution_times) if execution_times else 0
+            stats = result.data[0] if result.data else {}
+            successful_executions = stats.get('success_count') or 0
+            failed_executions = stats.get('failure_count') or 0
+            total_executions = successful_executions + failed_executions
+            latency_count = stats.get('latency_count') or 0
+            latency_buckets = stats.get('latency_buckets') or []
+            latency_max_ms = stats.get('latency_max_ms') or 0
             
             return {
                 'total_executions': total_executions,
                 'successful_executions': successful_executions,
                 'failed_executions': failed_executions,
                 'success_rate': successful_executions / total_executions if total_executions > 0 else 0,
-                'average_execution_time_ms': avg_execution_time,
+                # Latencies cover processing the event (parsing the payload into a
+                # trigger result), not the agent or workflow run it starts;
+                # average_execution_time_ms keeps its old name for existing clients
+                'average_execution_time_ms': (stats.get('latency_total_ms') or 0) / latency_count if latency_count else 0,
+                'p50_processing_time_ms': self._latency_percentile(latency_buckets, latency_count, latency_max_ms, 0.5),
+                'p95_processing_time_ms': self._latency_percentile(latency_buckets, latency_count, latency_max_ms, 0.95),
+                'max_processing_time_ms': latency_max_ms,
+                'processing_time_histogram': dict(zip(
+                    [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + [f"gt_{LATENCY_BUCKETS_MS[-1]}ms"],
+                    latency_buckets
+                )),
                 'period_hours': hours
             }
         except Exception as e:
             raise RepositoryError(f"Failed to get execution stats: {str(e)}")
     
+    @staticmethod
+    def _latency_percentile(buckets: List[int], count: int, max_ms: int, quantile: float) -> int:
+        """Upper bound of the histogram bucket holding the quantile, capped at the max"""
+        if not count:
+            return 0
+        target = quantile * count
+        cumulative = 0
+        for index, bucket_count in enumerate(buckets):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min(LATENCY_BUCKETS_MS[index], max_ms) if index < len(LATENCY_BUCKETS_MS) else max_ms
+        return max_ms
+    
     async def cleanup_old_logs(self, days_to_keep: int = 30) -> int:
         try:
             client = await self._db.client
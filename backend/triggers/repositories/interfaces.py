@@ -11,7 +11,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from ..domain.entities import Trigger, TriggerEvent, TriggerResult
-from ..domain.value_objects import TriggerIdentity
+from ..domain.value_objects import TriggerIdentity, TriggerType
 
 
 class TriggerRepository(ABC):
@@ -68,10 +68,13 @@ class TriggerRepository(ABC):
         pass
     
     @abstractmethod
-    async def find_active_triggers(self) -> List[Trigger]:
+    async def find_active_triggers(self, trigger_type: Optional[TriggerType] = None) -> List[Trigger]:
         """
         Find all active triggers
         
+        Args:
+            trigger_type: Only return triggers of this type
+            
         Returns:
             List of active triggers
             
@@ -124,10 +124,10 @@ class SessionManager:
         client = await self._db.client
         
         try:
-            from sandbox.sandbox import create_sandbox, delete_sandbox
+            from sandbox.sandbox import delete_sandbox
+            from sandbox.pool import sandbox_pool
             
-            sandbox_pass = str(uuid.uuid4())
-            sandbox = await create_sandbox(sandbox_pass, project_id)
+            sandbox, sandbox_pass = await sandbox_pool.acquire(project_id)
             sandbox_id = sandbox.id
             
             vnc_link = await sandbox.get_preview_link(6080)
@@ -235,22 +235,27 @@ class AgentExecutor:
     async def _get_agent_config(self, agent_id: str) -> Dict[str, Any]:
         from agent.versioning.domain.entities import AgentId
         from agent.versioning.infrastructure.dependencies import set_db_connection, get_container
+        from agent.versioning.config_cache import agent_config_cache
         
         set_db_connection(self._db)
         
         try:
             client = await self._db.client
-            agent_result = await client.table('agents').select('account_id, name').eq('agent_id', agent_id).execute()
+            agent_result = await client.table('agents').select('account_id, name, current_version_id').eq('agent_id', agent_id).execute()
             if not agent_result.data:
                 return None
             
             agent_data = agent_result.data[0]
             
-            container = get_container()
-            version_service = await container.get_version_service()
-            agent_id_obj = AgentId.from_string(agent_id)
+            active_version = None
+            if agent_data.get('current_version_id'):
+                active_version = await agent_config_cache.get_version(agent_id, agent_data['current_version_id'])
             
-            active_version = await version_service.version_repo.find_active_version(agent_id_obj)
+            if not active_version:
+                container = get_container()
+                version_service = await container.get_version_service()
+                agent_id_obj = AgentId.from_string(agent_id)
+                active_version = await version_service.version_repo.find_active_version(agent_id_obj)
             if not active_version:
                 return {
                     'agent_id': agent_id,
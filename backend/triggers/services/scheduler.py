@@ -0,0 +1,298 @@
+"""
+Built-in cron scheduler for schedule triggers.
+
+With TRIGGER_LOCAL_SCHEDULER enabled, ScheduleTriggerProvider registers schedules
+here instead of with QStash. Every active schedule lives in Redis as a spec in the
+`trigger_scheduler:specs` hash and a next fire time in the `trigger_scheduler:due`
+sorted set. The sorted set is the shared min-heap, so a tick is one ZRANGEBYSCORE
+over the entries that are due and never touches the database.
+
+Each API process runs the loop, but only the one holding the `trigger_scheduler:leader`
+lease ticks. A new leader resyncs the specs with the active schedule triggers in
+agent_triggers once. Due triggers are sent in batches to the process_trigger_webhook
+actor with a delivery id derived from the trigger and fire time, so a fire
+dispatched twice (after a crash or a lease handover) runs once.
+
+Cron expressions are evaluated in the trigger's own timezone, so no conversion to a
+UTC cron is needed and DST changes are handled by croniter.
+
+Misfire policies apply when fire times were missed, for example while no leader was
+running:
+- fire_once: run once for the missed occurrences (the default)
+- catch_up: run every missed occurrence, up to MAX_CATCH_UP_RUNS
+- skip: run only if the latest occurrence is within the misfire grace period
+
+Switching an existing deployment over also requires deleting its QStash schedules,
+or both will fire.
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import croniter
+import pytz
+
+from ..domain.entities import Trigger
+from ..domain.value_objects import TriggerType
+from services.supabase import DBConnection
+from services import redis
+from utils.config import config
+from utils.logger import logger
+from run_agent_background import process_trigger_webhook
+
+SPECS_KEY = "trigger_scheduler:specs"
+DUE_KEY = "trigger_scheduler:due"
+LEADER_KEY = "trigger_scheduler:leader"
+LEADER_TTL_SECONDS = 15
+TICK_SECONDS = 1
+MAX_CATCH_UP_RUNS = 10
+MISFIRE_POLICIES = ("fire_once", "catch_up", "skip")
+
+
+def _next_fire_time(cron_expression: str, user_timezone: str, after: float) -> int:
+    tz = pytz.timezone(user_timezone)
+    return int(croniter.croniter(cron_expression, datetime.fromtimestamp(after, tz)).get_next(float))
+
+
+class LocalScheduler:
+    """Leader-elected cron loop over the schedules stored in Redis"""
+    
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or config.TRIGGER_SCHEDULER_BATCH_SIZE
+        self.instance_id = str(uuid.uuid4())
+        self._db: Optional[DBConnection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._is_leader = False
+        self.dispatched = 0
+        self.skipped = 0
+    
+    @staticmethod
+    def _build_spec(trigger: Trigger) -> Dict[str, Any]:
+        trigger_config = trigger.config.config
+        misfire_policy = trigger_config.get('misfire_policy', config.TRIGGER_SCHEDULER_MISFIRE_POLICY)
+        if misfire_policy not in MISFIRE_POLICIES:
+            misfire_policy = "fire_once"
+        return {
+            "trigger_id": trigger.trigger_id,
+            "agent_id": trigger.agent_id,
+            "cron_expression": trigger_config['cron_expression'],
+            "timezone": trigger_config.get('timezone', 'UTC'),
+            "misfire_policy": misfire_policy,
+            "execution_type": trigger_config.get('execution_type', 'agent'),
+            "agent_prompt": trigger_config.get('agent_prompt'),
+            "workflow_id": trigger_config.get('workflow_id'),
+            "workflow_input": trigger_config.get('workflow_input', {}),
+        }
+    
+    async def add(self, trigger: Trigger, keep_next_run: bool = False) -> int:
+        """Store the trigger's schedule and return its next fire time.
+        
+        With `keep_next_run` an already scheduled fire time is left alone, which is
+        what a resync wants; setup and updates reschedule from now.
+        """
+        spec = self._build_spec(trigger)
+        next_run = _next_fire_time(spec['cron_expression'], spec['timezone'], datetime.now(timezone.utc).timestamp())
+        
+        redis_client = await redis.get_client()
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hset(SPECS_KEY, trigger.trigger_id, json.dumps(spec))
+        pipe.zadd(DUE_KEY, {trigger.trigger_id: next_run}, nx=keep_next_run)
+        await pipe.execute()
+        return next_run
+    
+    async def remove(self, trigger_id: str) -> None:
+        redis_client = await redis.get_client()
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zrem(DUE_KEY, trigger_id)
+        pipe.hdel(SPECS_KEY, trigger_id)
+        await pipe.execute()
+    
+    async def is_scheduled(self, trigger_id: str) -> bool:
+        redis_client = await redis.get_client()
+        return await redis_client.zscore(DUE_KEY, trigger_id) is not None
+    
+    async def get_next_runs(self, trigger_ids: List[str]) -> Dict[str, datetime]:
+        """Scheduled fire times for the given triggers, skipping unscheduled ones"""
+        if not trigger_ids:
+            return {}
+        redis_client = await redis.get_client()
+        pipe = redis_client.pipeline(transaction=False)
+        for trigger_id in trigger_ids:
+            pipe.zscore(DUE_KEY, trigger_id)
+        scores = await pipe.execute()
+        return {
+            trigger_id: datetime.fromtimestamp(score, timezone.utc)
+            for trigger_id, score in zip(trigger_ids, scores)
+            if score is not None
+        }
+    
+    async def resync(self) -> None:
+        """Make the stored schedules match the active schedule triggers.
+        
+        Stale schedules are only removed after the full scan; a failing page raises
+        before anything is removed, so a partial read can't unschedule live triggers.
+        """
+        from ..repositories.implementations import SupabaseTriggerRepository
+        
+        triggers = await SupabaseTriggerRepository(self._db).find_active_triggers(TriggerType.SCHEDULE)
+        schedule_triggers = [trigger for trigger in triggers if trigger.config.config.get('cron_expression')]
+        active_ids = {trigger.trigger_id for trigger in schedule_triggers}
+        
+        for trigger in schedule_triggers:
+            try:
+                await self.add(trigger, keep_next_run=True)
+            except Exception as e:
+                logger.warning(f"Failed to schedule trigger {trigger.trigger_id}: {e}")
+        
+        redis_client = await redis.get_client()
+        stale_ids = [trigger_id for trigger_id in await redis_client.hkeys(SPECS_KEY) if trigger_id not in active_ids]
+        for trigger_id in stale_ids:
+            await self.remove(trigger_id)
+        
+        logger.info(f"Trigger scheduler resynced {len(active_ids)} schedule(s), removed {len(stale_ids)} stale")
+    
+    def _plan(self, spec: Dict[str, Any], scheduled: int, now: float) -> Tuple[List[int], int]:
+        """Fire times to dispatch for a due entry, and the entry's next fire time"""
+        cron_expression, user_timezone = spec['cron_expression'], spec['timezone']
+        tz = pytz.timezone(user_timezone)
+        
+        occurrences = [scheduled]
+        caught_up = True
+        iterator = croniter.croniter(cron_expression, datetime.fromtimestamp(scheduled, tz))
+        while True:
+            fire_time = int(iterator.get_next(float))
+            if fire_time > now:
+                next_run = fire_time
+                break
+            if len(occurrences) >= MAX_CATCH_UP_RUNS:
+                caught_up = False
+                next_run = _next_fire_time(cron_expression, user_timezone, now)
+                break
+            occurrences.append(fire_time)
+        
+        policy = spec.get('misfire_policy', 'fire_once')
+        if policy == 'catch_up':
+            return occurrences, next_run
+        if policy == 'skip':
+            latest = occurrences[-1]
+            on_time = caught_up and now - latest <= config.TRIGGER_SCHEDULER_MISFIRE_GRACE_SECONDS
+            return ([latest] if on_time else []), next_run
+        return occurrences[-1:], next_run
+    
+    async def tick(self) -> int:
+        """Dispatch one batch of due triggers; returns how many entries were due"""
+        redis_client = await redis.get_client()
+        now = datetime.now(timezone.utc).timestamp()
+        due = await redis_client.zrangebyscore(DUE_KEY, '-inf', now, start=0, num=self.batch_size, withscores=True)
+        if not due:
+            return 0
+        
+        trigger_ids = [trigger_id for trigger_id, _ in due]
+        specs = await redis_client.hmget(SPECS_KEY, trigger_ids)
+        
+        reschedule: Dict[str, int] = {}
+        orphans: List[str] = []
+        for (trigger_id, scheduled), raw_spec in zip(due, specs):
+            if raw_spec is None:
+                orphans.append(trigger_id)
+                continue
+            
+            spec = json.loads(raw_spec)
+            try:
+                fire_times, next_run = self._plan(spec, int(scheduled), now)
+            except Exception as e:
+                logger.warning(f"Dropping schedule for trigger {trigger_id} with invalid cron {spec.get('cron_expression')}: {e}")
+                orphans.append(trigger_id)
+                continue
+            
+            if not fire_times:
+                self.skipped += 1
+            for fire_time in fire_times:
+                # The delivery id makes a fire dispatched twice run once in the worker
+                process_trigger_webhook.send(
+                    trigger_id=trigger_id,
+                    delivery_id=f"schedule:{trigger_id}:{fire_time}",
+                    raw_data={
+                        "trigger_id": trigger_id,
+                        "agent_id": spec['agent_id'],
+                        "execution_type": spec['execution_type'],
+                        "agent_prompt": spec.get('agent_prompt'),
+                        "workflow_id": spec.get('workflow_id'),
+                        "workflow_input": spec.get('workflow_input', {}),
+                        "timestamp": datetime.fromtimestamp(fire_time, timezone.utc).isoformat()
+                    }
+                )
+                self.dispatched += 1
+            reschedule[trigger_id] = next_run
+        
+        pipe = redis_client.pipeline(transaction=False)
+        if reschedule:
+            # XX: a trigger removed meanwhile stays removed
+            pipe.zadd(DUE_KEY, reschedule, xx=True)
+        if orphans:
+            pipe.zrem(DUE_KEY, *orphans)
+            pipe.hdel(SPECS_KEY, *orphans)
+        await pipe.execute()
+        
+        if reschedule:
+            logger.info(f"Trigger scheduler dispatched {len(reschedule)} due schedule(s)")
+        return len(due)
+    
+    async def _hold_leadership(self) -> bool:
+        redis_client = await redis.get_client()
+        if self._is_leader:
+            if await redis_client.get(LEADER_KEY) == self.instance_id:
+                await redis_client.expire(LEADER_KEY, LEADER_TTL_SECONDS)
+                return True
+            self._is_leader = False
+            logger.info("Trigger scheduler lost leadership")
+        
+        if await redis_client.set(LEADER_KEY, self.instance_id, ex=LEADER_TTL_SECONDS, nx=True):
+            # If the resync fails the lease lapses and the next attempt resyncs again
+            await self.resync()
+            self._is_leader = True
+            logger.info(f"Trigger scheduler {self.instance_id} is now the leader")
+        return self._is_leader
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self._hold_leadership():
+                    while await self.tick() >= self.batch_size and await self._hold_leadership():
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Trigger scheduler tick failed: {e}")
+            await asyncio.sleep(TICK_SECONDS)
+    
+    def start(self, db: DBConnection) -> None:
+        self._db = db
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Trigger scheduler started")
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        if self._is_leader:
+            self._is_leader = False
+            try:
+                redis_client = await redis.get_client()
+                if await redis_client.get(LEADER_KEY) == self.instance_id:
+                    await redis_client.delete(LEADER_KEY)
+            except Exception as e:
+                logger.warning(f"Failed to release trigger scheduler leadership: {e}")
+
+
+local_scheduler = LocalScheduler()
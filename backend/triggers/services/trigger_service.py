@@ -1,3 +1,4 @@
+import time
 import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
@@ -6,6 +7,7 @@ from ..domain.entities import Trigger, TriggerEvent, TriggerResult
 from ..domain.value_objects import TriggerIdentity, TriggerConfig, TriggerMetadata, TriggerType
 from ..domain.services import TriggerDomainService, ProviderRegistryService
 from ..repositories.interfaces import TriggerRepository, TriggerEventLogRepository
+from utils.logger import logger
 
 
 class TriggerService:
@@ -179,7 +181,15 @@ class TriggerService:
             raw_data=raw_data
         )
         
+        # Times processing the event only; the run it starts is executed by the caller
+        started_at = time.monotonic()
         result = await self._domain_service.process_trigger_event(trigger, event)
+        
+        try:
+            await self._event_log_repo.log_event(event, result, int((time.monotonic() - started_at) * 1000))
+        except Exception as e:
+            logger.warning(f"Failed to log event for trigger {trigger_id}: {e}")
+        
         return result
     
     async def get_trigger_logs(
@@ -0,0 +1,217 @@
+"""
+Queued ingestion for trigger webhooks.
+
+With TRIGGER_WEBHOOK_QUEUED enabled the webhook endpoint only checks that the trigger
+exists and is active, records an idempotency key and hands the payload to the
+process_trigger_webhook Dramatiq actor. The sender gets its response as soon as the
+message is on RabbitMQ, and creating the project, sandbox and agent run happens in
+the worker.
+
+Retries from the sender collapse onto the first delivery: the idempotency key comes
+from a delivery header (Idempotency-Key, Upstash-Message-Id, X-GitHub-Delivery, ...)
+when there is one, otherwise from a hash of the body with a short window. Each
+trigger runs at most TRIGGER_WEBHOOK_MAX_CONCURRENCY deliveries at a time across all
+workers; deliveries over the limit are put back on the queue with a delay. Each
+running delivery holds a lease in a per-trigger sorted set that lapses after
+INFLIGHT_TTL_SECONDS, so a worker that dies mid-delivery only holds its slot until
+then. The delivery's "processing" marker lapses on the same lease: a redelivery that
+finds it still held is requeued rather than dropped, and only "done" and "rejected"
+are remembered for TRIGGER_WEBHOOK_DEDUP_SECONDS.
+"""
+
+import hashlib
+import time
+import uuid
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from ..domain.entities import TriggerEvent
+from ..support.factory import TriggerModuleFactory
+from services.supabase import DBConnection
+from services import redis
+from utils.config import config
+from utils.logger import logger
+from run_agent_background import process_trigger_webhook
+
+IDEMPOTENCY_HEADERS = (
+    "idempotency-key",
+    "x-idempotency-key",
+    "upstash-message-id",
+    "x-github-delivery",
+)
+# Without a delivery header only identical bodies arriving close together are
+# treated as retries, so legitimately repeated payloads still run
+BODY_DEDUP_SECONDS = 300
+INFLIGHT_TTL_SECONDS = 600
+REQUEUE_DELAY_MS = 2000
+# A redelivery finding the delivery still marked processing waits this long before
+# looking again; by then it has either finished or its marker has lapsed
+PROCESSING_REQUEUE_DELAY_MS = 30000
+
+# Drops lapsed leases, then adds this delivery's lease if the trigger has a free slot
+_ACQUIRE_SLOT_SCRIPT = """
+redis.call('zremrangebyscore', KEYS[1], '-inf', ARGV[1])
+if redis.call('zscore', KEYS[1], ARGV[4]) == false and redis.call('zcard', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('zadd', KEYS[1], ARGV[2], ARGV[4])
+redis.call('expire', KEYS[1], ARGV[5])
+return 1
+"""
+
+
+def get_idempotency_key(headers: Mapping[str, str], body: bytes) -> Tuple[str, int]:
+    """The delivery's idempotency key and how long it should be remembered"""
+    for header in IDEMPOTENCY_HEADERS:
+        value = headers.get(header)
+        if value:
+            return f"{header}:{value}", config.TRIGGER_WEBHOOK_DEDUP_SECONDS
+    return f"body:{hashlib.sha256(body).hexdigest()}", BODY_DEDUP_SECONDS
+
+
+async def enqueue_webhook(
+    trigger_id: str,
+    raw_data: Dict[str, Any],
+    headers: Mapping[str, str],
+    body: bytes,
+    request_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Queue a delivery unless it repeats one already accepted.
+    
+    Returns the delivery id and whether the request was a duplicate. The idempotency
+    key is released again if the message cannot be queued, so the sender's retry is
+    accepted.
+    """
+    key, ttl = get_idempotency_key(headers, body)
+    dedup_key = f"trigger_webhook:dedup:{trigger_id}:{key}"
+    delivery_id = str(uuid.uuid4())
+    
+    if not await redis.set(dedup_key, delivery_id, ex=ttl, nx=True):
+        existing = await redis.get(dedup_key)
+        logger.info(f"Duplicate webhook for trigger {trigger_id} ({key}), original delivery {existing}")
+        return {"delivery_id": existing, "duplicate": True}
+    
+    try:
+        process_trigger_webhook.send(
+            trigger_id=trigger_id,
+            delivery_id=delivery_id,
+            raw_data=raw_data,
+            request_id=request_id
+        )
+    except Exception:
+        await redis.delete(dedup_key)
+        raise
+    
+    logger.info(f"Queued webhook delivery {delivery_id} for trigger {trigger_id}")
+    return {"delivery_id": delivery_id, "duplicate": False}
+
+
+def _inflight_key(trigger_id: str) -> str:
+    return f"trigger_webhook:inflight:{trigger_id}"
+
+
+async def _acquire_slot(trigger_id: str, delivery_id: str) -> bool:
+    limit = config.TRIGGER_WEBHOOK_MAX_CONCURRENCY
+    if limit <= 0:
+        return True
+    
+    redis_client = await redis.get_client()
+    now = time.time()
+    acquired = await redis_client.eval(
+        _ACQUIRE_SLOT_SCRIPT, 1, _inflight_key(trigger_id),
+        now, now + INFLIGHT_TTL_SECONDS, limit, delivery_id, INFLIGHT_TTL_SECONDS
+    )
+    return bool(acquired)
+
+
+async def _release_slot(trigger_id: str, delivery_id: str) -> None:
+    if config.TRIGGER_WEBHOOK_MAX_CONCURRENCY <= 0:
+        return
+    
+    try:
+        redis_client = await redis.get_client()
+        await redis_client.zrem(_inflight_key(trigger_id), delivery_id)
+    except Exception as e:
+        logger.warning(f"Failed to release webhook slot for trigger {trigger_id}: {e}")
+
+
+def _requeue(trigger_id: str, delivery_id: str, raw_data: Dict[str, Any], request_id: Optional[str], delay_ms: int) -> None:
+    process_trigger_webhook.send_with_options(
+        kwargs={
+            "trigger_id": trigger_id,
+            "delivery_id": delivery_id,
+            "raw_data": raw_data,
+            "request_id": request_id,
+        },
+        delay=delay_ms
+    )
+
+
+async def execute_queued_webhook(
+    db: DBConnection,
+    trigger_id: str,
+    delivery_id: str,
+    raw_data: Dict[str, Any],
+    request_id: Optional[str] = None
+) -> None:
+    """Process a queued delivery the way the synchronous endpoint would.
+    
+    Runs in the Dramatiq worker. A delivery redelivered by the broker after it was
+    handled is skipped, and one that is still being processed elsewhere is requeued
+    until that finishes or its marker lapses. A delivery that raises is released so
+    Dramatiq's retry runs it again.
+    """
+    delivery_key = f"trigger_webhook:delivery:{delivery_id}"
+    marker = f"processing:{uuid.uuid4()}"
+    if not await redis.set(delivery_key, marker, ex=INFLIGHT_TTL_SECONDS, nx=True):
+        state = await redis.get(delivery_key)
+        if state and state.startswith("processing"):
+            logger.info(f"Webhook delivery {delivery_id} is still being processed, requeueing")
+            _requeue(trigger_id, delivery_id, raw_data, request_id, PROCESSING_REQUEUE_DELAY_MS)
+        else:
+            logger.info(f"Webhook delivery {delivery_id} was already handled, skipping")
+        return
+    
+    if not await _acquire_slot(trigger_id, delivery_id):
+        await redis.delete_if_equals(delivery_key, marker)
+        logger.info(f"Trigger {trigger_id} is at its concurrency limit, requeueing delivery {delivery_id}")
+        _requeue(trigger_id, delivery_id, raw_data, request_id, REQUEUE_DELAY_MS)
+        return
+    
+    try:
+        trigger_svc, execution_svc, _ = await TriggerModuleFactory.create_trigger_module(db)
+        
+        result = await trigger_svc.process_trigger_event(trigger_id, raw_data)
+        if not result.success:
+            logger.warning(f"Webhook delivery {delivery_id} for trigger {trigger_id} was rejected: {result.error_message}")
+            await redis.set(delivery_key, "rejected", ex=config.TRIGGER_WEBHOOK_DEDUP_SECONDS)
+            return
+        
+        if not (result.should_execute_agent or result.should_execute_workflow):
+            logger.info(f"Webhook delivery {delivery_id} processed but no execution needed")
+            await redis.set(delivery_key, "done", ex=config.TRIGGER_WEBHOOK_DEDUP_SECONDS)
+            return
+        
+        trigger = await trigger_svc.get_trigger(trigger_id)
+        if not trigger:
+            logger.warning(f"Trigger {trigger_id} not found for execution")
+            await redis.set(delivery_key, "rejected", ex=config.TRIGGER_WEBHOOK_DEDUP_SECONDS)
+            return
+        
+        event = TriggerEvent(
+            trigger_id=trigger_id,
+            agent_id=trigger.agent_id,
+            trigger_type=trigger.trigger_type,
+            raw_data=raw_data
+        )
+        execution_result = await execution_svc.execute_trigger_result(
+            agent_id=trigger.agent_id,
+            trigger_result=result,
+            trigger_event=event
+        )
+        await redis.set(delivery_key, "done", ex=config.TRIGGER_WEBHOOK_DEDUP_SECONDS)
+        logger.info(f"Webhook delivery {delivery_id} executed agent {trigger.agent_id}: {execution_result}")
+    except Exception:
+        await redis.delete_if_equals(delivery_key, marker)
+        raise
+    finally:
+        await _release_slot(trigger_id, delivery_id)
@@ -1,6 +1,12 @@
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 import json
 
+# Rendered workflow JSON and summary per (workflow id, updated_at). Every save bumps
+# updated_at, so a cached rendering never outlives the version it was built from.
+WORKFLOW_CACHE_MAX_ENTRIES = 512
+_rendered_workflows: "OrderedDict[Tuple[str, str], Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
 
 class WorkflowParser:
     def __init__(self):
@@ -136,12 +142,15 @@ class WorkflowParser:
         }
 
 
-def format_workflow_for_llm(
-    workflow_config: Dict[str, Any],
-    steps: List[Dict[str, Any]],
-    input_data: Dict[str, Any] = None,
-    available_tools: List[str] = None
-) -> str:
+def _render_workflow(workflow_config: Dict[str, Any], steps: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    version = None
+    if workflow_config.get('id') and workflow_config.get('updated_at'):
+        version = (str(workflow_config['id']), str(workflow_config['updated_at']))
+        cached = _rendered_workflows.get(version)
+        if cached is not None:
+            _rendered_workflows.move_to_end(version)
+            return cached
+    
     parser = WorkflowParser()
     parsed_steps = parser.parse_workflow_steps(steps)
     summary = parser.get_workflow_summary(parsed_steps)
@@ -156,7 +165,21 @@ def format_workflow_for_llm(
     
     llm_workflow["summary"] = summary
     
-    workflow_json = json.dumps(llm_workflow, indent=2)
+    rendered = (json.dumps(llm_workflow, indent=2), summary)
+    if version is not None:
+        _rendered_workflows[version] = rendered
+        while len(_rendered_workflows) > WORKFLOW_CACHE_MAX_ENTRIES:
+            _rendered_workflows.popitem(last=False)
+    return rendered
+
+
+def format_workflow_for_llm(
+    workflow_config: Dict[str, Any],
+    steps: List[Dict[str, Any]],
+    input_data: Dict[str, Any] = None,
+    available_tools: List[str] = None
+) -> str:
+    workflow_json, summary = _render_workflow(workflow_config, steps)
     tools_list = ', '.join(available_tools) if available_tools else 'Use any available tools from your system prompt'
     input_json = json.dumps(input_data, indent=2) if input_data else 'None provided'
     
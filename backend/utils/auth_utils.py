@@ -5,6 +5,13 @@ import jwt
 from jwt.exceptions import PyJWTError
 from utils.logger import structlog
 from utils.config import config
+from services.supabase import DBConnection
+from services import metrics
+from services.single_flight import SingleFlight
+
+# Concurrent checks for the same thread and user share one lookup; a granted
+# check is reused briefly, a denied one never is
+thread_access_flight = SingleFlight("thread_access", ttl_seconds=config.ACCESS_CHECK_CACHE_TTL_SECONDS)
 
 # This function extracts the user ID from Supabase JWT
 async def get_current_user_id_from_jwt(request: Request) -> str:
@@ -189,29 +196,46 @@ async def verify_thread_access(client, thread_id: str, user_id: str):
     Raises:
         HTTPException: If the user doesn't have access to the thread
     """
+    return await thread_access_flight.do(
+        (thread_id, user_id),
+        lambda: _verify_thread_access(client, thread_id, user_id)
+    )
+
+async def _verify_thread_access(client, thread_id: str, user_id: str):
     try:
-        # Query the thread to get account information
-        thread_result = await client.table('threads').select('*,project_id').eq('thread_id', thread_id).execute()
+        pool = await DBConnection().get_pool()
+        if pool:
+            # Thread, project visibility and membership in one prepared query
+            access = await pool.fetchrow('get_thread_access', thread_id, user_id)
+            if not access:
+                raise HTTPException(status_code=404, detail="Thread not found")
+            if access['is_public'] or (access['account_id'] and access['is_member']):
+                return True
+            raise HTTPException(status_code=403, detail="Not authorized to access this thread")
 
-        if not thread_result.data or len(thread_result.data) == 0:
-            raise HTTPException(status_code=404, detail="Thread not found")
-        
-        thread_data = thread_result.data[0]
-        
-        # Check if project is public
-        project_id = thread_data.get('project_id')
-        if project_id:
-            project_result = await client.table('projects').select('is_public').eq('project_id', project_id).execute()
-            if project_result.data and len(project_result.data) > 0:
-                if project_result.data[0].get('is_public'):
-                    return True
+        with metrics.measure_query('get_thread_access', 'rest'):
+            # Query the thread to get account information
+            thread_result = await client.table('threads').select('*,project_id').eq('thread_id', thread_id).execute()
+
+            if not thread_result.data or len(thread_result.data) == 0:
+                raise HTTPException(status_code=404, detail="Thread not found")
             
-        account_id = thread_data.get('account_id')
-        # When using service role, we need to manually check account membership instead of using current_user_account_role
-        if account_id:
-            account_user_result = await client.schema('basejump').from_('account_user').select('account_role').eq('user_id', user_id).eq('account_id', account_id).execute()
-            if account_user_result.data and len(account_user_result.data) > 0:
-                return True
+            thread_data = thread_result.data[0]
+            
+            # Check if project is public
+            project_id = thread_data.get('project_id')
+            if project_id:
+                project_result = await client.table('projects').select('is_public').eq('project_id', project_id).execute()
+                if project_result.data and len(project_result.data) > 0:
+                    if project_result.data[0].get('is_public'):
+                        return True
+                
+            account_id = thread_data.get('account_id')
+            # When using service role, we need to manually check account membership instead of using current_user_account_role
+            if account_id:
+                account_user_result = await client.schema('basejump').from_('account_user').select('account_role').eq('user_id', user_id).eq('account_id', account_id).execute()
+                if account_user_result.data and len(account_user_result.data) > 0:
+                    return True
         raise HTTPException(status_code=403, detail="Not authorized to access this thread")
     except HTTPException:
         # Re-raise HTTP exceptions as they are
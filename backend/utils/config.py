@@ -193,11 +193,22 @@ class Configuration:
     SUPABASE_ANON_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
     
+    # Optional direct Postgres pool for hot queries (needs asyncpg); set the
+    # statement cache to 0 behind a transaction-mode pooler
+    DATABASE_URL: Optional[str] = None
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_COMMAND_TIMEOUT_SECONDS: int = 30
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    
     # Redis configuration
     REDIS_HOST: Optional[str] = None
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: Optional[str] = None
     REDIS_SSL: bool = True
+    # Connections per process; callers wait up to the timeout for a free one
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT_SECONDS: int = 10
     
     # Daytona sandbox configuration
     DAYTONA_API_KEY: str
@@ -226,6 +237,36 @@ class Configuration:
     SANDBOX_SNAPSHOT_NAME = "daytonaio/sandbox:0.4.3"
     SANDBOX_ENTRYPOINT = "/usr/bin/supervisord -n -c /etc/supervisor/conf.d/supervisord.conf"
 
+    # Warm sandbox pool per snapshot (0 disables it); idle sandboxes are replaced
+    # before Daytona's 15 minute auto-stop would make them slow to claim
+    SANDBOX_POOL_SIZE: int = 0
+    SANDBOX_POOL_MAX_IDLE_SECONDS: int = 600
+    # How often each API process tops the pool up and replaces entries about to go stale
+    SANDBOX_POOL_REFRESH_SECONDS: int = 60
+
+    # Queued trigger webhooks: acknowledge after enqueueing and run in the worker,
+    # collapsing sender retries and limiting concurrent deliveries per trigger (0 = no limit)
+    TRIGGER_WEBHOOK_QUEUED: bool = False
+    TRIGGER_WEBHOOK_MAX_CONCURRENCY: int = 2
+    TRIGGER_WEBHOOK_DEDUP_SECONDS: int = 86400
+
+    # Built-in Redis cron scheduler for schedule triggers instead of QStash; the
+    # misfire policy (fire_once, catch_up or skip) is the default for triggers that set none
+    TRIGGER_LOCAL_SCHEDULER: bool = False
+    TRIGGER_SCHEDULER_MISFIRE_POLICY: str = "fire_once"
+    TRIGGER_SCHEDULER_MISFIRE_GRACE_SECONDS: int = 300
+    TRIGGER_SCHEDULER_BATCH_SIZE: int = 100
+
+    # Trigger event logs are bulk inserted every N events or T milliseconds
+    TRIGGER_EVENT_LOG_BATCH_SIZE: int = 100
+    TRIGGER_EVENT_LOG_FLUSH_MS: int = 1000
+
+    # Identical concurrent reads share one lookup per worker; results are then
+    # reused for this many seconds (0 = only coalesce in-flight reads)
+    ACCESS_CHECK_CACHE_TTL_SECONDS: int = 5
+    SUBSCRIPTION_CACHE_TTL_SECONDS: int = 5
+    FEATURE_FLAG_CACHE_TTL_SECONDS: int = 5
+
     # LangFuse configuration
     LANGFUSE_PUBLIC_KEY: Optional[str] = None
     LANGFUSE_SECRET_KEY: Optional[str] = None
@@ -233,7 +274,30 @@ class Configuration:
 
     # Admin API key for server-side operations
     ADMIN_API_KEY: Optional[str] = None
-    
+
+    # Decrypted credential config cache (set TTL to 0 to disable)
+    CREDENTIAL_CACHE_TTL_SECONDS: int = 300
+    CREDENTIAL_CACHE_MAX_ENTRIES: int = 2048
+
+    # Pipedream client pooling and app metadata caching
+    PIPEDREAM_MAX_CONNECTIONS: int = 20
+    PIPEDREAM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    PIPEDREAM_APP_CACHE_TTL_SECONDS: int = 3600
+
+    # Knowledge base extraction process pool and per-file limits
+    KB_EXTRACTION_WORKERS: int = 2
+    KB_EXTRACTION_TIMEOUT_SECONDS: int = 60
+    KB_EXTRACTION_CPU_SECONDS: int = 45
+    KB_INSERT_BATCH_SIZE: int = 100
+    KB_GIT_MIRROR_DIR: Optional[str] = None
+    KB_GIT_MIRROR_MAX_ENTRIES: int = 50
+
+    # Knowledge base retrieval: chunk size and how much is injected per agent run
+    KB_CHUNK_TOKENS: int = 300
+    KB_CHUNK_OVERLAP_TOKENS: int = 40
+    KB_RETRIEVAL_TOP_K: int = 8
+    KB_RETRIEVAL_MAX_TOKENS: int = 4000
+
     @property
     def STRIPE_PRODUCT_ID(self) -> str:
         if self.ENV_MODE == EnvMode.STAGING:
@@ -0,0 +1,101 @@
+"""
+In-memory cache for decrypted credential configs.
+
+Credential and profile rows are Fernet-encrypted at rest, and decrypting them
+(plus JSON parsing and integrity checks) on every resolve adds up when an agent
+run loads many MCP/Pipedream profiles. This cache keeps decrypted configs in
+process memory for a short, bounded lifetime.
+
+Entries are keyed by the row id and validated against the row's config_hash, so
+a row rewritten by another worker or another repository is never served stale.
+Writers should still call `evict` after updates and deletes so the plaintext does
+not outlive the row in this process.
+
+Usage:
+    from utils.credential_cache import decrypted_config_cache
+
+    config = decrypted_config_cache.get(profile_id, config_hash)
+    if config is None:
+        config = decrypt(...)
+        decrypted_config_cache.set(profile_id, config_hash, config)
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.config import config
+
+# (config_hash, decrypted config, monotonic expiry)
+_Entry = Tuple[str, Dict[str, Any], float]
+
+
+class DecryptedConfigCache:
+    """Thread-safe LRU cache of decrypted configs with a per-entry TTL."""
+
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 2048):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0 and self._max_entries > 0
+
+    def get(self, entry_id: str, config_hash: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached config, or None on miss, expiry or hash mismatch."""
+        if not self.enabled or not entry_id:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            cached_hash, cached_config, expires_at = entry
+            if cached_hash != config_hash or expires_at <= time.monotonic():
+                del self._entries[entry_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+
+        return copy.deepcopy(cached_config)
+
+    def set(self, entry_id: str, config_hash: str, config_data: Dict[str, Any]) -> None:
+        if not self.enabled or not entry_id:
+            return
+
+        expires_at = time.monotonic() + self._ttl_seconds
+        with self._lock:
+            self._entries[entry_id] = (config_hash, copy.deepcopy(config_data), expires_at)
+            self._entries.move_to_end(entry_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, entry_id: str) -> None:
+        with self._lock:
+            self._entries.pop(entry_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Process-wide instance shared by every credential/profile repository so that an
+# eviction from one facade is visible to all of them.
+decrypted_config_cache = DecryptedConfigCache(
+    ttl_seconds=config.CREDENTIAL_CACHE_TTL_SECONDS,
+    max_entries=config.CREDENTIAL_CACHE_MAX_ENTRIES,
+)
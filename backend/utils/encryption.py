@@ -4,9 +4,14 @@ Simple encryption utilities for Pipedream credential profiles.
 
 import os
 import base64
+import threading
+from typing import Optional
 from cryptography.fernet import Fernet
 from utils.logger import logger
 
+_cipher: Optional[Fernet] = None
+_cipher_lock = threading.Lock()
+
 
 def get_encryption_key() -> bytes:
     """Get or create encryption key for credentials."""
@@ -29,6 +34,16 @@ def get_encryption_key() -> bytes:
     return key
 
 
+def get_cipher() -> Fernet:
+    """Return the process-wide Fernet cipher, building it on first use."""
+    global _cipher
+    if _cipher is None:
+        with _cipher_lock:
+            if _cipher is None:
+                _cipher = Fernet(get_encryption_key())
+    return _cipher
+
+
 def encrypt_data(data: str) -> str:
     """
     Encrypt a string and return base64 encoded encrypted data.
@@ -39,8 +54,7 @@ def encrypt_data(data: str) -> str:
     Returns:
         Base64 encoded encrypted string
     """
-    encryption_key = get_encryption_key()
-    cipher = Fernet(encryption_key)
+    cipher = get_cipher()
     
     # Convert string to bytes
     data_bytes = data.encode('utf-8')
@@ -62,8 +76,7 @@ def decrypt_data(encrypted_data: str) -> str:
     Returns:
         Decrypted string
     """
-    encryption_key = get_encryption_key()
-    cipher = Fernet(encryption_key)
+    cipher = get_cipher()
     
     # Decode base64 to get encrypted bytes
     encrypted_bytes = base64.b64decode(encrypted_data.encode('utf-8'))